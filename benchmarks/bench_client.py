@@ -0,0 +1,181 @@
+"""
+Benchmarks NovaAPI against an in-process NovaStubServer: login latency,
+build_info time and peak memory, the requests sent by a startup storm of
+threads requesting the same catalogs, and post_activities throughput.
+
+    python benchmarks/bench_client.py --activities 2000 --json results.json
+    python benchmarks/bench_client.py --baseline results.json --tolerance 0.2
+
+With --baseline the exit status is 1 when a result is worse than the
+baseline's by more than the tolerance.
+"""
+import argparse
+import datetime
+import gc
+import json
+import sys
+import time
+from multiprocessing.pool import ThreadPool
+from nova_api.api import NovaAPI
+from nova_api.ratelimit import AdaptiveRateLimiter
+from nova_api.stub import NovaStubServer, StubData
+from nova_api.transport import TransportConfig
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# Results where a larger value is better, a smaller one for the rest.
+HIGHER_IS_BETTER = ("post_activities_throughput",)
+
+
+def measure(function):
+    """
+    Calls a function measuring its time and, when tracemalloc is available,
+    the peak memory it allocated.
+    :return: tuple of seconds and bytes or None.
+    """
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+    start = time.time()
+    function()
+    elapsed = time.time() - start
+    peak = None
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def run(options):
+    """
+    Runs every benchmark.
+    :param options: argparse.Namespace
+    :return: dictionary of results.
+    """
+    data = StubData(
+        users=options.users,
+        projects=options.projects,
+        activities=options.activities,
+        seed=options.seed
+    )
+    results = {}
+    limiter = AdaptiveRateLimiter() if options.rate_limit else None
+    with NovaStubServer(data, latency=options.latency, capacity=options.capacity) as server:
+        logins = []
+        for _ in range(options.logins):
+            nova = server.api("user1")
+            logins.append(measure(nova.login)[0])
+        results["login_median_seconds"] = median(logins)
+        results["login_max_seconds"] = max(logins)
+        for name, concurrent in (("build_info", False), ("build_info_concurrent", True)):
+            nova = server.api("user1")
+            nova.login()
+            # Warm up so the server's serialized bodies aren't measured.
+            nova.build_info(concurrent=concurrent)
+            elapsed, peak = measure(lambda: nova.build_info(concurrent=concurrent))
+            results[name + "_seconds"] = elapsed
+            results[name + "_peak_bytes"] = peak
+        nova = server.api("user1")
+        nova.login()
+        requests = server.requests
+        pool = ThreadPool(options.workers)
+        try:
+            elapsed = measure(lambda: pool.map(
+                lambda _: (nova.get_profile(), nova.get_users(), nova.get_projects()),
+                range(options.workers)
+            ))[0]
+        finally:
+            pool.close()
+            pool.join()
+        results["startup_storm_seconds"] = elapsed
+        results["startup_storm_requests"] = server.requests - requests
+        day = datetime.datetime(2016, 6, 1)
+        specs = [
+            {
+                "project_id": 1 + i % options.projects,
+                "activitytype_id": 1,
+                "date": day + datetime.timedelta(days=i % 365),
+                "comments": "benchmark %d" % i,
+            }
+            for i in range(options.posts)
+        ]
+        nova = server.api("user1", transport=TransportConfig(rate_limiter=limiter))
+        nova.login()
+        bulk = nova.post_activities(specs, workers=options.workers)
+        results["post_activities_throughput"] = bulk.throughput
+        results["post_activities_failed"] = len(bulk.failed)
+        results["post_activities_retries"] = bulk.retries
+        results["requests"] = server.requests
+        results["overloaded_requests"] = server.overloaded
+        if limiter is not None:
+            results["rate_limit_rate"] = limiter.rate
+            results["rate_limit_concurrency"] = int(limiter.concurrency)
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """
+    :return: list of (name, result, baseline) worse than the baseline by more than tolerance.
+    """
+    worse = []
+    for name, value in sorted(results.items()):
+        expected = baseline.get(name)
+        if value is None or not expected or not name.endswith(("_seconds", "_bytes", "_throughput")):
+            continue
+        if name in HIGHER_IS_BETTER:
+            regressed = value < expected * (1 - tolerance)
+        else:
+            regressed = value > expected * (1 + tolerance)
+        if regressed:
+            worse.append((name, value, expected))
+    return worse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--activities", type=int, default=500,
+                        help="activities of each employee")
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--posts", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=NovaAPI.bulk_workers)
+    parser.add_argument("--latency", type=float, default=0,
+                        help="seconds the server waits before each answer")
+    parser.add_argument("--capacity", type=int,
+                        help="requests the server handles at once, 503 beyond it")
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="post through an AdaptiveRateLimiter")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="file to write the results to")
+    parser.add_argument("--baseline", help="results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    options = parser.parse_args(argv)
+    results = run(options)
+    for name, value in sorted(results.items()):
+        print("%-36s %s" % (name, "n/a" if value is None else "%.6g" % value))
+    if options.json:
+        with open(options.json, "w") as results_file:
+            json.dump(results, results_file, indent=2, sort_keys=True)
+    if options.baseline:
+        with open(options.baseline) as baseline_file:
+            worse = regressions(results, json.load(baseline_file), options.tolerance)
+        for name, value, expected in worse:
+            print("REGRESSION %s: %.6g, baseline %.6g" % (name, value, expected))
+        return 1 if worse else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from distutils.core import setup
+from setuptools import setup
 
 setup(
     name="nova_api",
@@ -12,5 +12,8 @@ setup(
         "nova_api",
     ],
     package_dir={'': 'src'},
-    install_requires=["requests", "pytest"]
+    install_requires=["requests", "pytest"],
+    extras_require={
+        "async": ['aiohttp; python_version >= "3.5"'],
+    }
 )
@@ -0,0 +1,484 @@
+"""
+Asyncio client for the nova API.
+Requires python 3.5+ and aiohttp, every request made by an AsyncNovaAPI
+instance goes through a single aiohttp.ClientSession so concurrent calls
+share the same connection pool.
+"""
+import asyncio
+import copy
+import uuid
+from .api import NovaAPI, activity_data, edit_activity_data
+from .nova_exceptions import LoginFailed, GetTokenEndpointError, AuthorizationHeaderNotSet
+from .decoding import loads
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+class AsyncNovaAPI(object):
+    """Class with coroutines to interact with nova API via http requests.
+    Mirrors the NovaAPI methods, but each call returns its parsed result
+    instead of assigning the response to an attribute.
+    """
+    client_id = NovaAPI.client_id
+    access_token_pattern = NovaAPI.access_token_pattern
+    authorized_url = NovaAPI.authorized_url
+    login_url = NovaAPI.login_url
+    authorization_url = NovaAPI.authorization_url
+    accounts_url = NovaAPI.accounts_url
+    profile_url = NovaAPI.profile_url
+    projects_url = NovaAPI.projects_url
+    project_types_url = NovaAPI.project_types_url
+    project_statuses_url = NovaAPI.project_statuses_url
+    project_assignments_url = NovaAPI.project_assignments_url
+    activity_types_url = NovaAPI.activity_types_url
+    account_statuses_url = NovaAPI.account_statuses_url
+    activities_url = NovaAPI.activities_url
+    users_url = NovaAPI.users_url
+    logout_url = NovaAPI.logout_url
+    employee_types_url = NovaAPI.employee_types_url
+    org_structures_url = NovaAPI.org_structures_url
+    technologies_url = NovaAPI.technologies_url
+    build_info_steps = NovaAPI.build_info_steps
+    # Maximum number of redirects followed while obtaining the access token.
+    max_token_redirects = 10
+    # Identical concurrent GET calls wait for the one in progress and share its result.
+    coalesce_requests = True
+
+    def __init__(self, username="", password="", connection_limit=100, session=None):
+        """ Initializes attributes.
+        :param username: string
+        :param password: string
+        :param connection_limit: integer, size of the shared connection pool.
+        :param session: aiohttp.ClientSession to use instead of creating one.
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncNovaAPI requires the aiohttp package.")
+        self.username = username
+        self.password = password
+        self.connection_limit = connection_limit
+        self.ses = session
+        self.headers = {"User-Agent": "Go-http-client/1.1"}
+        self.access_token = None
+        self.profile_id = None
+        self.state = str(uuid.uuid4())
+        self.profile = None
+        # URL holding the access token, set by get_auth_token.
+        self.token_url = None
+        # Future of each GET in progress, keyed by generation, url, params and Authorization.
+        self._in_flight = {}
+        # Advanced around every other request, GET calls only join the ones of the current one.
+        self._generation = 0
+        for name, _, _ in self.build_info_steps:
+            setattr(self, name, None)
+        pass
+
+    async def __aenter__(self):
+        self.session()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def session(self):
+        """
+        Returns the aiohttp session shared by every request,
+        creating it on first use.
+        :return: aiohttp.ClientSession
+        """
+        if self.ses is None:
+            self.ses = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connection_limit),
+                cookie_jar=aiohttp.CookieJar(unsafe=True)
+            )
+        return self.ses
+
+    async def close(self):
+        """
+        Closes the shared session and its connections.
+        :return: None
+        """
+        if self.ses is not None:
+            await self.ses.close()
+            self.ses = None
+        pass
+
+    async def _request(self, method, url, **kwargs):
+        """
+        Sends an http request and returns the parsed json body. A GET identical
+        to one in progress, and started after the last write was answered,
+        waits for it and returns a copy of its parsed body.
+        :param method: string, http method.
+        :param url: string
+        :param kwargs: extra keyword arguments for aiohttp.
+        :raises aiohttp.ClientResponseError: on error status codes.
+        :return: the parsed json body.
+        """
+        if not self.coalesce_requests:
+            return await self._send(method, url, **kwargs)
+        if method != "GET":
+            self._generation += 1
+            try:
+                return await self._send(method, url, **kwargs)
+            finally:
+                self._generation += 1
+        if set(kwargs) - {"params"}:
+            return await self._send(method, url, **kwargs)
+        key = (
+            self._generation,
+            url,
+            tuple(sorted((kwargs.get("params") or {}).items())),
+            self.headers.get("Authorization"),
+        )
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._send(method, url, **kwargs))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            return await asyncio.shield(future)
+        # A cancelled caller doesn't cancel the request the others wait for.
+        return copy.deepcopy(await asyncio.shield(future))
+
+    async def _send(self, method, url, **kwargs):
+        """
+        Sends an http request and returns the parsed json body.
+        :return: the parsed json body.
+        """
+        async with self.session().request(
+            method, url, headers=self.headers, **kwargs
+        ) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None, loads=loads)
+
+    def _check_authorization(self):
+        """
+        Raises AuthorizationHeaderNotSet if there is no Authorization header.
+        :return: None
+        """
+        if "Authorization" not in self.headers:
+            raise AuthorizationHeaderNotSet()
+        pass
+
+    ###
+    # Login Process.
+    ###
+
+    async def post_login(self):
+        """
+        Sends the http request to login.
+        :raises LoginFailed:
+        :return: string, the url the login redirected to.
+        """
+        data = {
+            "username": self.username,
+            "password": self.password
+        }
+        params = {
+            "redirect_uri": self.authorized_url,
+            "response_type": "token",
+            "state": self.state,
+            "client_id": self.client_id,
+            "backUrl": "/authorization"
+        }
+        async with self.session().post(
+            self.login_url, data=data, params=params, headers=self.headers
+        ) as response:
+            url = str(response.url)
+        if self.authorization_url not in url:
+            raise LoginFailed()
+        return url
+
+    async def go_authorized(self):
+        """
+        Makes an http request to be redirected to the authorization endpoint.
+        :return: string, the url the request redirected to.
+        """
+        params = {
+            "response_type": "token",
+            "state": self.state,
+            "redirect_uri": self.authorized_url + "&client_id=" + self.client_id,
+            "client_id": self.client_id,
+        }
+        async with self.session().get(
+            self.authorization_url, params=params, headers=self.headers
+        ) as response:
+            return str(response.url)
+
+    async def get_auth_token(self):
+        """
+        Sends the http request to obtain the endpoint in which the access token should be
+         as a get parameter.
+        Redirects are followed until reaching the authorized_url, which is not requested,
+        it's assigned to the token_url attribute.
+        :return: string, the url holding the access token.
+        """
+        params = {
+            "client_id": self.client_id,
+            "response_type": "token",
+            "state": self.state,
+            "redirect_uri": self.authorized_url,
+            "backUrl": "/authorization"
+        }
+        data = {"decision": "1"}
+        async with self.session().post(
+            self.authorization_url,
+            params=params,
+            data=data,
+            headers=self.headers,
+            allow_redirects=False
+        ) as response:
+            url = response.headers.get("Location", str(response.url))
+        for _ in range(self.max_token_redirects):
+            if url.startswith(self.authorized_url):
+                break
+            async with self.session().get(
+                url, headers=self.headers, allow_redirects=False
+            ) as response:
+                if "Location" not in response.headers:
+                    break
+                url = response.headers["Location"]
+        self.token_url = url
+        return url
+
+    def parse_token_response(self, url=None):
+        """
+        Obtains and sets the access_token from the url returned by get_auth_token.
+        Sets the Authorization HTTP header for bearer/token authentication in further requests.
+        :param url: string, defaults to the token_url attribute.
+        :raises GetTokenEndpointError:
+        :return: string, the access token.
+        """
+        if url is None:
+            url = self.token_url
+        if not url or not url.startswith(self.authorized_url):
+            raise GetTokenEndpointError()
+        match = self.access_token_pattern.match(url)
+        if not match:
+            raise GetTokenEndpointError()
+        self.access_token = match.groups()[0]
+        self.headers["Authorization"] = "bearer " + self.access_token
+        return self.access_token
+
+    async def login(self):
+        """
+        Calls all coroutines in order to login with the given credentials.
+        :return: dictionary, the logged in user's profile.
+        """
+        await self.post_login()
+        await self.go_authorized()
+        await self.get_auth_token()
+        self.parse_token_response()
+        self.profile = await self.get_profile()
+        self.profile_id = self.profile["id"]
+        return self.profile
+
+    async def build_info(self):
+        """
+        Requests every build_info endpoint concurrently and
+        sets the attributes with the parsed responses.
+        :return: None
+        """
+        names = [name for name, _, _ in self.build_info_steps]
+        results = await asyncio.gather(
+            *[getattr(self, get_method)() for _, get_method, _ in self.build_info_steps]
+        )
+        for name, result in zip(names, results):
+            setattr(self, name, result)
+        pass
+
+    ###
+    # Catalogs.
+    ###
+
+    async def get_profile(self):
+        """
+        Requests the logged in user's profile.
+        :return: dictionary
+        """
+        self._check_authorization()
+        params = {
+            "filter": '{"include":["contract"]}'
+        }
+        return await self._request("GET", self.profile_url, params=params)
+
+    async def get_users(self):
+        """
+        Requests the list of users.
+        :return: list
+        """
+        self._check_authorization()
+        return await self._request("GET", self.users_url)
+
+    async def get_accounts(self):
+        """
+        Requests the list of accounts.
+        :return: list
+        """
+        self._check_authorization()
+        return await self._request("GET", self.accounts_url)
+
+    async def get_projects(self):
+        """
+        Requests the list of existing projects.
+        :return: list
+        """
+        self._check_authorization()
+        return await self._request("GET", self.projects_url)
+
+    async def get_project_types(self):
+        """
+        Requests the list of project types.
+        :return: list
+        """
+        self._check_authorization()
+        return await self._request("GET", self.project_types_url)
+
+    async def get_project_status(self):
+        """
+        Requests the list of project statuses.
+        :return: list
+        """
+        self._check_authorization()
+        return await self._request("GET", self.project_statuses_url)
+
+    async def get_technologies(self):
+        """
+        Requests the list of technologies.
+        :return: list
+        """
+        self._check_authorization()
+        return await self._request("GET", self.technologies_url)
+
+    async def get_activity_types(self):
+        """
+        Requests the list of activity types.
+        :return: list
+        """
+        self._check_authorization()
+        return await self._request("GET", self.activity_types_url)
+
+    async def get_org_structures(self):
+        """
+        Requests the list of organization structures.
+        :return: list
+        """
+        self._check_authorization()
+        return await self._request("GET", self.org_structures_url)
+
+    async def get_employee_types(self):
+        """
+        Requests the list of employee types.
+        :return: list
+        """
+        self._check_authorization()
+        return await self._request("GET", self.employee_types_url)
+
+    async def get_project_assignments(self, params=None, employee_id=None):
+        """
+        Requests the project assignments of an employee.
+        :param params: dictionary, its filter may contain a %d placeholder for the employee id.
+        :param employee_id: integer, defaults to the logged in user.
+        :return: list
+        """
+        self._check_authorization()
+        if not params:
+            params = {
+                "filter": '{"where":{"employeeId":"%d"},"include":{"project":"account"}}'
+            }
+        if not employee_id:
+            employee_id = self.profile_id
+        if "filter" in params:
+            params = dict(params, filter=params["filter"] % (employee_id,))
+        return await self._request("GET", self.project_assignments_url, params=params)
+
+    ###
+    # CRUD for activities.
+    ###
+
+    async def get_activities(self, params=None, user_id=None):
+        """
+        Requests the activities assigned to an employee.
+        :param params: dictionary, its filter may contain a %d placeholder for the employee id.
+        :param user_id: integer, defaults to the logged in user.
+        :return: list
+        """
+        self._check_authorization()
+        if not params:
+            params = {"filter": '{"where":{"employeeId": %d}}'}
+        if not user_id:
+            user_id = self.profile_id
+        if "filter" in params:
+            params = dict(params, filter=params["filter"] % (user_id,))
+        return await self._request("GET", self.activities_url, params=params)
+
+    async def delete_activity(self, activity_id):
+        """
+        Deletes an activity.
+        :param activity_id: The activity id
+        :return: dictionary, with the "count" key set to 1
+        """
+        self._check_authorization()
+        return await self._request(
+            "DELETE", "/".join([self.activities_url, str(activity_id)])
+        )
+
+    # noinspection SpellCheckingInspection
+    async def post_activity(
+        self,
+        project_id,
+        activitytype_id,
+        date=None,
+        employee_id=None,
+        comments="",
+        hours=1,
+        ticket=""
+    ):
+        """
+        Creates a new activity with the given parameters.
+        :return: dictionary, the created activity.
+        """
+        self._check_authorization()
+        if not employee_id:
+            employee_id = self.profile_id
+        data = activity_data(
+            project_id,
+            activitytype_id,
+            date=date,
+            employee_id=employee_id,
+            comments=comments,
+            hours=hours,
+            ticket=ticket
+        )
+        return await self._request("POST", self.activities_url, data=_form(data))
+
+    async def edit_activity(
+            self,
+            activity_id,
+            value=None,
+            comments=None,
+            ticket=None
+    ):
+        """
+        Edits an activity based on the parameters sent.
+        :raises NotEnoughArguments:
+        :return: dictionary, the edited activity.
+        """
+        self._check_authorization()
+        data = edit_activity_data(activity_id, value, comments, ticket)
+        return await self._request(
+            "PUT", self.activities_url + "/" + str(activity_id), data=_form(data)
+        )
+
+    pass
+
+
+def _form(data):
+    """
+    Converts the values of a request body to strings, as requests does
+    when sending form encoded data.
+    :param data: dictionary
+    :return: dictionary
+    """
+    return dict((key, str(value)) for key, value in data.items())
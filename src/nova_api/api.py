@@ -2,8 +2,89 @@ import requests
 import uuid
 import re
 import datetime
-from nova_exceptions import LoginFailed, GetTokenEndpointError, NotEnoughArguments
-from decorators import set_to_json_response, has_authentication_header, check_attr_response_type
+import time
+import threading
+from multiprocessing.pool import ThreadPool
+from .nova_exceptions import LoginFailed, GetTokenEndpointError, NotEnoughArguments, BuildInfoFailed, \
+    AttributeNotSet
+from .decorators import set_to_json_response, has_authentication_header, check_attr_response_type
+from .bulk import ActivityResult, BulkResult
+from .indexes import CatalogIndex
+from .records import NamedRecord, User, Project, Activity, Assignment
+from .lazy import LazyAttribute
+from .transport import TransportConfig, copy_response, not_sent
+from .sync import ActivitySync
+from .filters import Filter, query_params, employee_query
+from .decoding import decode_response
+from .metrics import request_hook, response_endpoint
+from .upsert import ActivityIndex, UpsertResult, activity_key, activity_changes
+
+
+# noinspection SpellCheckingInspection
+def activity_data(
+    project_id,
+    activitytype_id,
+    date=None,
+    employee_id=None,
+    comments="",
+    hours=1,
+    ticket=""
+):
+    """
+    Builds the request body used to create a new activity.
+    :param project_id: integer
+    :param activitytype_id: integer
+    :param date: datetime, defaults to today.
+    :param employee_id: integer
+    :param comments: string
+    :param hours: number, hours worked for this activity.
+    :param ticket: string
+    :return: dictionary
+    """
+    if not date:
+        date = datetime.datetime.today()
+    return {
+        "activityDate": date.strftime("%Y-%m-%dT00:00:00Z"),
+        # Hours worked for this activity.
+        "value": hours,
+        # Hours worked for this activity.
+        "billablevalue": hours,
+        "comments": comments,
+        "task": ticket,
+        "employeeId": employee_id,
+        "stepId": 1,
+        "typeId": activitytype_id,
+        "projectId": project_id,
+    }
+
+
+def edit_activity_data(activity_id, value=None, comments=None, ticket=None):
+    """
+    Builds the request body used to edit an activity.
+    :param activity_id: integer
+    :param value: number, hours worked for this activity.
+    :param comments: string
+    :param ticket: string
+    :raises NotEnoughArguments: if none of value, comments or ticket are given.
+    :return: dictionary
+    """
+    data = {"activityId": activity_id}
+    if(
+        not value and
+        not comments and
+        not ticket
+    ):
+        raise NotEnoughArguments()
+        pass
+    if value:
+        data["value"] = value
+        # noinspection SpellCheckingInspection
+        data["billablevalue"] = value
+    if comments:
+        data["comments"] = comments
+    if ticket:
+        data["ticket"] = ticket
+    return data
 
 
 class NovaAPI(object):
@@ -11,7 +92,7 @@ class NovaAPI(object):
     """
     # noinspection SpellCheckingInspection
     client_id = "56cccded013d35a3949308d7"
-    access_token_pattern = re.compile("^.*access_token=(\w+)&.*")
+    access_token_pattern = re.compile(r"^.*access_token=(\w+)&.*")
     authorized_url = "http://nova.itexico.com/#/authorized/"
     login_url = "http://nova.cloudapp.net/login"
     authorization_url = "http://nova.cloudapp.net/authorization"
@@ -30,16 +111,169 @@ class NovaAPI(object):
     org_structures_url = "http://nova-api.itexico.com/api/OrgStructures"
     technologies_url = "http://nova-api.itexico.com/api/Technologies"
     # activity log
+    # Requests made by build_info as (attribute, get method, set method).
+    build_info_steps = (
+        ("project_types", "get_project_types", "set_project_types"),
+        ("project_statuses", "get_project_status", "set_project_statuses"),
+        ("activity_types", "get_activity_types", "set_activity_types"),
+        ("users", "get_users", "set_users"),
+        ("accounts", "get_accounts", "set_accounts"),
+        ("projects", "get_projects", "set_projects"),
+        ("technologies", "get_technologies", "set_technologies"),
+        ("employee_types", "get_employee_types", "set_employee_types"),
+        ("my_activities", "get_activities", "set_my_activities"),
+        ("my_projects", "get_project_assignments", "set_my_projects"),
+    )
+    # Requests that set every attribute loaded on first access when lazy is enabled.
+    attribute_steps = dict(
+        (step[0], step) for step in build_info_steps + (
+            ("org_structures", "get_org_structures", "set_org_structures"),
+        )
+    )
+    project_types = LazyAttribute("project_types")
+    project_statuses = LazyAttribute("project_statuses")
+    activity_types = LazyAttribute("activity_types")
+    users = LazyAttribute("users")
+    accounts = LazyAttribute("accounts")
+    projects = LazyAttribute("projects")
+    technologies = LazyAttribute("technologies")
+    employee_types = LazyAttribute("employee_types")
+    org_structures = LazyAttribute("org_structures")
+    my_activities = LazyAttribute("my_activities")
+    my_projects = LazyAttribute("my_projects")
+    # Run the login again when the server rejects the token, requires the username and password.
+    relogin_on_unauthorized = True
+    # Default number of threads used by build_info when concurrent=True.
+    build_info_workers = 4
+    # Defaults for post_activities.
+    bulk_workers = 4
+    bulk_retries = 2
+    # Seconds waited before the first retry, doubled on each following one.
+    bulk_retry_backoff = 0.5
+    # Status codes for which the server didn't store the activity, so it can be sent again.
+    # 502 and 504 aren't, the server may have stored it before the gateway gave up.
+    bulk_retry_status_codes = (429, 503)
+    # Default number of activities requested per page by iter_activities.
+    activities_page_size = 100
+    # Order of the limit and skip pages of iter_activities when its query has none.
+    activities_page_order = "activityId ASC"
+    # Id and name fields used by index, per attribute name, "id" and ("name",) otherwise.
+    index_id_fields = {
+        "my_activities": "activityId",
+    }
+    index_name_fields = {
+        "users": ("name", "email", "username"),
+        "my_activities": (),
+        "my_projects": (),
+    }
+    # Record class used for each attribute when typed_records is enabled.
+    record_types = {
+        "project_types": NamedRecord,
+        "project_statuses": NamedRecord,
+        "activity_types": NamedRecord,
+        "users": User,
+        "accounts": NamedRecord,
+        "projects": Project,
+        "technologies": NamedRecord,
+        "employee_types": NamedRecord,
+        "org_structures": NamedRecord,
+        "my_activities": Activity,
+        "my_projects": Assignment,
+    }
+    # Url attribute of each catalog returned by fetch.
+    catalog_urls = {
+        "project_types": "project_types_url",
+        "project_statuses": "project_statuses_url",
+        "activity_types": "activity_types_url",
+        "users": "users_url",
+        "accounts": "accounts_url",
+        "projects": "projects_url",
+        "technologies": "technologies_url",
+        "employee_types": "employee_types_url",
+        "org_structures": "org_structures_url",
+    }
+    # Catalogs requested through the catalog_cache when it's set.
+    cached_catalogs = (
+        "project_types",
+        "project_statuses",
+        "activity_types",
+        "technologies",
+        "employee_types",
+        "org_structures",
+    )
+    # Response attribute each parsed attribute is set from.
+    response_attributes = {
+        "profile": "profile_response",
+        "project_types": "project_types_response",
+        "project_statuses": "project_statuses_response",
+        "activity_types": "activity_types_response",
+        "users": "users_response",
+        "accounts": "accounts_response",
+        "projects": "projects_response",
+        "technologies": "technologies_response",
+        "employee_types": "employee_types_response",
+        "org_structures": "org_structures_response",
+        "my_activities": "activities_response",
+        "my_projects": "project_assignments_response",
+    }
 
-    def __init__(self, username="", password=""):
+    def __init__(
+        self,
+        username="",
+        password="",
+        catalog_cache=None,
+        token_store=None,
+        typed_records=False,
+        lazy=False,
+        transport=None,
+        catalog_store=None,
+        release_bodies=False,
+        metrics=None,
+        query_cache=None
+    ):
         """ Initializes attributes.
+        :param catalog_cache: CatalogCache used by the catalog get methods, optional.
+        :param token_store: MemoryTokenStore or FileTokenStore used to resume sessions, optional.
+        :param typed_records: boolean, set the parsed attributes as compact records
+         from records.py instead of dictionaries.
+        :param lazy: boolean, load the attributes set by build_info on first access.
+        :param transport: TransportConfig with the session's pooling, timeouts and retries,
+         its defaults are used when not given.
+        :param catalog_store: CatalogStore holding the catalogs shared with other instances.
+        :param release_bodies: boolean, drop the raw body of the responses once parsed.
+        :param metrics: MetricsSink receiving the measurements of every request
+         and json parse, e.g. InMemoryMetrics, nothing is measured when not given.
+        :param query_cache: QueryCache serving the repeated activity and project
+         assignment requests, optional.
         """
         self.username = username
         self.password = password
-        self.ses = requests.session()
+        self.catalog_store = catalog_store
+        self.typed_records = typed_records
+        self.lazy = lazy
+        self.release_bodies = release_bodies
+        # Locks preventing concurrent loads of the same attribute.
+        self._load_locks = dict((name, threading.Lock()) for name in self.attribute_steps)
+        self.catalog_cache = catalog_cache
+        self.token_store = token_store
+        self.transport = transport or TransportConfig()
+        self.ses = self.transport.session()
         self.ses.headers["User-Agent"] = "Go-http-client/1.1"
+        self.ses.hooks["response"].append(self._relogin_on_unauthorized)
+        self.metrics = metrics
+        if metrics is not None:
+            # Before the relogin, so a request sent again is measured on its own.
+            self.ses.hooks["response"].insert(0, request_hook(metrics))
+        self.query_cache = query_cache
+        if query_cache is not None:
+            # After the relogin, so it sees the response of a request sent again.
+            self.ses.hooks["response"].append(self._invalidate_query_cache)
         self.access_token = None
         self.profile_id = None
+        # Held while logging in again after a 401, the waiting threads use the new token.
+        self._relogin_lock = threading.Lock()
+        # Marks the thread running that login, so its own requests aren't checked.
+        self._relogin_state = threading.local()
         self.state = str(uuid.uuid4())
         # Attributes:
         self.profile = None
@@ -55,6 +289,12 @@ class NovaAPI(object):
         # Account specific set on build_info
         self.my_activities = None
         self.my_projects = None
+        # Failures from the last concurrent build_info, keyed by attribute name.
+        self.build_info_errors = {}
+        # CatalogIndex per attribute name, along with the list it was built from.
+        self._indexes = {}
+        # ActivitySync used by sync_my_activities.
+        self.activity_sync = None
         # Login Process Responses
         self.login_response = None
         self.authorized_response = None
@@ -165,11 +405,16 @@ class NovaAPI(object):
         self.ses.headers["Authorization"] = "bearer " + self.access_token
         pass
 
-    def login(self):
+    def login(self, resume=True):
         """
         Calls all methods in order to login with the given credentials.
+        If a token_store is set, a saved token is restored instead when available,
+        otherwise the new token is saved to it.
+        :param resume: boolean, False to always run the full login.
         :return: None
         """
+        if resume and self.token_store is not None and self.restore_token():
+            return
         self.post_login()
         self.go_authorized()
         self.get_auth_token()
@@ -177,46 +422,431 @@ class NovaAPI(object):
         self.get_profile()
         self.set_profile()
         self.set_profile_id()
+        if self.token_store is not None:
+            self.save_token()
         pass
 
-    def build_info(self):
+    def save_token(self):
+        """
+        Saves the access token, profile id and profile to the token_store attribute.
+        :return: None
+        """
+        self.token_store.save({
+            "username": self.username,
+            "access_token": self.access_token,
+            "profile_id": self.profile_id,
+            "profile": self.profile,
+        })
+        pass
+
+    def restore_token(self):
+        """
+        Restores the access token, profile id and profile saved in the token_store attribute
+        and sets the Authorization HTTP header. The token is not checked until its first use,
+        if the server rejects it the full login runs and the request is sent again.
+        :return: boolean, True if a token saved for this username was restored.
+        """
+        data = self.token_store.load()
+        if not data or not data.get("access_token"):
+            return False
+        if self.username and data.get("username") != self.username:
+            return False
+        self.access_token = data["access_token"]
+        self.profile_id = data.get("profile_id")
+        self.profile = data.get("profile")
+        self.ses.headers["Authorization"] = "bearer " + self.access_token
+        return True
+
+    def _relogin_on_unauthorized(self, response, *args, **kwargs):
+        """
+        Response hook recovering from an expired or revoked token.
+        A 401 to an authenticated request runs the full login and the request is
+        sent again, once, with the new token. Only one thread logs in, the others
+        rejected meanwhile wait for it and reuse its token.
+        :param response: requests.models.Response
+        :param kwargs: the keyword arguments used to send the request.
+        :return: requests.models.Response
+        """
+        request = response.request
+        if (
+            response.status_code != 401 or
+            not self.relogin_on_unauthorized or
+            not self.username or
+            "Authorization" not in request.headers or
+            getattr(request, "relogin_retry", False) or
+            getattr(self._relogin_state, "active", False)
+        ):
+            return response
+        rejected = request.headers["Authorization"]
+        with self._relogin_lock:
+            # Another thread may have logged in while this one waited.
+            if self.ses.headers.get("Authorization") in (None, rejected):
+                self._relogin_state.active = True
+                try:
+                    self.login(resume=False)
+                finally:
+                    self._relogin_state.active = False
+        retry = request.copy()
+        retry.headers["Authorization"] = self.ses.headers["Authorization"]
+        retry.relogin_retry = True
+        return self.ses.send(retry, **kwargs)
+
+    def build_info(self, concurrent=False, workers=None):
         """
         Make the calls to set all
         attributes with the service's relevant information.
+        :param concurrent: boolean, send the requests together over a thread pool.
+        :param workers: integer, size of the thread pool, defaults to build_info_workers.
+        :raises BuildInfoFailed: when concurrent and any of the requests fail.
+        :return: None
+        """
+        if concurrent:
+            self.build_info_concurrently(workers)
+            return
+        for _, get_method, set_method in self.build_info_steps:
+            getattr(self, get_method)()
+            getattr(self, set_method)()
+        pass
+
+    def build_info_concurrently(self, workers=None):
+        """
+        Sends all build_info requests at once over a bounded thread pool.
+        Each step still assigns its *_response and parsed attribute, a failing
+        step doesn't prevent the others from being set. Error statuses fail the
+        step and leave its attribute unchanged.
+        Failures are stored in the build_info_errors attribute.
+        :param workers: integer, size of the thread pool, defaults to build_info_workers.
+        :raises BuildInfoFailed: if at least one of the steps failed.
+        :return: None
+        """
+        if not workers:
+            workers = self.build_info_workers
+        pool = ThreadPool(min(workers, len(self.build_info_steps)))
+        try:
+            results = pool.map(self._run_build_info_step, self.build_info_steps)
+        finally:
+            pool.close()
+            pool.join()
+        self.build_info_errors = dict(
+            (name, error) for name, error in results if error is not None
+        )
+        if self.build_info_errors:
+            raise BuildInfoFailed(self.build_info_errors)
+        pass
+
+    def load(self, name, reload=True):
+        """
+        Calls the get and set methods of an attribute, concurrent calls
+        for the same attribute wait for a single request.
+        Attributes held by the catalog_store are requested once for all its instances.
+        :param name: string, the attribute name, e.g. "projects".
+        :param reload: boolean, False to skip the request when the attribute is already set.
+        :raises requests.HTTPError: on error status codes, the attribute is left as it was.
+        :return: the attribute value.
+        """
+        if self.catalog_store is not None and name in self.catalog_store:
+            return self.catalog_store.load(name, lambda: self._load_attribute(name), reload)
+        with self._load_locks[name]:
+            if reload or self.__dict__.get(name) is None:
+                self._load_attribute(name)
+        return self.__dict__.get(name)
+
+    def _load_attribute(self, name):
+        """
+        Calls the get and set methods of an attribute, which isn't set
+        when the server answers with an error status.
+        :param name: string, the attribute name.
+        :raises requests.HTTPError: on error status codes.
+        :return: the attribute value.
+        """
+        _, get_method, set_method = self.attribute_steps[name]
+        getattr(self, get_method)()
+        getattr(self, self.response_attributes[name]).raise_for_status()
+        getattr(self, set_method)()
+        return getattr(self, name)
+
+    def invalidate(self, name=None):
+        """
+        Clears an attribute, or all of them, so the next access loads it again when lazy.
+        Attributes held by the catalog_store are cleared for all its instances.
+        :param name: string, the attribute name, None for all.
+        :return: None
+        """
+        names = [name] if name else list(self.attribute_steps)
+        for attribute in names:
+            if self.catalog_store is not None and attribute in self.catalog_store:
+                self.catalog_store.invalidate(attribute)
+            else:
+                setattr(self, attribute, None)
+        pass
+
+    def refresh(self, name=None):
+        """
+        Loads again an attribute, or all the attributes currently set.
+        :param name: string, the attribute name, None for all.
+        :return: None
+        """
+        if name:
+            self.load(name)
+            return
+        for attribute in self.attribute_steps:
+            if self.is_loaded(attribute):
+                self.load(attribute)
+        pass
+
+    def is_loaded(self, name):
+        """
+        Checks if an attribute is set without loading it.
+        :param name: string, the attribute name.
+        :return: boolean
+        """
+        if self.catalog_store is not None and name in self.catalog_store:
+            return self.catalog_store.get(name) is not None
+        return self.__dict__.get(name) is not None
+
+    def _run_build_info_step(self, step):
+        """
+        Calls the get and set methods of a single build_info step, the attribute
+        keeps its value when the server answers with an error status.
+        :param step: tuple, (attribute name, get method name, set method name)
+        :return: tuple, the attribute name and the raised exception or None.
+        """
+        name, get_method, set_method = step
+        try:
+            getattr(self, get_method)()
+            getattr(self, self.response_attributes[name]).raise_for_status()
+            getattr(self, set_method)()
+        except Exception as error:
+            return name, error
+        return name, None
+
+    def _get_catalog(self, name, url, query=None):
+        """
+        Sends the http request to get a catalog, through the catalog_cache if set
+        and the whole catalog is requested.
+        :param name: string, the catalog attribute name.
+        :param url: string, the catalog endpoint.
+        :param query: Filter or dictionary of filter keys, optional.
+        :return: requests.models.Response
+        """
+        if self.catalog_cache is None or query is not None:
+            return self.ses.get(url, params=query_params(query))
+        return self.catalog_cache.get(self.ses, name, url)
+
+    def _cached_get(self, url, params):
+        """
+        Sends a GET request, answered from the query_cache when it's set and
+        holds the same request, successful responses are stored in it. Every
+        caller gets its own copy of a cached response and parses it, so changing
+        a result doesn't change what the following hits return.
+        :param url: string
+        :param params: dictionary, the request params.
+        :return: requests.models.Response
+        """
+        cache = self.query_cache
+        if cache is None:
+            return self.ses.get(url, params=params)
+        key = cache.key(url, params)
+        response = cache.get(key)
+        if response is not None:
+            return copy_response(response)
+        version = cache.version
+        response = self.ses.get(url, params=params)
+        if response.status_code == 200:
+            if url == self.activities_url:
+                cache.remember_owners(self.decode_response(
+                    response, release=False, keep=not self._converts_json("my_activities")
+                ))
+            cache.put(key, copy_response(response), version)
+        return response
+
+    def _invalidate_query_cache(self, response, *args, **kwargs):
+        """
+        Response hook removing the query_cache entries of the employee whose
+        activities a request created, edited or deleted. When the employee is
+        unknown, or the server failed, every activity entry is removed.
+        :param response: requests.models.Response
+        :return: None
+        """
+        request = response.request
+        if (
+            request is None or
+            request.method not in ("POST", "PUT", "PATCH", "DELETE") or
+            not request.url.startswith(self.activities_url) or
+            400 <= response.status_code < 500
+        ):
+            return
+        employee_id = None
+        if response.ok and request.method == "DELETE":
+            activity_id = request.url.rstrip("/").rsplit("/", 1)[-1]
+            if activity_id.isdigit():
+                activity_id = int(activity_id)
+            employee_id = self.query_cache.owner(activity_id)
+        elif response.ok:
+            try:
+                activity = self.decode_response(response, release=False)
+            except ValueError:
+                activity = None
+            if isinstance(activity, dict):
+                employee_id = activity.get("employeeId")
+                self.query_cache.remember_owners([activity])
+        self.query_cache.invalidate(self.activities_url, employee_id)
+
+    def convert_json(self, name, value):
+        """
+        Converts the json parsed for an attribute to its record type
+        when typed_records is enabled, used by the set methods.
+        :param name: string, the attribute name.
+        :param value: the parsed json.
+        :return: the converted value.
+        """
+        record_type = self.record_types.get(name)
+        if not self.typed_records or record_type is None or not isinstance(value, list):
+            return value
+        return record_type.from_json_list(value)
+
+    def _converts_json(self, name):
+        """
+        :param name: string, the attribute name.
+        :return: boolean, True if the attribute's json is converted to records.
+        """
+        return self.typed_records and name in self.record_types
+
+    def parse_json(self, name, response):
+        """
+        Parses the response an attribute is set from and converts it with
+        convert_json, used by the set methods. The json converted to records
+        isn't kept on the response, which would hold the full dictionaries
+        next to the records.
+        :param name: string, the attribute name.
+        :param response: requests.models.Response
+        :return: the converted value.
+        """
+        value = self.decode_response(response, keep=not self._converts_json(name))
+        return self.convert_json(name, value)
+
+    def decode_response(self, response, release=None, keep=True):
+        """
+        Parses a response's json body once, see decoding.decode_response.
+        :param response: requests.models.Response
+        :param release: boolean, drop the raw body once parsed, defaults to release_bodies.
+        :param keep: boolean, False to parse without storing the value on the response.
+        :return: the parsed json, the same value on every call when kept.
+        """
+        if release is None:
+            release = self.release_bodies
+        if self.metrics is None or hasattr(response, "decoded_json"):
+            return decode_response(response, release, keep)
+        size = len(response.content or b"")
+        start = time.time()
+        value = decode_response(response, release, keep)
+        self.metrics.record_decode(response_endpoint(response), time.time() - start, size)
+        return value
+
+    def raw_json(self, name):
+        """
+        Returns the json parsed from the response an attribute was set from,
+        the full dictionaries even when typed_records is enabled, in which case
+        the response's body is parsed again on each call.
+        :param name: string, the attribute name, e.g. "users".
+        :return: the parsed json.
+        """
+        response = getattr(self, self.response_attributes[name])
+        return self.decode_response(response, keep=not self._converts_json(name))
+
+    def index(self, name):
+        """
+        Returns the CatalogIndex of an attribute set by build_info, e.g. "projects".
+        The index is built once and rebuilt when the attribute is assigned a new list.
+        :param name: string, the attribute name.
+        :raises AttributeNotSet: if the attribute hasn't been set.
+        :return: CatalogIndex
+        """
+        records = getattr(self, name)
+        if records is None:
+            raise AttributeNotSet(name)
+        indexes = self._index_cache(name)
+        built = indexes.get(name)
+        if built is not None and built[0] is records:
+            return built[1]
+        index = self._build_index(name, records)
+        indexes[name] = (records, index)
+        return index
+
+    def _index_cache(self, name):
+        """
+        :param name: string, the attribute name.
+        :return: dictionary holding the attribute's index, the catalog_store's if it holds it.
+        """
+        if self.catalog_store is not None and name in self.catalog_store:
+            return self.catalog_store.indexes
+        return self._indexes
+
+    def _build_index(self, name, records):
+        """
+        :param name: string, the attribute name.
+        :param records: list of dictionaries or records.
+        :return: CatalogIndex
+        """
+        return CatalogIndex(
+            records,
+            id_field=self.index_id_fields.get(name, "id"),
+            name_fields=self.index_name_fields.get(name, ("name",))
+        )
+
+    def replace_attribute(self, name, value):
+        """
+        Assigns a new list to an attribute along with its CatalogIndex, built
+        beforehand so readers go from the old list and index to the new ones
+        without waiting, the old ones stay valid for readers holding them.
+        :param name: string, the attribute name, e.g. "projects".
+        :param value: list of dictionaries or records.
         :return: None
         """
-        self.get_project_types()
-        self.set_project_types()
-        self.get_project_status()
-        self.set_project_statuses()
-        self.get_activity_types()
-        self.set_activity_types()
-        self.get_users()
-        self.set_users()
-        self.get_accounts()
-        self.set_accounts()
-        self.get_projects()
-        self.set_projects()
-        self.get_technologies()
-        self.set_technologies()
-        self.get_employee_types()
-        self.set_employee_types()
-        self.get_activities()
-        self.my_activities = self.activities_response.json()
-        self.get_project_assignments()
-        self.my_projects = self.project_assignments_response.json()
+        built = (value, self._build_index(name, value))
+        setattr(self, name, value)
+        self._index_cache(name)[name] = built
         pass
 
+    def lookup(self, name, record_id, default=None):
+        """
+        Returns the record with the given id from an attribute set by build_info.
+        :param name: string, the attribute name, e.g. "activity_types".
+        :param record_id: the id value, e.g. an activity's typeId.
+        :param default: returned when there's no such record.
+        :return: dictionary
+        """
+        return self.index(name).get(record_id, default)
+
+    def projects_of_account(self, account_id):
+        """
+        Returns the projects belonging to an account.
+        :param account_id: the account id.
+        :return: list of dictionaries.
+        """
+        return self.index("projects").related("accountId", account_id)
+
+    def assignments_of_employee(self, employee_id):
+        """
+        Returns the project assignments of an employee from the my_projects attribute.
+        :param employee_id: the employee id.
+        :return: list of dictionaries.
+        """
+        return self.index("my_projects").related("employeeId", employee_id)
+
     @has_authentication_header
-    def get_profile(self):
+    def get_profile(self, query=None):
         """
         Sends the http request to get the logged in user's profile.
         Assigns the response to the profile_response attribute.
+        :param query: Filter or dictionary of filter keys, includes the contract by default.
         :return: None
         """
         params = {
             "filter": '{"include":["contract"]}'
         }
+        if query is not None:
+            params = query_params(query)
         self.profile_response = self.ses.get(
             self.profile_url,
             params=params
@@ -239,17 +869,18 @@ class NovaAPI(object):
         in the response obtained in the get_profile method.
         :return: None
         """
-        self.profile_id = self.profile_response.json()["id"]
+        self.profile_id = self.decode_response(self.profile_response)["id"]
         pass
 
     @has_authentication_header
-    def get_users(self):
+    def get_users(self, query=None):
         """
         Sends the http request to get a list of users.
         Assigns the response to the users_response attribute.
+        :param query: Filter or dictionary of filter keys, optional.
         :return: None
         """
-        self.users_response = self.ses.get(self.users_url)
+        self.users_response = self.ses.get(self.users_url, params=query_params(query))
         pass
 
     @check_attr_response_type("users_response")
@@ -260,17 +891,17 @@ class NovaAPI(object):
          users_response attribute to the users attribute.
         :return: None
         """
-        self.users = self.users_response.json()
         pass
 
     @has_authentication_header
-    def get_accounts(self):
+    def get_accounts(self, query=None):
         """
         Sends the http request to get a list of accounts.
         Assigns the response to the accounts_response attribute.
+        :param query: Filter or dictionary of filter keys, optional.
         :return: None
         """
-        self.accounts_response = self.ses.get(self.accounts_url)
+        self.accounts_response = self.ses.get(self.accounts_url, params=query_params(query))
         pass
 
     @check_attr_response_type("accounts_response")
@@ -284,13 +915,14 @@ class NovaAPI(object):
         pass
 
     @has_authentication_header
-    def get_projects(self):
+    def get_projects(self, query=None):
         """
         Sends the http request to get a list of existing projects.
         Assigns the response to the projects_response attribute.
+        :param query: Filter or dictionary of filter keys, optional.
         :return: None
         """
-        self.projects_response = self.ses.get(self.projects_url)
+        self.projects_response = self.ses.get(self.projects_url, params=query_params(query))
         pass
 
     @check_attr_response_type("projects_response")
@@ -304,13 +936,16 @@ class NovaAPI(object):
         pass
 
     @has_authentication_header
-    def get_project_types(self):
+    def get_project_types(self, query=None):
         """
         Sends the http request to get a list of project types.
         Assigns the response to the project_types_response attribute.
+        :param query: Filter or dictionary of filter keys, optional.
         :return: None
         """
-        self.project_types_response = self.ses.get(self.project_types_url)
+        self.project_types_response = self._get_catalog(
+            "project_types", self.project_types_url, query
+        )
         pass
 
     @check_attr_response_type("project_types_response")
@@ -324,13 +959,16 @@ class NovaAPI(object):
         pass
 
     @has_authentication_header
-    def get_project_status(self):
+    def get_project_status(self, query=None):
         """
         Sends the http request to get a list of project status.
         Stores the response in the project_statuses_response attribute.
+        :param query: Filter or dictionary of filter keys, optional.
         :return: None
         """
-        self.project_statuses_response = self.ses.get(self.project_statuses_url)
+        self.project_statuses_response = self._get_catalog(
+            "project_statuses", self.project_statuses_url, query
+        )
         pass
 
     @check_attr_response_type("project_statuses_response")
@@ -344,13 +982,16 @@ class NovaAPI(object):
         pass
 
     @has_authentication_header
-    def get_technologies(self):
+    def get_technologies(self, query=None):
         """
         Sends the http request to get a list of technologies.
         Stores the response in the technologies_response attribute.
+        :param query: Filter or dictionary of filter keys, optional.
         :return: None
         """
-        self.technologies_response = self.ses.get(self.technologies_url)
+        self.technologies_response = self._get_catalog(
+            "technologies", self.technologies_url, query
+        )
         pass
 
     @check_attr_response_type("technologies_response")
@@ -364,13 +1005,16 @@ class NovaAPI(object):
         pass
 
     @has_authentication_header
-    def get_activity_types(self):
+    def get_activity_types(self, query=None):
         """
         Sends the http request to get a list of activity types.
         Assigns the response to the activity_types_response attribute.
+        :param query: Filter or dictionary of filter keys, optional.
         :return: None
         """
-        self.activity_types_response = self.ses.get(self.activity_types_url)
+        self.activity_types_response = self._get_catalog(
+            "activity_types", self.activity_types_url, query
+        )
         pass
 
     @check_attr_response_type("activity_types_response")
@@ -384,13 +1028,16 @@ class NovaAPI(object):
         pass
 
     @has_authentication_header
-    def get_org_structures(self):
+    def get_org_structures(self, query=None):
         """
         Sends the http request to get a list of organization structures.
         Stores the response in the org_structures_response attribute.
+        :param query: Filter or dictionary of filter keys, optional.
         :return: None
         """
-        self.org_structures_response = self.ses.get(self.org_structures_url)
+        self.org_structures_response = self._get_catalog(
+            "org_structures", self.org_structures_url, query
+        )
         pass
 
     @check_attr_response_type("org_structures_response")
@@ -404,13 +1051,16 @@ class NovaAPI(object):
         pass
 
     @has_authentication_header
-    def get_employee_types(self):
+    def get_employee_types(self, query=None):
         """
         Sends the http request to get a list of employee types.
         Stores the response in the employee_types_response attribute.
+        :param query: Filter or dictionary of filter keys, optional.
         :return: None
         """
-        self.employee_types_response = self.ses.get(self.employee_types_url)
+        self.employee_types_response = self._get_catalog(
+            "employee_types", self.employee_types_url, query
+        )
         pass
 
     @check_attr_response_type("employee_types_response")
@@ -424,13 +1074,19 @@ class NovaAPI(object):
         pass
 
     @has_authentication_header
-    def get_project_assignments(self, params=None, employee_id=None):
+    def get_project_assignments(self, params=None, employee_id=None, query=None):
         """
         Sends the http request to get project_assignments based on
         the get arguments sent with the request.
         Sets the response to the project_assignments_response attribute.
+        :param params: dictionary, its filter may contain a %d placeholder for the employee id.
+        :param employee_id: integer, defaults to the logged in user.
+        :param query: Filter or dictionary of filter keys used instead of params,
+         restricted to the employee unless its where sets the employeeId.
         :return: None
         """
+        if query is not None:
+            params = query_params(employee_query(query, employee_id or self.profile["id"]))
         if not params:
             params = {
                 "filter": '{"where":{"employeeId":"%d"},"include":{"project":"account"}}'
@@ -439,12 +1095,19 @@ class NovaAPI(object):
             params = {"filter": '{"where":{"employeeId": %d}}'}
         if not employee_id:
             employee_id = self.profile["id"]
-        if "filter" in params:
+        if query is None and "filter" in params:
             params["filter"] %= (employee_id,)
-        self.project_assignments_response = self.ses.get(
-            self.project_assignments_url,
-            params=params
-        )
+        self.project_assignments_response = self._cached_get(self.project_assignments_url, params)
+        pass
+
+    @check_attr_response_type("project_assignments_response")
+    @set_to_json_response("my_projects", "project_assignments_response")
+    def set_my_projects(self):
+        """
+        Assigns the json array parsed from the project_assignments_response
+        attribute to the my_projects attribute.
+        :return: None
+        """
         pass
 
     ###
@@ -452,24 +1115,93 @@ class NovaAPI(object):
     ###
 
     @has_authentication_header
-    def get_activities(self, params=None, user_id=None):
+    def get_activities(self, params=None, user_id=None, query=None):
         """
         Sends the http request to get a list of activites assigned to employees.
         Sets the result to activities_response attribute.
         :param params: dictionary
         :param user_id: integer
+        :param query: Filter or dictionary of filter keys used instead of params,
+         restricted to the employee unless its where sets the employeeId.
         :return: None
         """
+        if query is not None:
+            params = query_params(employee_query(query, user_id or self.profile_id))
         if not params:
             params = {"filter": '{"where":{"employeeId": %d}}'}
         if not user_id:
             user_id = self.profile_id
-        if "filter" in params:
+        if query is None and "filter" in params:
             params["filter"] %= (user_id,)
-        self.activities_response = self.ses.get(
-            self.activities_url,
-            params=params
-        )
+        self.activities_response = self._cached_get(self.activities_url, params)
+
+    @check_attr_response_type("activities_response")
+    @set_to_json_response("my_activities", "activities_response")
+    def set_my_activities(self):
+        """
+        Assigns the json array parsed from the activities_response
+        attribute to the my_activities attribute.
+        :return: None
+        """
+        pass
+
+    @has_authentication_header
+    def iter_activities(self, user_id=None, page_size=None, where=None, key=None, query=None):
+        """
+        Generator that requests the activities of an employee one page at a time
+        and yields them as each page arrives, only one page is held in memory.
+        Pages use the LoopBack limit and skip filters ordered by activities_page_order
+        unless the query has an order, or keyset pagination (key greater than the
+        last one received) when key is given.
+        The activities_response attribute is not modified.
+        Activities are Activity records when typed_records is enabled.
+        :param user_id: integer, defaults to the logged in user.
+        :param page_size: integer, defaults to activities_page_size.
+        :param where: dictionary, extra LoopBack where conditions.
+        :param key: string, unique sortable field used for keyset pagination, e.g. "activityId".
+        :param query: Filter or dictionary of filter keys, e.g. to select the fields,
+         its limit and skip are replaced by the pages'.
+        :return: generator of dictionaries.
+        """
+        if not user_id:
+            user_id = self.profile_id
+        if not page_size:
+            page_size = self.activities_page_size
+        query = employee_query(query or {}, user_id).where(where).limit(page_size)
+        if key:
+            query = Filter(**dict(query.to_dict(), order=[key + " ASC"]))
+        elif not query.get("order"):
+            # Without an order the backend may return rows on several pages, or none.
+            query = query.order(self.activities_page_order)
+        page_query = query
+        skip = 0
+        while True:
+            if not key:
+                page_query = query.skip(skip)
+            response = self.ses.get(self.activities_url, params=page_query.params())
+            response.raise_for_status()
+            page = self.decode_response(response, release=True)
+            records = self.convert_json("my_activities", page)
+            for activity in records:
+                yield activity
+            if len(page) < page_size:
+                break
+            skip += len(page)
+            if key:
+                page_query = query.where({key: {"gt": page[-1][key]}})
+        pass
+
+    def sync_my_activities(self, full=False, **options):
+        """
+        Updates the my_activities attribute requesting only the activities
+        added or changed since the previous call, see ActivitySync.
+        :param full: boolean, request every activity to find deletions.
+        :param options: ActivitySync keyword arguments, used on the first call.
+        :return: SyncResult
+        """
+        if self.activity_sync is None:
+            self.activity_sync = ActivitySync(self, **options)
+        return self.activity_sync.sync(full=full)
 
     @has_authentication_header
     def delete_activity(self, activity_id):
@@ -501,29 +1233,174 @@ class NovaAPI(object):
         Sends the http request to create a new activity with the given parameters.
         :return: None
         """
-        if not date:
-            date = datetime.datetime.today()
         if not employee_id:
             employee_id = self.profile_id
-        data = {
-            "activityDate": date.strftime("%Y-%m-%dT00:00:00Z"),
-            # Hours worked for this activity.
-            "value": hours,
-            # Hours worked for this activity.
-            "billablevalue": hours,
-            "comments": comments,
-            "task": ticket,
-            "employeeId": employee_id,
-            "stepId": 1,
-            "typeId": activitytype_id,
-            "projectId": project_id,
-        }
+        data = activity_data(
+            project_id,
+            activitytype_id,
+            date=date,
+            employee_id=employee_id,
+            comments=comments,
+            hours=hours,
+            ticket=ticket
+        )
         self.post_activity_response = self.ses.post(
             self.activities_url,
             data=data
         )
         pass
 
+    @has_authentication_header
+    def post_activities(self, specs, workers=None, retries=None):
+        """
+        Sends the http requests to create many activities over a bounded thread pool.
+        Each spec is a dictionary with the post_activity keyword arguments.
+        The bulk_retry_status_codes and the errors raised before the request reached the
+        server are retried with exponential backoff, other errors are recorded in the
+        activity's result without retrying so an activity the server may have stored
+        isn't created twice.
+        The post_activity_response attribute is not modified.
+        :param specs: iterable of dictionaries.
+        :param workers: integer, size of the thread pool, defaults to bulk_workers.
+        :param retries: integer, retries per activity, defaults to bulk_retries.
+        :return: BulkResult, with an ActivityResult per spec in input order.
+        """
+        if not workers:
+            workers = self.bulk_workers
+        if retries is None:
+            retries = self.bulk_retries
+        results = [ActivityResult(index, spec) for index, spec in enumerate(specs)]
+        start = time.time()
+        if results:
+            pool = ThreadPool(min(workers, len(results)))
+            try:
+                pool.map(lambda result: self._send_activity(result, retries), results)
+            finally:
+                pool.close()
+                pool.join()
+        return BulkResult(results, time.time() - start)
+
+    def _send_activity(self, result, retries):
+        """
+        Sends the request to create the activity of an ActivityResult, retrying
+        when the activity wasn't stored, and records the outcome in it.
+        :param result: ActivityResult
+        :param retries: integer, maximum number of retries.
+        :return: None
+        """
+        spec = dict(result.spec)
+        if not spec.get("employee_id"):
+            spec["employee_id"] = self.profile_id
+        start = time.time()
+        try:
+            data = activity_data(**spec)
+            for attempt in range(retries + 1):
+                if attempt:
+                    result.retries = attempt
+                    time.sleep(self.bulk_retry_backoff * 2 ** (attempt - 1))
+                try:
+                    result.response = self.ses.post(self.activities_url, data=data)
+                    result.error = None
+                except Exception as error:
+                    result.response = None
+                    result.error = error
+                    if not_sent(error):
+                        continue
+                    break
+                if result.response.status_code not in self.bulk_retry_status_codes:
+                    break
+        except Exception as error:
+            result.error = error
+        finally:
+            result.elapsed = time.time() - start
+        pass
+
+    @has_authentication_header
+    def upsert_activities(self, specs, existing=None, workers=None, retries=None):
+        """
+        Makes the stored activities match the specs sending only the writes needed.
+        Each spec, a dictionary with the post_activity keyword arguments, is matched
+        with an existing activity by employee, project, type, date and ticket
+        (see activity_key): exact matches are skipped, the others are edited with
+        only their differing value and comments, and the specs without a match
+        are created through post_activities. Existing activities without a spec
+        are left as they are. The response attributes are not modified.
+        :param specs: iterable of dictionaries.
+        :param existing: iterable of the activities to match against, by default
+         the activities of the specs' employees between their first and last date.
+        :param workers: integer, size of the thread pools, defaults to bulk_workers.
+        :param retries: integer, retries per created activity, defaults to bulk_retries.
+        :return: UpsertResult
+        """
+        if not workers:
+            workers = self.bulk_workers
+        result = UpsertResult()
+        start = time.time()
+        desired = []
+        for spec in specs:
+            spec = dict(spec)
+            if not spec.get("employee_id"):
+                spec["employee_id"] = self.profile_id
+            try:
+                desired.append((spec, activity_data(**spec)))
+            except Exception as error:
+                result.failed.append((spec, error))
+        if existing is None:
+            existing = []
+            for employee_id in sorted(set(data["employeeId"] for spec, data in desired)):
+                dates = [
+                    data["activityDate"] for spec, data in desired
+                    if data["employeeId"] == employee_id
+                ]
+                existing.extend(self.iter_activities(
+                    user_id=employee_id,
+                    where={"activityDate": {"between": [min(dates), max(dates)]}},
+                    key="activityId"
+                ))
+        index = ActivityIndex(existing)
+        edits = []
+        posts = []
+        for spec, data in desired:
+            current = index.match(activity_key(data))
+            if current is None:
+                posts.append(spec)
+                continue
+            changes = activity_changes(current, data)
+            if changes:
+                edits.append((spec, changes))
+            else:
+                result.unchanged.append(current)
+
+        def send_edit(edit):
+            spec, changes = edit
+            url = self.activities_url + "/" + str(changes["activityId"])
+            try:
+                return self._result(self.request("PUT", url, data=changes))
+            except Exception as error:
+                # Recorded in failed, the other edits and the posts are still sent.
+                return error
+
+        if edits:
+            pool = ThreadPool(min(workers, len(edits)))
+            try:
+                outcomes = pool.map(send_edit, edits)
+            finally:
+                pool.close()
+                pool.join()
+            for (spec, changes), outcome in zip(edits, outcomes):
+                if isinstance(outcome, Exception):
+                    result.failed.append((spec, outcome))
+                else:
+                    result.updated.append(outcome)
+        if posts:
+            for sent in self.post_activities(posts, workers=workers, retries=retries):
+                if sent.ok:
+                    result.created.append(sent.activity)
+                else:
+                    result.failed.append((sent.spec, sent.error or sent.response))
+        result.elapsed = time.time() - start
+        return result
+
     @has_authentication_header
     def edit_activity(
             self,
@@ -537,22 +1414,7 @@ class NovaAPI(object):
         based on the parameters sent.
         :return: None
         """
-        data = {"activityId": activity_id}
-        if(
-            not value and
-            not comments and
-            not ticket
-        ):
-            raise NotEnoughArguments()
-            pass
-        if value:
-            data["value"] = value
-            # noinspection SpellCheckingInspection
-            data["billablevalue"] = value
-        if comments:
-            data["comments"] = comments
-        if ticket:
-            data["ticket"] = ticket
+        data = edit_activity_data(activity_id, value, comments, ticket)
         self.edit_activity_response = self.ses.put(
             self.activities_url + "/" + str(activity_id),
             data=data
@@ -560,4 +1422,140 @@ class NovaAPI(object):
         # Returns json with activityData
         pass
 
+    ###
+    # Calls returning their result instead of assigning it to the instance,
+    # so one logged in instance can be used from several threads.
+    ###
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends an http request with the instance's session.
+        :param method: string, http method.
+        :param url: string
+        :param kwargs: extra keyword arguments for requests.
+        :return: requests.models.Response
+        """
+        return self.ses.request(method, url, **kwargs)
+
+    def _result(self, response, name=None):
+        """
+        Returns the parsed json of a response, converted to the attribute's
+        record type when a name is given.
+        :param response: requests.models.Response
+        :param name: string, the attribute name, optional.
+        :raises requests.HTTPError: on error status codes.
+        :return: the parsed json.
+        """
+        response.raise_for_status()
+        value = self.decode_response(response)
+        if name is not None:
+            value = self.convert_json(name, value)
+        return value
+
+    @has_authentication_header
+    def fetch(self, name, query=None):
+        """
+        Requests a catalog, e.g. "projects", and returns it.
+        :param name: string, the attribute name, one of catalog_urls.
+        :param query: Filter or dictionary of filter keys, optional.
+        :return: list of dictionaries or records.
+        """
+        url = getattr(self, self.catalog_urls[name])
+        if name in self.cached_catalogs:
+            return self._result(self._get_catalog(name, url, query), name)
+        return self._result(self.request("GET", url, params=query_params(query)), name)
+
+    @has_authentication_header
+    def fetch_profile(self, query=None):
+        """
+        Requests the logged in user's profile and returns it.
+        :param query: Filter or dictionary of filter keys, includes the contract by default.
+        :return: dictionary
+        """
+        if query is None:
+            query = {"include": ["contract"]}
+        return self._result(self.request("GET", self.profile_url, params=query_params(query)))
+
+    @has_authentication_header
+    def fetch_activities(self, user_id=None, query=None):
+        """
+        Requests the activities of an employee and returns them.
+        :param user_id: integer, defaults to the logged in user.
+        :param query: Filter or dictionary of filter keys, restricted to the
+         employee unless its where sets the employeeId.
+        :return: list of dictionaries or Activity records.
+        """
+        query = employee_query(query or {}, user_id or self.profile_id)
+        return self._result(
+            self._cached_get(self.activities_url, query.params()),
+            "my_activities"
+        )
+
+    @has_authentication_header
+    def fetch_project_assignments(self, employee_id=None, query=None):
+        """
+        Requests the project assignments of an employee and returns them.
+        :param employee_id: integer, defaults to the logged in user.
+        :param query: Filter or dictionary of filter keys, restricted to the employee
+         unless its where sets the employeeId, includes the projects' accounts by default.
+        :return: list of dictionaries or Assignment records.
+        """
+        if query is None:
+            query = {"include": {"project": "account"}}
+        query = employee_query(query, employee_id or self.profile_id)
+        return self._result(
+            self._cached_get(self.project_assignments_url, query.params()),
+            "my_projects"
+        )
+
+    # noinspection SpellCheckingInspection
+    @has_authentication_header
+    def create_activity(
+        self,
+        project_id,
+        activitytype_id,
+        date=None,
+        employee_id=None,
+        comments="",
+        hours=1,
+        ticket=""
+    ):
+        """
+        Creates a new activity, takes the same arguments as post_activity.
+        :return: dictionary, the created activity.
+        """
+        data = activity_data(
+            project_id,
+            activitytype_id,
+            date=date,
+            employee_id=employee_id or self.profile_id,
+            comments=comments,
+            hours=hours,
+            ticket=ticket
+        )
+        return self._result(self.request("POST", self.activities_url, data=data))
+
+    @has_authentication_header
+    def update_activity(self, activity_id, value=None, comments=None, ticket=None):
+        """
+        Edits an activity, takes the same arguments as edit_activity.
+        :raises NotEnoughArguments: if none of value, comments or ticket are given.
+        :return: dictionary, the edited activity.
+        """
+        data = edit_activity_data(activity_id, value, comments, ticket)
+        return self._result(
+            self.request("PUT", self.activities_url + "/" + str(activity_id), data=data)
+        )
+
+    @has_authentication_header
+    def remove_activity(self, activity_id):
+        """
+        Deletes an activity.
+        :param activity_id: integer
+        :return: integer, the number of activities deleted.
+        """
+        return self._result(
+            self.request("DELETE", self.activities_url + "/" + str(activity_id))
+        ).get("count", 0)
+
     pass
@@ -0,0 +1,106 @@
+from .decoding import decode_response
+
+
+class ActivityResult(object):
+    """Outcome of one activity sent by NovaAPI.post_activities.
+    """
+
+    def __init__(self, index, spec):
+        """ Initializes attributes.
+        :param index: integer, position of the spec in the input.
+        :param spec: dictionary, the post_activity keyword arguments.
+        """
+        self.index = index
+        self.spec = spec
+        # Last response received, None if every attempt raised.
+        self.response = None
+        # Last exception raised while sending, None if a response was received.
+        self.error = None
+        # Number of attempts made after the first one.
+        self.retries = 0
+        # Seconds spent on this activity, retries included.
+        self.elapsed = 0.0
+        pass
+
+    @property
+    def ok(self):
+        """
+        True if the activity was created.
+        :return: boolean
+        """
+        return self.error is None and self.response is not None and self.response.ok
+
+    @property
+    def activity(self):
+        """
+        The created activity parsed from the response.
+        :return: dictionary or None if the activity wasn't created.
+        """
+        if not self.ok:
+            return None
+        return decode_response(self.response)
+
+    def __repr__(self):
+        return "<ActivityResult %d ok=%s retries=%d>" % (self.index, self.ok, self.retries)
+
+    pass
+
+
+class BulkResult(object):
+    """Results of NovaAPI.post_activities in input order, with the overall throughput.
+    """
+
+    def __init__(self, results, elapsed):
+        """ Initializes attributes.
+        :param results: list of ActivityResult in input order.
+        :param elapsed: float, seconds spent sending all the activities.
+        """
+        self.results = results
+        self.elapsed = elapsed
+        pass
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, index):
+        return self.results[index]
+
+    @property
+    def succeeded(self):
+        """
+        :return: list of the ActivityResult that created an activity.
+        """
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self):
+        """
+        :return: list of the ActivityResult that didn't create an activity.
+        """
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def retries(self):
+        """
+        :return: integer, total number of retries.
+        """
+        return sum(result.retries for result in self.results)
+
+    @property
+    def throughput(self):
+        """
+        :return: float, activities sent per second.
+        """
+        if not self.elapsed:
+            return 0.0
+        return len(self.results) / self.elapsed
+
+    def __repr__(self):
+        return "<BulkResult %d/%d ok, %.1f/s>" % (
+            len(self.succeeded), len(self.results), self.throughput
+        )
+
+    pass
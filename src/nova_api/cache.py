@@ -0,0 +1,168 @@
+import json
+import os
+import tempfile
+import time
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+
+class CatalogCache(object):
+    """Persistent on-disk cache for the catalog endpoints.
+    Each catalog is stored as a json file holding the response body and its validators,
+    fresh entries are served without any request and stale ones are revalidated
+    with the ETag/Last-Modified headers when the server sent them.
+    """
+    # Catalogs that rarely change, as attribute name: default ttl in seconds.
+    default_ttls = {
+        "project_types": 24 * 60 * 60,
+        "project_statuses": 24 * 60 * 60,
+        "activity_types": 24 * 60 * 60,
+        "technologies": 24 * 60 * 60,
+        "employee_types": 24 * 60 * 60,
+        "org_structures": 24 * 60 * 60,
+    }
+
+    def __init__(self, directory, ttls=None):
+        """ Initializes attributes.
+        :param directory: string, path of the directory holding the cache files.
+        :param ttls: dictionary, attribute name: ttl in seconds, overrides default_ttls.
+        """
+        self.directory = os.path.expanduser(directory)
+        self.ttls = dict(self.default_ttls)
+        if ttls:
+            self.ttls.update(ttls)
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        pass
+
+    def path(self, name):
+        """
+        Returns the path of the file for the given catalog.
+        :param name: string, the catalog attribute name.
+        :return: string
+        """
+        return os.path.join(self.directory, name + ".json")
+
+    def load(self, name):
+        """
+        Reads the cached entry for the given catalog.
+        :param name: string, the catalog attribute name.
+        :return: dictionary or None if missing or unreadable.
+        """
+        try:
+            with open(self.path(name)) as cache_file:
+                return json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def save(self, name, entry):
+        """
+        Atomically writes the entry for the given catalog.
+        :param name: string, the catalog attribute name.
+        :param entry: dictionary
+        :return: None
+        """
+        descriptor, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w") as tmp_file:
+                json.dump(entry, tmp_file)
+            replace_file(tmp_path, self.path(name))
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        pass
+
+    def clear(self, name=None):
+        """
+        Removes the cached entry of a catalog, or of every catalog.
+        :param name: string, the catalog attribute name, None for all.
+        :return: None
+        """
+        names = [name] if name else list(self.ttls)
+        for catalog in names:
+            if os.path.exists(self.path(catalog)):
+                os.remove(self.path(catalog))
+        pass
+
+    def is_fresh(self, name, entry):
+        """
+        Checks if an entry was fetched or revalidated within its catalog's ttl.
+        :param name: string, the catalog attribute name.
+        :param entry: dictionary
+        :return: boolean
+        """
+        return time.time() - entry["fetched_at"] < self.ttls.get(name, 0)
+
+    def get(self, session, name, url):
+        """
+        Returns the response for a catalog, reading it from disk while fresh.
+        Stale entries are revalidated with a conditional request, a 304 answer
+        renews the entry and the cached body is returned.
+        :param session: requests.Session used for the requests.
+        :param name: string, the catalog attribute name.
+        :param url: string, the catalog endpoint.
+        :return: requests.models.Response
+        """
+        entry = self.load(name)
+        if entry is not None and entry.get("url") != url:
+            entry = None
+        if entry is not None and self.is_fresh(name, entry):
+            return entry_response(entry)
+        headers = {}
+        if entry is not None and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        response = session.get(url, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            entry["fetched_at"] = time.time()
+            entry["etag"] = response.headers.get("ETag", entry.get("etag"))
+            self.save(name, entry)
+            return entry_response(entry)
+        if response.status_code == 200:
+            self.save(name, {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+                "body": response.content.decode("utf-8"),
+            })
+        return response
+
+    pass
+
+
+def entry_response(entry):
+    """
+    Builds a response from a cache entry, the from_cache attribute is set to True.
+    :param entry: dictionary
+    :return: requests.models.Response
+    """
+    response = Response()
+    response.status_code = 200
+    response.url = entry["url"]
+    response.encoding = "utf-8"
+    response._content = entry["body"].encode("utf-8")
+    response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+    if entry.get("etag"):
+        response.headers["ETag"] = entry["etag"]
+    if entry.get("last_modified"):
+        response.headers["Last-Modified"] = entry["last_modified"]
+    response.from_cache = True
+    return response
+
+
+def replace_file(source, destination):
+    """
+    Renames source to destination, overwriting it.
+    :param source: string
+    :param destination: string
+    :return: None
+    """
+    if hasattr(os, "replace"):
+        os.replace(source, destination)
+        return
+    if os.name == "nt" and os.path.exists(destination):
+        os.remove(destination)
+    os.rename(source, destination)
+    pass
@@ -0,0 +1,56 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_backend():
+    """
+    :return: string, the name of the library parsing the responses.
+    """
+    if orjson is not None:
+        return "orjson"
+    return "json"
+
+
+def loads(content):
+    """
+    Parses a json document with orjson when it's installed, the standard json otherwise.
+    :param content: bytes or string.
+    :return: the parsed json.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    if isinstance(content, bytes) and not isinstance(content, str):
+        content = content.decode("utf-8")
+    return json.loads(content)
+
+
+def decode_response(response, release=False, keep=True):
+    """
+    Parses the json body of a response the first time it's called and returns
+    the same parsed value afterwards, so a response is never parsed twice.
+    :param response: requests.models.Response
+    :param release: boolean, drop the raw body once parsed to free its memory,
+     the response's content, text and json() are empty afterwards.
+    :param keep: boolean, False to parse without storing the value on the response,
+     its body is then kept and parsed again on the next call.
+    :return: the parsed json.
+    """
+    try:
+        return response.decoded_json
+    except AttributeError:
+        pass
+    if orjson is not None:
+        value = orjson.loads(response.content)
+    else:
+        # requests detects the body's encoding when the server doesn't send one.
+        value = response.json()
+    if not keep:
+        return value
+    response.decoded_json = value
+    if release:
+        response._content = b""
+    return value
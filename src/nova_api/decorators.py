@@ -1,5 +1,5 @@
 from functools import wraps
-from nova_exceptions import AuthorizationHeaderNotSet, AttributeIsNotResponseType
+from .nova_exceptions import AuthorizationHeaderNotSet, AttributeIsNotResponseType
 from requests.models import Response
 
 
@@ -17,11 +17,18 @@ def set_to_json_response(attr_to_set, response_attr_name):
         def set_to_json_inner_wrapper(instance):
             """
             The actual decorator that can access the first decorator's received arguments.
-            Assigns the json response from the response attribute to the attribute to set.
+            Assigns the json response from the response attribute to the attribute to set,
+            parsed and converted by the instance's parse_json method when it has one.
             :param instance: a class (NovaAPI) instance.
             :return: result of the received function.
             """
-            setattr(instance, attr_to_set, getattr(instance, response_attr_name).json())
+            response = getattr(instance, response_attr_name)
+            parse_json = getattr(instance, "parse_json", None)
+            if parse_json is not None:
+                value = parse_json(attr_to_set, response)
+            else:
+                value = response.json()
+            setattr(instance, attr_to_set, value)
             return f(instance)
         return set_to_json_inner_wrapper
     return set_to_json_outer_decorator
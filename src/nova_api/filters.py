@@ -0,0 +1,143 @@
+import json
+
+
+class Filter(object):
+    """Composable LoopBack filter, sent as the filter get parameter.
+    Every method returns a new Filter so partial filters can be shared:
+        Filter().where(employeeId=7).fields("activityId", "value").order("activityDate DESC").limit(50)
+    """
+    keys = ("where", "fields", "include", "order", "limit", "skip")
+
+    def __init__(self, where=None, fields=None, include=None, order=None, limit=None, skip=None):
+        """ Initializes attributes.
+        :param where: dictionary of conditions.
+        :param fields: list of field names to return, all by default.
+        :param include: list of relations to include.
+        :param order: list of "field ASC|DESC" clauses.
+        :param limit: integer
+        :param skip: integer
+        """
+        self._filter = {}
+        for key, value in zip(self.keys, (where, fields, include, order, limit, skip)):
+            if value is not None:
+                self._filter[key] = value
+        pass
+
+    def _with(self, key, value):
+        """
+        :return: a copy of this filter with the key set to value.
+        """
+        copy = Filter()
+        copy._filter = dict(self._filter)
+        copy._filter[key] = value
+        return copy
+
+    def where(self, conditions=None, **equals):
+        """
+        Adds where conditions, given as a dictionary and/or field=value arguments.
+        :return: Filter
+        """
+        where = dict(self._filter.get("where", {}))
+        where.update(conditions or {})
+        where.update(equals)
+        return self._with("where", where)
+
+    def fields(self, *names):
+        """
+        Restricts the fields returned for each record.
+        :return: Filter
+        """
+        return self._with("fields", list(self._filter.get("fields", [])) + list(names))
+
+    def include(self, *relations):
+        """
+        Adds relations to include, a relation may be a name or a dictionary
+        such as {"project": "account"}.
+        :return: Filter
+        """
+        return self._with("include", list(self._filter.get("include", [])) + list(relations))
+
+    def order(self, *clauses):
+        """
+        Adds sort clauses such as "activityDate DESC".
+        :return: Filter
+        """
+        return self._with("order", list(self._filter.get("order", [])) + list(clauses))
+
+    def limit(self, count):
+        """
+        :return: Filter returning at most count records.
+        """
+        return self._with("limit", count)
+
+    def skip(self, count):
+        """
+        :return: Filter skipping the first count records.
+        """
+        return self._with("skip", count)
+
+    def get(self, key, default=None):
+        """
+        :param key: string, one of keys.
+        :return: the value set for the key.
+        """
+        return self._filter.get(key, default)
+
+    def to_dict(self):
+        """
+        :return: dictionary, a copy of the filter.
+        """
+        return json.loads(self.to_json())
+
+    def to_json(self):
+        """
+        :return: string, the filter as json with sorted keys.
+        """
+        return json.dumps(self._filter, sort_keys=True, separators=(",", ":"))
+
+    def params(self):
+        """
+        :return: dictionary, the get parameters for requests.
+        """
+        return {"filter": self.to_json()}
+
+    def __eq__(self, other):
+        return isinstance(other, Filter) and self.to_json() == other.to_json()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.to_json())
+
+    def __repr__(self):
+        return "Filter(%s)" % self.to_json()
+
+    pass
+
+
+def query_params(query):
+    """
+    Returns the get parameters of a query.
+    :param query: Filter, dictionary of filter keys or None.
+    :return: dictionary or None.
+    """
+    if query is None:
+        return None
+    if not isinstance(query, Filter):
+        query = Filter(**query)
+    return query.params()
+
+
+def employee_query(query, employee_id):
+    """
+    Returns a filter restricted to an employee unless its where sets the employeeId.
+    :param query: Filter or dictionary of filter keys.
+    :param employee_id: the employee id.
+    :return: Filter
+    """
+    if not isinstance(query, Filter):
+        query = Filter(**query)
+    if "employeeId" in query.get("where", {}):
+        return query
+    return query.where(employeeId=employee_id)
@@ -0,0 +1,84 @@
+try:
+    basestring
+except NameError:
+    basestring = str
+
+
+class CatalogIndex(object):
+    """Constant time lookups over a list of records parsed from a catalog response.
+    Records are indexed by id and by their lowercased name fields when built,
+    reverse indexes on foreign keys are built on first use of each field.
+    """
+
+    def __init__(self, records, id_field="id", name_fields=("name",)):
+        """ Initializes attributes.
+        :param records: list of dictionaries.
+        :param id_field: string, the field holding each record's id.
+        :param name_fields: tuple of strings, fields indexed case-insensitively.
+        """
+        self.records = records
+        self.id_field = id_field
+        self.name_fields = name_fields
+        self.by_id = {}
+        self.by_name = {}
+        self._groups = {}
+        for record in records:
+            self.by_id[record.get(id_field)] = record
+            for field in name_fields:
+                value = record.get(field)
+                if isinstance(value, basestring):
+                    self.by_name.setdefault(value.lower(), record)
+        pass
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, record_id):
+        return record_id in self.by_id
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def get(self, record_id, default=None):
+        """
+        Returns the record with the given id.
+        :param record_id: the id value.
+        :param default: returned when there's no such record.
+        :return: dictionary
+        """
+        return self.by_id.get(record_id, default)
+
+    def find(self, name, default=None):
+        """
+        Returns the first record whose name fields match the given name, ignoring case.
+        :param name: string
+        :param default: returned when there's no such record.
+        :return: dictionary
+        """
+        return self.by_name.get(name.lower(), default)
+
+    def group(self, field):
+        """
+        Returns the reverse index of a field, built on first use.
+        :param field: string, e.g. a foreign key like "accountId".
+        :return: dictionary, field value: list of records.
+        """
+        groups = self._groups.get(field)
+        if groups is None:
+            groups = {}
+            for record in self.records:
+                groups.setdefault(record.get(field), []).append(record)
+            self._groups[field] = groups
+        return groups
+
+    def related(self, field, value):
+        """
+        Returns the records whose field equals value.
+        :param field: string
+        :param value: the field value.
+        :return: list of dictionaries.
+        """
+        return self.group(field).get(value, [])
+
+    pass
+
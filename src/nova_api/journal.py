@@ -0,0 +1,470 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+import requests
+from .api import activity_data, edit_activity_data
+
+# Fields compared to find the activity created by a post that was sent
+# but not recorded as sent before the process stopped.
+RECONCILE_FIELDS = ("employeeId", "projectId", "typeId", "activityDate", "value", "comments", "task")
+
+
+class JournalEntry(object):
+    """A pending operation of an ActivityJournal.
+    """
+
+    def __init__(self, seq, key, operation, data, state, error=None):
+        """ Initializes attributes.
+        :param seq: integer, the order in which the operations are sent.
+        :param key: string, the activity id or the local key of a queued post.
+        :param operation: string, "post", "edit" or "delete".
+        :param data: dictionary, the request body.
+        :param state: string, "pending", "sending" or "failed".
+        :param error: string, why a failed operation was rejected.
+        """
+        self.seq = seq
+        self.key = key
+        self.operation = operation
+        self.data = data
+        self.state = state
+        self.error = error
+        pass
+
+    def __repr__(self):
+        return "<JournalEntry %d %s %s %s>" % (self.seq, self.operation, self.key, self.state)
+
+    pass
+
+
+class ActivityJournal(object):
+    """Durable write-behind queue for the activity create, edit and delete requests.
+    Operations are stored in a SQLite file and return right away, flush sends
+    them in order, from a background thread once start is called. Operations on
+    the same activity are coalesced while pending: a post followed by edits is
+    sent as one post, a post followed by a delete isn't sent at all, and edits
+    are merged. A post sent before the process stopped but not recorded as sent
+    is looked up on the server when the journal is opened again, so it's not
+    created twice.
+    """
+    # Status codes for which an operation is kept and sent again later.
+    retry_status_codes = (401, 408, 429, 500, 502, 503, 504)
+    # Status codes after which a post may have been stored, it's looked up before sending it again.
+    ambiguous_status_codes = (408, 500, 502, 504)
+    # Seconds between background flushes, and after a failed one.
+    flush_interval = 1.0
+    retry_interval = 5.0
+
+    def __init__(self, nova, path):
+        """ Initializes attributes, creates the tables and recovers the operations
+        left sending by a previous process.
+        :param nova: logged in NovaAPI instance used to send the operations.
+        :param path: string, the journal's database file, "~" is expanded.
+        """
+        self.nova = nova
+        self.path = os.path.expanduser(path)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.lock = threading.Lock()
+        # Held while flushing, so the operations are sent one at a time and in order.
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+        with self.lock:
+            with self.connection:
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS operations ("
+                    "seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT, operation TEXT,"
+                    " data TEXT, state TEXT DEFAULT 'pending', error TEXT)"
+                )
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS activity_ids (key TEXT PRIMARY KEY, activityId INTEGER)"
+                )
+        self.recover()
+        pass
+
+    def close(self):
+        """
+        Stops the background thread and closes the database, pending operations stay stored.
+        :return: None
+        """
+        self.stop()
+        self.connection.close()
+        pass
+
+    ###
+    # Queueing
+    ###
+
+    def post_activity(
+        self,
+        project_id,
+        activitytype_id,
+        date=None,
+        employee_id=None,
+        comments="",
+        hours=1,
+        ticket=""
+    ):
+        """
+        Queues the creation of an activity, takes the same arguments as NovaAPI.post_activity.
+        :return: string, the local key to edit or delete the activity before it's sent.
+        """
+        key = "local-" + uuid.uuid4().hex
+        data = activity_data(
+            project_id,
+            activitytype_id,
+            date=date,
+            employee_id=employee_id or self.nova.profile_id,
+            comments=comments,
+            hours=hours,
+            ticket=ticket
+        )
+        self._enqueue(key, "post", data)
+        return key
+
+    def edit_activity(self, activity_id, value=None, comments=None, ticket=None):
+        """
+        Queues an activity edit, takes the same arguments as NovaAPI.edit_activity.
+        :param activity_id: integer or the local key returned by post_activity.
+        :raises NotEnoughArguments: if none of value, comments or ticket are given.
+        :return: None
+        """
+        data = edit_activity_data(activity_id, value, comments, ticket)
+        del data["activityId"]
+        self._enqueue(str(activity_id), "edit", data)
+        pass
+
+    def delete_activity(self, activity_id):
+        """
+        Queues the deletion of an activity.
+        :param activity_id: integer or the local key returned by post_activity.
+        :return: None
+        """
+        self._enqueue(str(activity_id), "delete", {})
+        pass
+
+    def _enqueue(self, key, operation, data):
+        """
+        Stores an operation, coalesced with the activity's last pending one.
+        :return: None
+        """
+        with self.lock:
+            with self.connection:
+                row = self.connection.execute(
+                    "SELECT seq, operation, data FROM operations"
+                    " WHERE key = ? AND state = 'pending' ORDER BY seq DESC LIMIT 1",
+                    (key,)
+                ).fetchone()
+                if row is None:
+                    self._insert(key, operation, data)
+                else:
+                    self._coalesce(row[0], row[1], json.loads(row[2]), operation, data)
+        self.wake.set()
+        pass
+
+    def _insert(self, key, operation, data):
+        self.connection.execute(
+            "INSERT INTO operations (key, operation, data) VALUES (?, ?, ?)",
+            (key, operation, json.dumps(data))
+        )
+
+    def _coalesce(self, seq, pending_operation, pending_data, operation, data):
+        """
+        Merges an operation into the activity's pending one, must be called in a transaction.
+        :return: None
+        """
+        if pending_operation == "delete":
+            # Nothing can follow the deletion of an activity.
+            return
+        if operation == "delete":
+            if pending_operation == "post":
+                # Never sent, so there's nothing to delete.
+                self.connection.execute("DELETE FROM operations WHERE seq = ?", (seq,))
+            else:
+                self.connection.execute(
+                    "UPDATE operations SET operation = 'delete', data = '{}' WHERE seq = ?", (seq,)
+                )
+            return
+        if pending_operation == "post" and "ticket" in data:
+            data = dict(data)
+            data["task"] = data.pop("ticket")
+        pending_data.update(data)
+        self.connection.execute(
+            "UPDATE operations SET data = ? WHERE seq = ?", (json.dumps(pending_data), seq)
+        )
+
+    ###
+    # Inspection
+    ###
+
+    def entries(self, state=None):
+        """
+        :param state: string, "pending", "sending" or "failed", all of them by default.
+        :return: list of JournalEntry in the order they're sent.
+        """
+        sql = "SELECT seq, key, operation, data, state, error FROM operations"
+        parameters = ()
+        if state:
+            sql += " WHERE state = ?"
+            parameters = (state,)
+        with self.lock:
+            rows = self.connection.execute(sql + " ORDER BY seq", parameters).fetchall()
+        return [
+            JournalEntry(seq, key, operation, json.loads(data), row_state, error)
+            for seq, key, operation, data, row_state, error in rows
+        ]
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM operations WHERE state != 'failed'"
+            ).fetchone()[0]
+
+    def activity_id(self, key):
+        """
+        :param key: the activity id or the local key returned by post_activity.
+        :return: integer, the activity id, None while its post hasn't been sent.
+        """
+        key = str(key)
+        if not key.startswith("local-"):
+            return int(key)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT activityId FROM activity_ids WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def discard_failed(self):
+        """
+        Removes the operations rejected by the server.
+        :return: integer, number of operations removed.
+        """
+        with self.lock:
+            with self.connection:
+                return self.connection.execute(
+                    "DELETE FROM operations WHERE state = 'failed'"
+                ).rowcount
+
+    ###
+    # Sending
+    ###
+
+    def flush(self):
+        """
+        Sends the pending operations in order. Stops at the first one that
+        should be sent again later, the ones rejected by the server are marked failed.
+        A post that may have been stored by an earlier attempt is looked up
+        first and only sent again if it wasn't, see recover.
+        :return: integer, number of operations sent.
+        """
+        sent = 0
+        with self.flush_lock:
+            while True:
+                with self.lock:
+                    with self.connection:
+                        row = self.connection.execute(
+                            "SELECT seq, key, operation, data, state FROM operations"
+                            " WHERE state IN ('pending', 'sending') ORDER BY seq LIMIT 1"
+                        ).fetchone()
+                        if row is None:
+                            return sent
+                        if row[4] == "pending":
+                            # Recorded before sending, see recover.
+                            self.connection.execute(
+                                "UPDATE operations SET state = 'sending' WHERE seq = ?", (row[0],)
+                            )
+                entry = JournalEntry(row[0], row[1], row[2], json.loads(row[3]), "sending")
+                if row[4] == "sending":
+                    if not self._reconcile(entry):
+                        return sent
+                    continue
+                if not self._send(entry):
+                    return sent
+                sent += 1
+
+    def _send(self, entry):
+        """
+        Sends an operation and records its outcome.
+        :param entry: JournalEntry in the sending state.
+        :return: boolean, False if it must be sent again later.
+        """
+        nova = self.nova
+        activity_id = self.activity_id(entry.key)
+        if entry.operation != "post" and activity_id is None:
+            self._set_state(entry, "failed", "the activity's post wasn't sent")
+            return True
+        try:
+            if entry.operation == "post":
+                response = nova.request("POST", nova.activities_url, data=entry.data)
+            elif entry.operation == "edit":
+                data = dict(entry.data, activityId=activity_id)
+                response = nova.request(
+                    "PUT", nova.activities_url + "/" + str(activity_id), data=data
+                )
+            else:
+                response = nova.request("DELETE", nova.activities_url + "/" + str(activity_id))
+        except requests.exceptions.ConnectTimeout as error:
+            # Never reached the server.
+            self._retry_later(entry, error, ambiguous=False)
+            return False
+        except Exception as error:
+            self._retry_later(entry, error)
+            return False
+        if response.status_code in self.retry_status_codes:
+            self._retry_later(
+                entry,
+                "%d %s" % (response.status_code, response.reason),
+                ambiguous=response.status_code in self.ambiguous_status_codes
+            )
+            return False
+        if entry.operation == "delete" and response.status_code == 404:
+            # Already deleted, e.g. sent before the process stopped.
+            self._done(entry)
+            return True
+        if not response.ok:
+            self._set_state(entry, "failed", "%d %s" % (response.status_code, response.text[:200]))
+            return True
+        activity_id = None
+        try:
+            if entry.operation == "post":
+                activity_id = nova.decode_response(response)["activityId"]
+        except Exception as error:
+            self._retry_later(entry, error)
+            return False
+        self._done(entry, activity_id)
+        return True
+
+    def _retry_later(self, entry, error, ambiguous=True):
+        """
+        Keeps an operation that must be sent again. A post that may have been
+        stored stays sending, so it's looked up before being sent again.
+        :param entry: JournalEntry
+        :param error: exception or string, recorded as the entry's error.
+        :param ambiguous: boolean, False if the request surely wasn't processed.
+        :return: None
+        """
+        state = "sending" if ambiguous and entry.operation == "post" else "pending"
+        self._set_state(entry, state, str(error)[:200] or type(error).__name__)
+        pass
+
+    def _set_state(self, entry, state, error=None):
+        with self.lock:
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE operations SET state = ?, error = ? WHERE seq = ?",
+                    (state, error, entry.seq)
+                )
+
+    def _done(self, entry, activity_id=None):
+        """
+        Removes a sent operation, recording the id of a posted activity in the same transaction.
+        :return: None
+        """
+        with self.lock:
+            with self.connection:
+                self.connection.execute("DELETE FROM operations WHERE seq = ?", (entry.seq,))
+                if activity_id is not None:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO activity_ids (key, activityId) VALUES (?, ?)",
+                        (entry.key, activity_id)
+                    )
+        pass
+
+    def recover(self):
+        """
+        Resolves the operations a previous process left sending: edits and deletes
+        are sent again, posts are looked up on the server and only sent again
+        if no unclaimed activity with the same fields exists.
+        :return: None
+        """
+        with self.flush_lock:
+            for entry in self.entries("sending"):
+                if not self._reconcile(entry):
+                    # Resolved by the next flush or recover, nothing after it is sent meanwhile.
+                    return
+        pass
+
+    def _reconcile(self, entry):
+        """
+        Resolves an operation left sending: an edit or delete is made pending again,
+        a post is marked sent if an unclaimed activity with the same fields exists,
+        pending otherwise.
+        :param entry: JournalEntry in the sending state.
+        :return: boolean, False if the activities couldn't be requested.
+        """
+        if entry.operation != "post":
+            self._set_state(entry, "pending")
+            return True
+        where = dict(
+            (field, entry.data[field]) for field in RECONCILE_FIELDS if field in entry.data
+        )
+        if self.nova.query_cache is not None:
+            # A post without a response didn't invalidate the employee's cached activities.
+            self.nova.query_cache.invalidate(self.nova.activities_url, entry.data.get("employeeId"))
+        try:
+            candidates = self.nova.fetch_activities(
+                entry.data.get("employeeId"), query={"where": where, "order": ["activityId ASC"]}
+            )
+        except Exception:
+            return False
+        with self.lock:
+            claimed = set(row[0] for row in self.connection.execute(
+                "SELECT activityId FROM activity_ids"
+            ))
+        found = [
+            activity["activityId"] for activity in candidates
+            if activity["activityId"] not in claimed
+        ]
+        if found:
+            self._done(entry, found[0])
+        else:
+            self._set_state(entry, "pending")
+        return True
+
+    def start(self):
+        """
+        Starts flushing from a background thread, right after each operation
+        is queued and every flush_interval seconds.
+        :return: None
+        """
+        if self.thread is not None:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+        pass
+
+    def stop(self, flush=False):
+        """
+        Stops the background thread.
+        :param flush: boolean, send the pending operations before returning.
+        :return: None
+        """
+        if self.thread is not None:
+            self.stopping.set()
+            self.wake.set()
+            self.thread.join()
+            self.thread = None
+        if flush:
+            self.flush()
+        pass
+
+    def _run(self):
+        interval = self.flush_interval
+        while not self.stopping.is_set():
+            self.wake.wait(interval)
+            self.wake.clear()
+            if self.stopping.is_set():
+                break
+            try:
+                self.flush()
+            except Exception:
+                interval = self.retry_interval
+                continue
+            interval = self.retry_interval if len(self.entries("pending")) else self.flush_interval
+        pass
+
+    pass
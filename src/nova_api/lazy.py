@@ -0,0 +1,48 @@
+class LazyAttribute(object):
+    """Data descriptor for the attributes set by build_info.
+    The value is kept in the instance __dict__, or in the instance's catalog_store
+    when it holds the attribute. When the value is None and the instance has lazy
+    enabled, reading it calls the instance's load method first so the matching
+    get and set methods run only for the data actually used.
+    """
+
+    def __init__(self, name):
+        """ Initializes attributes.
+        :param name: string, the attribute name.
+        """
+        self.name = name
+        pass
+
+    def _store(self, instance):
+        """
+        Returns the instance's catalog store if it holds this attribute.
+        :param instance: NovaAPI instance.
+        :return: CatalogStore or None
+        """
+        store = instance.__dict__.get("catalog_store")
+        if store is not None and self.name in store:
+            return store
+        return None
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        store = self._store(instance)
+        if store is not None:
+            value = store.get(self.name)
+        else:
+            value = instance.__dict__.get(self.name)
+        if value is None and instance.__dict__.get("lazy"):
+            value = instance.load(self.name, reload=False)
+        return value
+
+    def __set__(self, instance, value):
+        store = self._store(instance)
+        if store is None:
+            instance.__dict__[self.name] = value
+        elif value is not None:
+            # Clearing a shared value is done with the store's invalidate method.
+            store.set(self.name, value)
+        pass
+
+    pass
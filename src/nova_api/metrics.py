@@ -0,0 +1,347 @@
+import re
+import threading
+import time
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+# Path segments replaced in the endpoint names, e.g. /api/Activities/{id}.
+_id_segment = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_name(method, url):
+    """
+    Returns the name metrics are grouped by, the method and the url path
+    with the numeric segments replaced.
+    :param method: string, http method.
+    :param url: string
+    :return: string, e.g. "PUT /api/Activities/{id}".
+    """
+    return "%s %s" % (method, _id_segment.sub("/{id}", urlparse(url).path or "/"))
+
+
+def response_endpoint(response):
+    """
+    :param response: requests.models.Response
+    :return: string, the endpoint name of the request that got the response.
+    """
+    request = response.request
+    if request is None:
+        return endpoint_name("GET", response.url or "")
+    return endpoint_name(request.method, request.url)
+
+
+class RequestSample(object):
+    """Measurements of one http request sent by a NovaAPI session.
+    """
+    __slots__ = (
+        "endpoint",
+        "method",
+        "url",
+        "status_code",
+        "seconds",
+        "bytes_sent",
+        "bytes_received",
+        "retries",
+    )
+
+    def __init__(self, endpoint, method, url, status_code, seconds,
+                 bytes_sent=0, bytes_received=0, retries=0):
+        """ Initializes attributes.
+        :param endpoint: string, see endpoint_name.
+        :param method: string
+        :param url: string
+        :param status_code: integer
+        :param seconds: float, from sending the request to reading the whole body.
+        :param bytes_sent: integer, size of the request body.
+        :param bytes_received: integer, size of the response body.
+        :param retries: integer, retries made by the transport.
+        """
+        self.endpoint = endpoint
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.seconds = seconds
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+        self.retries = retries
+        pass
+
+    def __repr__(self):
+        return "<RequestSample %s %s %.4fs>" % (self.endpoint, self.status_code, self.seconds)
+
+    pass
+
+
+class MetricsSink(object):
+    """Interface of the objects receiving the measurements, passed to NovaAPI as metrics.
+    Subclasses override the methods to forward them to an exporter,
+    they are called from the threads sending the requests.
+    """
+
+    def record_request(self, sample):
+        """
+        Called after every response is received.
+        :param sample: RequestSample
+        :return: None
+        """
+        pass
+
+    def record_decode(self, endpoint, seconds, size):
+        """
+        Called after a response's json body is parsed.
+        :param endpoint: string, see endpoint_name.
+        :param seconds: float, time spent parsing.
+        :param size: integer, size of the body or 0 if unknown.
+        :return: None
+        """
+        pass
+
+    def record_rate_limit(self, limits):
+        """
+        Called when an AdaptiveRateLimiter changes its limits.
+        :param limits: dictionary, see AdaptiveRateLimiter.snapshot.
+        :return: None
+        """
+        pass
+
+    pass
+
+
+class CallbackSink(MetricsSink):
+    """MetricsSink calling the given functions.
+    """
+
+    def __init__(self, on_request=None, on_decode=None, on_rate_limit=None):
+        """ Initializes attributes.
+        :param on_request: function receiving each RequestSample.
+        :param on_decode: function receiving the endpoint, seconds and size of each parse.
+        :param on_rate_limit: function receiving the rate limiter's limits when they change.
+        """
+        self.on_request = on_request
+        self.on_decode = on_decode
+        self.on_rate_limit = on_rate_limit
+        pass
+
+    def record_request(self, sample):
+        if self.on_request is not None:
+            self.on_request(sample)
+
+    def record_decode(self, endpoint, seconds, size):
+        if self.on_decode is not None:
+            self.on_decode(endpoint, seconds, size)
+
+    def record_rate_limit(self, limits):
+        if self.on_rate_limit is not None:
+            self.on_rate_limit(limits)
+
+    pass
+
+
+class MultiSink(MetricsSink):
+    """MetricsSink forwarding the measurements to several sinks.
+    """
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+        pass
+
+    def record_request(self, sample):
+        for sink in self.sinks:
+            sink.record_request(sample)
+
+    def record_decode(self, endpoint, seconds, size):
+        for sink in self.sinks:
+            sink.record_decode(endpoint, seconds, size)
+
+    def record_rate_limit(self, limits):
+        for sink in self.sinks:
+            sink.record_rate_limit(limits)
+
+    pass
+
+
+class EndpointStats(object):
+    """Aggregated measurements of one endpoint.
+    """
+
+    def __init__(self, buckets):
+        """ Initializes attributes.
+        :param buckets: tuple of the latency histogram upper bounds in seconds.
+        """
+        self.buckets = buckets
+        # Requests per bucket, the last one counts the slower ones.
+        self.latency_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.status_codes = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.decodes = 0
+        self.decode_seconds = 0.0
+        self.decode_bytes = 0
+        pass
+
+    def add_request(self, sample):
+        """
+        :param sample: RequestSample
+        :return: None
+        """
+        index = 0
+        while index < len(self.buckets) and sample.seconds > self.buckets[index]:
+            index += 1
+        self.latency_counts[index] += 1
+        self.count += 1
+        self.seconds += sample.seconds
+        self.max_seconds = max(self.max_seconds, sample.seconds)
+        self.status_codes[sample.status_code] = self.status_codes.get(sample.status_code, 0) + 1
+        self.bytes_sent += sample.bytes_sent
+        self.bytes_received += sample.bytes_received
+        self.retries += sample.retries
+        pass
+
+    def add_decode(self, seconds, size):
+        self.decodes += 1
+        self.decode_seconds += seconds
+        self.decode_bytes += size
+        pass
+
+    @property
+    def mean_seconds(self):
+        """
+        :return: float, mean latency or 0 without requests.
+        """
+        return self.seconds / self.count if self.count else 0.0
+
+    def quantile(self, fraction):
+        """
+        Estimates a latency quantile as the upper bound of the histogram bucket it falls in.
+        :param fraction: float between 0 and 1, e.g. 0.95.
+        :return: float, seconds, max_seconds if it falls in the last bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.latency_counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max_seconds
+
+    def to_dict(self):
+        """
+        :return: dictionary with the aggregated values.
+        """
+        return {
+            "count": self.count,
+            "seconds": self.seconds,
+            "mean_seconds": self.mean_seconds,
+            "max_seconds": self.max_seconds,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "latency_buckets": list(zip(self.buckets + (float("inf"),), self.latency_counts)),
+            "status_codes": dict(self.status_codes),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "retries": self.retries,
+            "decodes": self.decodes,
+            "decode_seconds": self.decode_seconds,
+            "decode_bytes": self.decode_bytes,
+        }
+
+    pass
+
+
+class InMemoryMetrics(MetricsSink):
+    """MetricsSink aggregating the measurements per endpoint in memory:
+        metrics = InMemoryMetrics()
+        nova = NovaAPI(username, password, metrics=metrics)
+        nova.build_info()
+        metrics.snapshot()["GET /api/Activities"]["p95_seconds"]
+    """
+    # Latency histogram upper bounds in seconds.
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=None):
+        """ Initializes attributes.
+        :param buckets: tuple of latency upper bounds, the class' by default.
+        """
+        if buckets is not None:
+            self.buckets = tuple(buckets)
+        self.endpoints = {}
+        # Last limits reported by a rate limiter.
+        self.rate_limit = None
+        self.lock = threading.Lock()
+        pass
+
+    def _stats(self, endpoint):
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats(self.buckets)
+        return stats
+
+    def record_request(self, sample):
+        with self.lock:
+            self._stats(sample.endpoint).add_request(sample)
+
+    def record_decode(self, endpoint, seconds, size):
+        with self.lock:
+            self._stats(endpoint).add_decode(seconds, size)
+
+    def record_rate_limit(self, limits):
+        with self.lock:
+            self.rate_limit = dict(limits)
+
+    def snapshot(self):
+        """
+        :return: dictionary of EndpointStats.to_dict per endpoint.
+        """
+        with self.lock:
+            return dict((endpoint, stats.to_dict()) for endpoint, stats in self.endpoints.items())
+
+    def reset(self):
+        """
+        Clears every measurement.
+        :return: None
+        """
+        with self.lock:
+            self.endpoints = {}
+            self.rate_limit = None
+        pass
+
+    pass
+
+
+def request_hook(sink):
+    """
+    Returns a requests response hook that measures each response and passes
+    a RequestSample to the sink, reading the body so its size and the time
+    to read it are included. Copies handed to coalesced requests aren't
+    measured, the request was sent once.
+    :param sink: MetricsSink
+    :return: function
+    """
+    def record(response, *args, **kwargs):
+        if getattr(response, "coalesced", False):
+            return
+        start = time.time()
+        size = len(response.content or b"")
+        request = response.request
+        body = getattr(request, "body", None)
+        retries = getattr(getattr(response.raw, "retries", None), "history", ())
+        sink.record_request(RequestSample(
+            response_endpoint(response),
+            request.method if request is not None else "GET",
+            request.url if request is not None else response.url,
+            response.status_code,
+            response.elapsed.total_seconds() + time.time() - start,
+            len(body) if body else 0,
+            size,
+            len(retries or ())
+        ))
+    return record
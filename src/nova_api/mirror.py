@@ -0,0 +1,236 @@
+import json
+import sqlite3
+import threading
+
+
+# noinspection SpellCheckingInspection
+class SQLiteMirror(object):
+    """Local SQLite copy of the nova catalogs, activities and project assignments,
+    indexed for reporting queries that don't need any request to the service.
+    Every table keeps the commonly queried fields as columns and the whole
+    record as json in the data column.
+    """
+    # Catalog tables as attribute name: (id column, other columns).
+    catalog_tables = {
+        "project_types": ("id", ("name",)),
+        "project_statuses": ("id", ("name",)),
+        "activity_types": ("id", ("name",)),
+        "users": ("id", ("name", "email")),
+        "accounts": ("id", ("name",)),
+        "projects": ("id", ("name", "accountId", "typeId", "statusId")),
+        "technologies": ("id", ("name",)),
+        "employee_types": ("id", ("name",)),
+    }
+    activity_columns = (
+        "activityId",
+        "employeeId",
+        "projectId",
+        "typeId",
+        "activityDate",
+        "value",
+        "billablevalue",
+        "comments",
+        "task",
+    )
+    assignment_columns = ("id", "employeeId", "projectId")
+    indexes = (
+        ("projects", "accountId"),
+        ("activities", "employeeId"),
+        ("activities", "projectId"),
+        ("activities", "typeId"),
+        ("activities", "activityDate"),
+        ("project_assignments", "employeeId"),
+        ("project_assignments", "projectId"),
+    )
+
+    def __init__(self, path=":memory:"):
+        """ Initializes attributes and creates the tables.
+        :param path: string, the database file, in memory by default.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        self.create_tables()
+        pass
+
+    def close(self):
+        """
+        Closes the database connection.
+        :return: None
+        """
+        self.connection.close()
+        pass
+
+    def create_tables(self):
+        """
+        Creates the tables and indexes that don't exist.
+        :return: None
+        """
+        statements = []
+        for table, (id_column, columns) in sorted(self.catalog_tables.items()):
+            statements.append(_create_table(table, id_column, columns))
+        statements.append(_create_table(
+            "activities", self.activity_columns[0], self.activity_columns[1:]
+        ))
+        statements.append(_create_table(
+            "project_assignments", self.assignment_columns[0], self.assignment_columns[1:]
+        ))
+        for table, column in self.indexes:
+            statements.append("CREATE INDEX IF NOT EXISTS %s_%s ON %s (%s)" % (
+                table, column, table, column
+            ))
+        with self.lock:
+            with self.connection:
+                for statement in statements:
+                    self.connection.execute(statement)
+        pass
+
+    def _replace(self, table, columns, records, where=None, where_args=()):
+        """
+        Deletes the rows matching where, all of them by default,
+        and inserts the records in a single transaction.
+        :param table: string
+        :param columns: tuple of strings, the id column first.
+        :param records: iterable of dictionaries or records.
+        :param where: string, sql condition of the rows to delete.
+        :param where_args: tuple, the condition's parameters.
+        :return: integer, number of rows inserted.
+        """
+        rows = [
+            tuple(record.get(column) for column in columns) + (json.dumps(_as_dict(record)),)
+            for record in records
+        ]
+        delete = "DELETE FROM " + table
+        if where:
+            delete += " WHERE " + where
+        insert = "INSERT OR REPLACE INTO %s (%s, data) VALUES (%s)" % (
+            table, ", ".join(columns), ", ".join("?" * (len(columns) + 1))
+        )
+        with self.lock:
+            with self.connection:
+                self.connection.execute(delete, where_args)
+                self.connection.executemany(insert, rows)
+        return len(rows)
+
+    def sync_catalogs(self, nova, names=None):
+        """
+        Copies catalogs from a NovaAPI instance, requesting the ones it hasn't loaded.
+        :param nova: NovaAPI instance.
+        :param names: list of attribute names, every catalog table by default.
+        :return: None
+        """
+        for name in names or sorted(self.catalog_tables):
+            id_column, columns = self.catalog_tables[name]
+            self._replace(name, (id_column,) + columns, nova.load(name, reload=False))
+        pass
+
+    def sync_activities(self, nova, employee_id=None):
+        """
+        Replaces an employee's activities with the ones requested page by page.
+        :param nova: NovaAPI instance.
+        :param employee_id: integer, defaults to the logged in user.
+        :return: integer, number of activities.
+        """
+        employee_id = employee_id or nova.profile_id
+        return self._replace(
+            "activities",
+            self.activity_columns,
+            nova.iter_activities(user_id=employee_id),
+            "employeeId = ?",
+            (employee_id,)
+        )
+
+    def sync_assignments(self, nova, employee_id=None):
+        """
+        Replaces an employee's project assignments.
+        :param nova: NovaAPI instance.
+        :param employee_id: integer, defaults to the logged in user.
+        :return: integer, number of assignments.
+        """
+        employee_id = employee_id or nova.profile_id
+        nova.get_project_assignments(employee_id=employee_id)
+        return self._replace(
+            "project_assignments",
+            self.assignment_columns,
+            nova.decode_response(nova.project_assignments_response),
+            "employeeId = ?",
+            (employee_id,)
+        )
+
+    def sync(self, nova, employee_ids=None):
+        """
+        Copies the catalogs, and the activities and assignments of the given employees.
+        :param nova: NovaAPI instance.
+        :param employee_ids: list of integers, defaults to the logged in user.
+        :return: None
+        """
+        self.sync_catalogs(nova)
+        for employee_id in employee_ids or [nova.profile_id]:
+            self.sync_activities(nova, employee_id)
+            self.sync_assignments(nova, employee_id)
+        pass
+
+    def query(self, sql, parameters=()):
+        """
+        Runs a query on the mirror.
+        :param sql: string
+        :param parameters: tuple or dictionary.
+        :return: list of sqlite3.Row, accessible by column name.
+        """
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def hours_per_account_per_week(self, employee_ids=None, start=None, end=None):
+        """
+        Sums the hours of the activities per account and week, weeks start on monday.
+        :param employee_ids: list of integers, all the mirrored employees by default.
+        :param start: string, first activity date included, YYYY-MM-DD.
+        :param end: string, last activity date included, YYYY-MM-DD.
+        :return: list of rows with the accountId, account, week and hours columns.
+        """
+        conditions = []
+        parameters = []
+        if employee_ids:
+            conditions.append(
+                "activities.employeeId IN (%s)" % ", ".join("?" * len(employee_ids))
+            )
+            parameters.extend(employee_ids)
+        if start:
+            conditions.append("date(activities.activityDate) >= ?")
+            parameters.append(start)
+        if end:
+            conditions.append("date(activities.activityDate) <= ?")
+            parameters.append(end)
+        return self.query(
+            "SELECT accounts.id AS accountId, accounts.name AS account,"
+            " date(activities.activityDate, '-6 days', 'weekday 1') AS week,"
+            " SUM(activities.value) AS hours"
+            " FROM activities"
+            " JOIN projects ON projects.id = activities.projectId"
+            " JOIN accounts ON accounts.id = projects.accountId" +
+            (" WHERE " + " AND ".join(conditions) if conditions else "") +
+            " GROUP BY accounts.id, week ORDER BY week, accounts.name",
+            tuple(parameters)
+        )
+
+    pass
+
+
+def _create_table(table, id_column, columns):
+    """
+    :return: string, the statement creating a mirror table.
+    """
+    return "CREATE TABLE IF NOT EXISTS %s (%s PRIMARY KEY, %s, data TEXT)" % (
+        table, id_column, ", ".join(columns)
+    )
+
+
+def _as_dict(record):
+    """
+    :param record: dictionary or Record.
+    :return: dictionary
+    """
+    if isinstance(record, dict):
+        return record
+    return record.to_dict()
@@ -30,3 +30,23 @@ class AttributeIsNotResponseType(Exception):
     attribute against requests.models.Response
     """
     pass
+
+
+class AttributeNotSet(Exception):
+    """
+    Raised when using an attribute set by build_info before it was set.
+    """
+    pass
+
+
+class BuildInfoFailed(Exception):
+    """
+    Raised when one or more requests made by a concurrent build_info fail.
+    The errors attribute maps each failed attribute name to its exception.
+    """
+    def __init__(self, errors):
+        super(BuildInfoFailed, self).__init__(
+            "build_info failed for: " + ", ".join(sorted(errors))
+        )
+        self.errors = errors
+    pass
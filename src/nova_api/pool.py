@@ -0,0 +1,221 @@
+import threading
+import time
+from collections import OrderedDict
+from .api import NovaAPI
+from .transport import SharedTransportConfig
+
+
+class CatalogStore(object):
+    """Read-only catalogs shared by several NovaAPI instances.
+    Each catalog is requested once by whichever instance reads it first
+    and the same parsed value, along with its index, is used by all of them.
+    """
+    # Attributes that are the same for every user.
+    names = (
+        "project_types",
+        "project_statuses",
+        "activity_types",
+        "users",
+        "accounts",
+        "projects",
+        "technologies",
+        "employee_types",
+        "org_structures",
+    )
+
+    def __init__(self):
+        """ Initializes attributes.
+        """
+        self.values = {}
+        # CatalogIndex per attribute name, along with the value it was built from.
+        self.indexes = {}
+        self._locks = dict((name, threading.Lock()) for name in self.names)
+        pass
+
+    def __contains__(self, name):
+        return name in self._locks
+
+    def get(self, name):
+        """
+        :param name: string, the attribute name.
+        :return: the shared value or None if not loaded.
+        """
+        return self.values.get(name)
+
+    def set(self, name, value):
+        """
+        Replaces the shared value of an attribute.
+        :param name: string, the attribute name.
+        :param value: the parsed value.
+        :return: None
+        """
+        self.values[name] = value
+        pass
+
+    def load(self, name, fetch, reload=False):
+        """
+        Returns the shared value of an attribute, calling fetch when it isn't loaded.
+        Concurrent calls for the same attribute wait for a single fetch. When fetch
+        raises, e.g. on an error status, the shared value is left as it was.
+        :param name: string, the attribute name.
+        :param fetch: function returning the value.
+        :param reload: boolean, fetch even if the value is loaded.
+        :return: the shared value.
+        """
+        with self._locks[name]:
+            if reload or self.values.get(name) is None:
+                previous = self.values.get(name)
+                try:
+                    value = fetch()
+                except Exception:
+                    # fetch may have set the value before failing.
+                    self.values[name] = previous
+                    raise
+                self.values[name] = value
+            return self.values[name]
+
+    def invalidate(self, name=None):
+        """
+        Clears an attribute, or all of them.
+        :param name: string, the attribute name, None for all.
+        :return: None
+        """
+        names = [name] if name else list(self.names)
+        for attribute in names:
+            self.values.pop(attribute, None)
+            self.indexes.pop(attribute, None)
+        pass
+
+    pass
+
+
+class _PooledSession(object):
+    """A pooled NovaAPI instance with its last use time.
+    """
+
+    def __init__(self, nova):
+        self.nova = nova
+        self.last_used = time.time()
+        self.logged_in = False
+        # Held while logging in so a user's concurrent requests login once.
+        self.lock = threading.Lock()
+        pass
+
+    pass
+
+
+class NovaSessionPool(object):
+    """Authenticated NovaAPI instances keyed by username.
+    Every instance uses the same connection pool and the same CatalogStore,
+    their attributes are loaded lazily. The least recently used instances
+    are evicted beyond max_sessions, and after idle_timeout seconds without use.
+    """
+
+    def __init__(
+        self,
+        max_sessions=100,
+        idle_timeout=None,
+        transport=None,
+        catalog_store=None,
+        api_class=NovaAPI,
+        **api_options
+    ):
+        """ Initializes attributes.
+        :param max_sessions: integer, maximum number of pooled instances.
+        :param idle_timeout: seconds after which an unused instance is evicted, None to keep them.
+        :param transport: SharedTransportConfig used by all the instances.
+        :param catalog_store: CatalogStore used by all the instances.
+        :param api_class: NovaAPI or a subclass.
+        :param api_options: extra keyword arguments for api_class.
+        """
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.transport = transport or SharedTransportConfig()
+        self.catalog_store = catalog_store or CatalogStore()
+        self.api_class = api_class
+        self.api_options = api_options
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        pass
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, username):
+        return username in self.sessions
+
+    def get(self, username, password):
+        """
+        Returns the logged in NovaAPI instance of a user, creating it and
+        logging in when it's not pooled or was pooled with another password.
+        :param username: string
+        :param password: string
+        :return: NovaAPI instance.
+        """
+        with self.lock:
+            entry = self.sessions.pop(username, None)
+            if entry is None or entry.nova.password != password:
+                entry = _PooledSession(self.api_class(
+                    username,
+                    password,
+                    transport=self.transport,
+                    catalog_store=self.catalog_store,
+                    lazy=True,
+                    **self.api_options
+                ))
+            entry.last_used = time.time()
+            self.sessions[username] = entry
+            self._evict()
+        with entry.lock:
+            if not entry.logged_in:
+                entry.nova.login()
+                entry.logged_in = True
+        return entry.nova
+
+    def evict(self, username):
+        """
+        Removes a user's instance from the pool.
+        :param username: string
+        :return: None
+        """
+        with self.lock:
+            self.sessions.pop(username, None)
+        pass
+
+    def evict_idle(self):
+        """
+        Removes the instances unused for longer than idle_timeout.
+        :return: None
+        """
+        with self.lock:
+            self._evict()
+        pass
+
+    def clear(self):
+        """
+        Removes every instance from the pool.
+        :return: None
+        """
+        with self.lock:
+            self.sessions.clear()
+        pass
+
+    def _evict(self):
+        """
+        Removes the least recently used instances beyond max_sessions
+        and the idle ones, must be called holding the lock.
+        :return: None
+        """
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+        if self.idle_timeout is None:
+            return
+        oldest = time.time() - self.idle_timeout
+        while self.sessions:
+            username = next(iter(self.sessions))
+            if self.sessions[username].last_used >= oldest:
+                break
+            del self.sessions[username]
+        pass
+
+    pass
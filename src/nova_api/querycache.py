@@ -0,0 +1,200 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_params(params):
+    """
+    Returns a hashable form of request params in which equivalent LoopBack filters
+    are equal, whatever the order of their keys.
+    :param params: dictionary of strings, e.g. {"filter": '{"where": ...}'}.
+    :return: tuple of (key, value) pairs.
+    """
+    items = []
+    for key, value in (params or {}).items():
+        if key == "filter":
+            try:
+                value = json.dumps(json.loads(value), sort_keys=True)
+            except (TypeError, ValueError):
+                pass
+        items.append((key, value))
+    return tuple(sorted(items))
+
+
+def filter_employee(params):
+    """
+    Returns the employee a request's filter is restricted to.
+    :param params: dictionary of strings.
+    :return: string, the employee id, None if the filter may match several employees.
+    """
+    try:
+        where = json.loads((params or {}).get("filter") or "{}").get("where") or {}
+    except (AttributeError, TypeError, ValueError):
+        return None
+    employee_id = where.get("employeeId")
+    if employee_id is None or isinstance(employee_id, (dict, list)):
+        return None
+    return str(employee_id)
+
+
+class QueryCache(object):
+    """Bounded in-memory cache of the activity and project assignment responses,
+    passed to NovaAPI as query_cache. Entries are keyed by the endpoint, the
+    employee and the normalized filter, the least recently used ones are evicted
+    beyond max_entries and entries older than ttl seconds are requested again.
+    The instance's activity writes remove the entries of the employee they
+    touch, and the entries whose filter isn't restricted to one employee.
+    """
+    max_entries = 256
+    ttl = 60.0
+
+    def __init__(self, max_entries=None, ttl=None):
+        """ Initializes attributes.
+        :param max_entries: integer, the class' by default.
+        :param ttl: seconds an entry is served, None to keep them until evicted.
+        """
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if ttl is not None:
+            self.ttl = ttl
+        self.entries = OrderedDict()
+        # Employee of each activity id seen, to invalidate after deletes.
+        self.owners = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        # Incremented by every invalidation, responses requested before one aren't stored.
+        self.version = 0
+        self.lock = threading.Lock()
+        pass
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(url, params):
+        """
+        :param url: string, the endpoint.
+        :param params: dictionary, the request params.
+        :return: tuple, the endpoint, the employee and the normalized params.
+        """
+        return url, filter_employee(params), normalize_params(params)
+
+    def get(self, key):
+        """
+        Returns the cached response for a key, marking it as recently used.
+        :param key: tuple, see key.
+        :return: requests.models.Response or None if missing or expired.
+        """
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None and self.ttl is not None and time.time() - entry[0] >= self.ttl:
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, response, version=None):
+        """
+        Stores a response, evicting the least recently used entries beyond max_entries.
+        :param key: tuple, see key.
+        :param response: requests.models.Response
+        :param version: the cache's version when the request was sent, the response
+         isn't stored if an invalidation happened since.
+        :return: None
+        """
+        with self.lock:
+            if version is not None and version != self.version:
+                return
+            self.entries.pop(key, None)
+            self.entries[key] = (time.time(), response)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        pass
+
+    def remember_owners(self, activities):
+        """
+        Records the employee of each activity.
+        :param activities: list of dictionaries with activityId and employeeId.
+        :return: None
+        """
+        with self.lock:
+            for activity in activities:
+                if not isinstance(activity, dict) or "employeeId" not in activity:
+                    continue
+                if "activityId" in activity:
+                    self.owners[activity["activityId"]] = str(activity["employeeId"])
+        pass
+
+    def owner(self, activity_id):
+        """
+        :param activity_id: the activity id.
+        :return: string, the id of the activity's employee, None if it wasn't seen.
+        """
+        with self.lock:
+            return self.owners.get(activity_id)
+
+    def invalidate(self, url=None, employee_id=None):
+        """
+        Removes the entries of an endpoint for an employee, along with the ones
+        not restricted to one employee.
+        :param url: string, the endpoint, None for all of them.
+        :param employee_id: the employee id, None for every employee.
+        :return: integer, the number of entries removed.
+        """
+        if employee_id is not None:
+            employee_id = str(employee_id)
+        with self.lock:
+            keys = [
+                key for key in self.entries
+                if (url is None or key[0] == url) and
+                (employee_id is None or key[1] is None or key[1] == employee_id)
+            ]
+            for key in keys:
+                del self.entries[key]
+            self.invalidations += len(keys)
+            self.version += 1
+        return len(keys)
+
+    def clear(self):
+        """
+        Removes every entry, the statistics are kept.
+        :return: None
+        """
+        with self.lock:
+            self.entries.clear()
+            self.owners.clear()
+            self.version += 1
+        pass
+
+    def stats(self):
+        """
+        :return: dictionary with the counters, the number of entries and the hit ratio.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": float(self.hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+            }
+
+    def __repr__(self):
+        return "<QueryCache %d/%d entries, %d hits, %d misses>" % (
+            len(self.entries), self.max_entries, self.hits, self.misses
+        )
+
+    pass
@@ -0,0 +1,189 @@
+import threading
+import time
+
+
+class AdaptiveRateLimiter(object):
+    """Token bucket and concurrency limit for the requests sent by NovaAPI sessions,
+    adjusted with additive increase / multiplicative decrease (AIMD): every
+    response received in time raises the rate by about `increase` requests per
+    second each second and the concurrency by one per window of requests,
+    or by one per response until the first pressure signal (slow start), a
+    pressure signal (a pressure_status_codes response, a connection error,
+    a timeout or a response slower than latency_target) multiplies both by
+    `decrease`, at most once per cooldown. Retry-After headers pause the requests.
+    Pass it to TransportConfig as rate_limiter, every adapter built from the
+    config shares it. The class attributes are the defaults, any of them can
+    be given as a keyword argument.
+    """
+    # Requests per second and burst size of the token bucket.
+    rate = 10.0
+    min_rate = 0.5
+    max_rate = 500.0
+    burst = 10
+    # Requests sent at the same time.
+    concurrency = 4
+    min_concurrency = 1
+    max_concurrency = 64
+    # Requests per second added each second without pressure.
+    increase = 1.0
+    # Grow by one per response until the first pressure signal, roughly doubling each second.
+    slow_start = True
+    # Factor applied to the rate and concurrency under pressure.
+    decrease = 0.5
+    # Seconds after a decrease during which pressure signals don't decrease again.
+    cooldown = 1.0
+    # Responses slower than this many seconds are a pressure signal, None to ignore latency.
+    latency_target = 5.0
+    pressure_status_codes = (429, 502, 503, 504)
+    # Methods limited, None for all of them; writes by default.
+    methods = ("POST", "PUT", "PATCH", "DELETE")
+
+    def __init__(self, metrics=None, **options):
+        """ Initializes attributes.
+        :param metrics: MetricsSink receiving the limits each time they change, optional.
+        :param options: values overriding the class attributes.
+        :raises TypeError: for unknown options.
+        """
+        for name, value in options.items():
+            if name.startswith("_") or not hasattr(type(self), name):
+                raise TypeError("Unknown rate limiter option: " + name)
+            setattr(self, name, value)
+        self.metrics = metrics
+        self.rate = float(self.rate)
+        self.concurrency = float(self.concurrency)
+        self.tokens = float(self.burst)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.last_refill = time.time()
+        self.last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.throttled = 0
+        self.waited_seconds = 0.0
+        self.condition = threading.Condition(threading.Lock())
+        pass
+
+    def applies(self, method):
+        """
+        :param method: string, http method.
+        :return: boolean, True if requests with the method are limited.
+        """
+        return self.methods is None or method.upper() in self.methods
+
+    def _refill(self, now):
+        self.tokens = min(float(self.burst), self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self):
+        """
+        Blocks until a request can be sent and takes its token and concurrency slot,
+        release must be called once the request finishes.
+        :return: float, seconds waited.
+        """
+        start = time.time()
+        with self.condition:
+            while True:
+                now = time.time()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.in_flight >= int(self.concurrency):
+                    # Woken up by release.
+                    wait = None
+                elif self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    break
+                self.condition.wait(wait)
+            self.tokens -= 1
+            self.in_flight += 1
+            waited = time.time() - start
+            if waited > 0.001:
+                self.throttled += 1
+                self.waited_seconds += waited
+        return waited
+
+    def release(self, status_code=None, seconds=None, error=False, retry_after=None):
+        """
+        Frees a request's concurrency slot and adjusts the limits with its outcome.
+        :param status_code: integer, the response status, None if there was no response.
+        :param seconds: float, time to receive the response.
+        :param error: boolean, True for connection errors and timeouts.
+        :param retry_after: seconds the server asked to wait, optional.
+        :return: None
+        """
+        now = time.time()
+        with self.condition:
+            self.in_flight -= 1
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            pressure = (
+                error or
+                status_code in self.pressure_status_codes or
+                (self.latency_target is not None and seconds is not None and
+                 seconds > self.latency_target)
+            )
+            changed = False
+            if pressure:
+                if now - self.last_decrease >= self.cooldown:
+                    self._refill(now)
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self.concurrency = max(
+                        float(self.min_concurrency), self.concurrency * self.decrease
+                    )
+                    self.tokens = min(self.tokens, 1.0)
+                    self.last_decrease = now
+                    self.decreases += 1
+                    changed = True
+            elif status_code is not None:
+                self._refill(now)
+                if self.slow_start and not self.decreases:
+                    rate_step, concurrency_step = 1.0, 1.0
+                else:
+                    # About increase per second at the current rate, and one slot per window.
+                    rate_step, concurrency_step = self.increase / self.rate, 1 / self.concurrency
+                rate = min(self.max_rate, self.rate + rate_step)
+                concurrency = min(float(self.max_concurrency), self.concurrency + concurrency_step)
+                changed = int(concurrency) != int(self.concurrency)
+                self.rate, self.concurrency = rate, concurrency
+                self.increases += 1
+            self.condition.notify_all()
+        if changed and self.metrics is not None:
+            self.metrics.record_rate_limit(self.snapshot())
+        pass
+
+    def snapshot(self):
+        """
+        :return: dictionary with the current limits and counters.
+        """
+        with self.condition:
+            return {
+                "rate": self.rate,
+                "concurrency": int(self.concurrency),
+                "in_flight": self.in_flight,
+                "tokens": self.tokens,
+                "paused_seconds": max(0.0, self.paused_until - time.time()),
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "throttled": self.throttled,
+                "waited_seconds": self.waited_seconds,
+            }
+
+    def __repr__(self):
+        return "<AdaptiveRateLimiter rate=%.2f concurrency=%d in_flight=%d>" % (
+            self.rate, int(self.concurrency), self.in_flight
+        )
+
+    pass
+
+
+def retry_after_seconds(response):
+    """
+    :param response: requests.models.Response
+    :return: float, the seconds of the response's Retry-After header, None if absent or a date.
+    """
+    value = response.headers.get("Retry-After")
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
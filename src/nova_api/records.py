@@ -0,0 +1,114 @@
+class Record(object):
+    """Compact read-only view of a json object, holding only the fields
+    listed in the subclass __slots__. Supports dictionary style access
+    so records can be used where the parsed dictionaries were.
+    """
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        """ Initializes every slot with the given value or None.
+        """
+        for field in self.__slots__:
+            setattr(self, field, fields.get(field))
+        pass
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Builds a record from a parsed json object, fields not in __slots__ are dropped.
+        :param data: dictionary
+        :return: Record
+        """
+        record = cls.__new__(cls)
+        for field in cls.__slots__:
+            setattr(record, field, data.get(field))
+        return record
+
+    @classmethod
+    def from_json_list(cls, data):
+        """
+        Builds a list of records from a parsed json array.
+        :param data: list of dictionaries.
+        :return: list of records.
+        """
+        return [cls.from_json(item) for item in data]
+
+    def get(self, field, default=None):
+        value = getattr(self, field, None) if field in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, field):
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __contains__(self, field):
+        return field in self.__slots__
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def to_dict(self):
+        """
+        :return: dictionary with the record's fields.
+        """
+        return dict((field, getattr(self, field)) for field in self.__slots__)
+
+    def __repr__(self):
+        return "%s(%s)" % (
+            type(self).__name__,
+            ", ".join("%s=%r" % (field, getattr(self, field)) for field in self.__slots__)
+        )
+
+    pass
+
+
+class NamedRecord(Record):
+    """Catalog entry such as an account, project type or technology.
+    """
+    __slots__ = ("id", "name")
+    pass
+
+
+class User(Record):
+    """Employee from the users catalog.
+    """
+    __slots__ = ("id", "name", "email", "username", "firstName", "lastName", "employeeTypeId")
+    pass
+
+
+class Project(Record):
+    """Project from the projects catalog.
+    """
+    __slots__ = ("id", "name", "accountId", "typeId", "statusId")
+    pass
+
+
+# noinspection SpellCheckingInspection
+class Activity(Record):
+    """Hours entry of an employee.
+    """
+    __slots__ = (
+        "activityId",
+        "activityDate",
+        "employeeId",
+        "projectId",
+        "typeId",
+        "value",
+        "billablevalue",
+        "comments",
+        "task",
+    )
+    pass
+
+
+class Assignment(Record):
+    """Project assignment of an employee.
+    """
+    __slots__ = ("id", "employeeId", "projectId")
+    pass
@@ -0,0 +1,152 @@
+import threading
+import time
+
+
+class CatalogRefresher(object):
+    """Reloads a NovaAPI instance's catalogs from a background thread, each one
+    every its own interval (stale-while-revalidate). A catalog is requested
+    with the instance's fetch method, its index is built and both replace the
+    old ones at once with replace_attribute, so readers keep using the current
+    snapshot while a refresh runs and never wait for a request. A failed
+    refresh keeps the old snapshot and is tried again after retry_interval.
+    Catalogs not loaded yet are requested right after start.
+    """
+    # Seconds between refreshes of the catalogs missing from intervals.
+    default_interval = 15 * 60
+    # Seconds between refreshes, by attribute name.
+    default_intervals = {
+        "project_types": 24 * 60 * 60,
+        "project_statuses": 24 * 60 * 60,
+        "activity_types": 24 * 60 * 60,
+        "technologies": 24 * 60 * 60,
+        "employee_types": 24 * 60 * 60,
+        "org_structures": 24 * 60 * 60,
+    }
+    # Seconds before a failed refresh is tried again.
+    retry_interval = 60.0
+
+    def __init__(self, nova, names=None, intervals=None):
+        """ Initializes attributes.
+        :param nova: logged in NovaAPI instance whose catalogs are refreshed.
+        :param names: iterable of the attribute names refreshed, every catalog by default.
+        :param intervals: dictionary, attribute name: seconds, overrides default_intervals.
+        :raises ValueError: for names that aren't catalogs.
+        """
+        self.nova = nova
+        self.names = tuple(names or sorted(nova.catalog_urls))
+        for name in self.names:
+            if name not in nova.catalog_urls:
+                raise ValueError("Unknown catalog: " + name)
+        self.intervals = dict(self.default_intervals)
+        if intervals:
+            self.intervals.update(intervals)
+        # Time of the next refresh of each catalog.
+        self.due = dict((name, 0.0) for name in self.names)
+        # Time of the last successful refresh of each catalog.
+        self.refreshed_at = {}
+        # Exception raised by the last refresh of each catalog, None after a success.
+        self.errors = {}
+        self.refreshes = 0
+        self.failures = 0
+        self.thread = None
+        self.stopping = threading.Event()
+        self.wake = threading.Event()
+        pass
+
+    def interval(self, name):
+        """
+        :param name: string, the attribute name.
+        :return: float, seconds between the catalog's refreshes.
+        """
+        return self.intervals.get(name, self.default_interval)
+
+    def refresh(self, name):
+        """
+        Requests a catalog and replaces the instance's snapshot with it,
+        the old one is kept when the request fails.
+        :param name: string, the attribute name.
+        :return: boolean, True if the catalog was replaced.
+        """
+        try:
+            value = self.nova.fetch(name)
+            self.nova.replace_attribute(name, value)
+        except Exception as error:
+            self.errors[name] = error
+            self.failures += 1
+            self.due[name] = time.time() + min(self.retry_interval, self.interval(name))
+            return False
+        now = time.time()
+        self.errors[name] = None
+        self.refreshed_at[name] = now
+        self.refreshes += 1
+        self.due[name] = now + self.interval(name)
+        return True
+
+    def refresh_due(self):
+        """
+        Refreshes the catalogs whose interval elapsed.
+        :return: float, seconds until the next catalog is due.
+        """
+        now = time.time()
+        for name in self.names:
+            if self.stopping.is_set():
+                break
+            if self.due[name] <= now:
+                self.refresh(name)
+        return max(0.0, min(self.due.values()) - time.time())
+
+    def age(self, name):
+        """
+        :param name: string, the attribute name.
+        :return: float, seconds since the catalog was last refreshed, None if it never was.
+        """
+        refreshed_at = self.refreshed_at.get(name)
+        if refreshed_at is None:
+            return None
+        return time.time() - refreshed_at
+
+    def start(self):
+        """
+        Starts refreshing from a background thread, the catalogs already
+        loaded are first refreshed after their interval.
+        :return: None
+        """
+        if self.thread is not None:
+            return
+        now = time.time()
+        for name in self.names:
+            if self.nova.is_loaded(name) and not self.due[name]:
+                self.due[name] = now + self.interval(name)
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+        pass
+
+    def stop(self):
+        """
+        Stops the background thread, waiting for a running refresh.
+        :return: None
+        """
+        if self.thread is not None:
+            self.stopping.set()
+            self.wake.set()
+            self.thread.join()
+            self.thread = None
+        pass
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        while not self.stopping.is_set():
+            wait = self.refresh_due()
+            self.wake.wait(wait)
+            self.wake.clear()
+        pass
+
+    pass
@@ -0,0 +1,552 @@
+import json
+import random
+import threading
+import time
+import uuid
+from .api import NovaAPI
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+
+class StubData(object):
+    """Synthetic records served by a NovaStubServer.
+    Every employee can login as user<id> with the same password.
+    """
+    # Catalog paths with the names given to their records.
+    catalog_names = {
+        "/api/ProjectTypes": "Project type",
+        "/api/ProjectStatuses": "Project status",
+        "/api/activityTypes": "Activity type",
+        "/api/employeeTypes": "Employee type",
+        "/api/OrgStructures": "Org structure",
+        "/api/Technologies": "Technology",
+        "/api/AccountStatuses": "Account status",
+    }
+
+    def __init__(
+        self,
+        users=20,
+        accounts=10,
+        projects=50,
+        activities=200,
+        assignments=5,
+        catalog_size=10,
+        password="password",
+        seed=0
+    ):
+        """ Initializes attributes and builds the records.
+        :param users: integer, number of employees.
+        :param accounts: integer
+        :param projects: integer
+        :param activities: integer, number of activities of each employee.
+        :param assignments: integer, number of projects assigned to each employee.
+        :param catalog_size: integer, records in each of the other catalogs.
+        :param password: string, the password of every employee.
+        :param seed: the random seed, the same seed builds the same records.
+        """
+        rand = random.Random(seed)
+        self.password = password
+        self.lock = threading.Lock()
+        self.catalogs = dict(
+            (path, [{"id": i, "name": "%s %d" % (name, i)} for i in range(1, catalog_size + 1)])
+            for path, name in self.catalog_names.items()
+        )
+        self.users = [
+            {
+                "id": i,
+                "name": "User %d" % i,
+                "email": "user%d@example.com" % i,
+                "username": "user%d" % i,
+                "typeId": rand.randint(1, catalog_size),
+            }
+            for i in range(1, users + 1)
+        ]
+        self.accounts = [
+            {"id": i, "name": "Account %d" % i, "statusId": rand.randint(1, catalog_size)}
+            for i in range(1, accounts + 1)
+        ]
+        self.projects = [
+            {
+                "id": i,
+                "name": "Project %d" % i,
+                "accountId": rand.randint(1, accounts),
+                "typeId": rand.randint(1, catalog_size),
+                "statusId": rand.randint(1, catalog_size),
+            }
+            for i in range(1, projects + 1)
+        ]
+        self.assignments = []
+        self.activities = {}
+        for user in self.users:
+            for project_id in rand.sample(range(1, projects + 1), min(assignments, projects)):
+                self.assignments.append({
+                    "id": len(self.assignments) + 1,
+                    "employeeId": user["id"],
+                    "projectId": project_id,
+                })
+        for i in range(activities * users):
+            activity_id = i + 1
+            self.activities[activity_id] = {
+                "activityId": activity_id,
+                "activityDate": "2016-%02d-%02dT00:00:00Z" % (i % 12 + 1, i % 28 + 1),
+                "employeeId": i % users + 1,
+                "projectId": rand.randint(1, projects),
+                "typeId": rand.randint(1, catalog_size),
+                "value": 8,
+                "billablevalue": 8,
+                "comments": "Activity %d" % activity_id,
+                "task": "",
+                "stepId": 1,
+            }
+        self.next_activity_id = len(self.activities) + 1
+        pass
+
+    def employee(self, username, password):
+        """
+        :return: the user dictionary matching the credentials or None.
+        """
+        if password != self.password:
+            return None
+        for user in self.users:
+            if username in (user["username"], user["email"]):
+                return user
+        return None
+
+    def records(self, path):
+        """
+        :param path: string, the endpoint path.
+        :return: list of dictionaries or None for unknown paths.
+        """
+        if path in self.catalogs:
+            return self.catalogs[path]
+        return {
+            "/api/employees": self.users,
+            "/api/Accounts": self.accounts,
+            "/api/Projects": self.projects,
+            "/api/ProjectAssignments": self.assignments,
+            "/api/Activities": list(self.activities.values()),
+        }.get(path)
+
+    def create_activity(self, fields):
+        """
+        Stores a new activity.
+        :param fields: dictionary
+        :return: dictionary, the stored activity.
+        """
+        with self.lock:
+            activity = dict(fields, activityId=self.next_activity_id)
+            self.activities[activity["activityId"]] = activity
+            self.next_activity_id += 1
+        return activity
+
+    def update_activity(self, activity_id, fields):
+        """
+        Changes the given fields of an activity.
+        :return: dictionary, the stored activity or None if it doesn't exist.
+        """
+        with self.lock:
+            activity = self.activities.get(activity_id)
+            if activity is not None:
+                activity.update(fields)
+                activity["activityId"] = activity_id
+        return activity
+
+    def delete_activity(self, activity_id):
+        """
+        :return: integer, number of activities deleted.
+        """
+        with self.lock:
+            return 1 if self.activities.pop(activity_id, None) is not None else 0
+
+    pass
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Answers the requests of a NovaStubServer, available as self.server.stub.
+    """
+    protocol_version = "HTTP/1.1"
+    # The headers and the body are written separately, don't delay the body.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.stub.handle(self, "GET")
+
+    def do_POST(self):
+        self.server.stub.handle(self, "POST")
+
+    def do_PUT(self):
+        self.server.stub.handle(self, "PUT")
+
+    def do_DELETE(self):
+        self.server.stub.handle(self, "DELETE")
+
+    pass
+
+
+class NovaStubServer(object):
+    """In-process http server implementing the nova login redirects,
+    the catalog endpoints and the activities CRUD over StubData, to run
+    NovaAPI offline:
+        with NovaStubServer() as server:
+            nova = server.api("user1", "password")
+            nova.login()
+    """
+
+    def __init__(self, data=None, host="127.0.0.1", port=0, latency=0, capacity=None):
+        """ Initializes attributes.
+        :param data: StubData, a default one is built when not given.
+        :param host: string
+        :param port: integer, 0 for any free port.
+        :param latency: seconds waited before answering each request.
+        :param capacity: integer, requests handled at the same time,
+         the ones beyond it are answered 503, None for no limit.
+        """
+        self.data = data or StubData()
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.capacity = capacity
+        self.in_flight = 0
+        # Requests answered 503 for being beyond the capacity.
+        self.overloaded = 0
+        # Employee ids per login session cookie and per access token.
+        self.sessions = {}
+        self.tokens = {}
+        # Serialized GET bodies, cleared on every write.
+        self.bodies = {}
+        self.requests = 0
+        # Successful logins.
+        self.logins = 0
+        # Error statuses answered to the next requests of a path, see fail.
+        self.failures = {}
+        self.lock = threading.Lock()
+        self.httpd = None
+        self.thread = None
+        pass
+
+    @property
+    def base_url(self):
+        """
+        :return: string, the server's url without a trailing slash.
+        """
+        return "http://%s:%d" % (self.host, self.port)
+
+    def start(self):
+        """
+        Starts serving on a background thread.
+        :return: NovaStubServer, self.
+        """
+        self.httpd = _ThreadingHTTPServer((self.host, self.port), _StubHandler)
+        self.httpd.stub = self
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving and closes the socket.
+        :return: None
+        """
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+        pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def urls(self, api_class=NovaAPI):
+        """
+        :param api_class: NovaAPI, AsyncNovaAPI or a subclass.
+        :return: dictionary, every *_url attribute of api_class pointed to this server.
+        """
+        urls = {}
+        for name in dir(api_class):
+            if name.endswith("_url") and isinstance(getattr(api_class, name), str):
+                url = urlparse(getattr(api_class, name))
+                urls[name] = self.base_url + url.path + ("#" + url.fragment if url.fragment else "")
+        return urls
+
+    def api_class(self, base=NovaAPI):
+        """
+        :param base: NovaAPI, AsyncNovaAPI or a subclass.
+        :return: subclass of base sending its requests to this server.
+        """
+        return type("Stub" + base.__name__, (base,), self.urls(base))
+
+    def api(self, username="user1", password=None, base=NovaAPI, **options):
+        """
+        :param username: string, user<id> of an employee.
+        :param password: string, the StubData's password by default.
+        :param base: NovaAPI, AsyncNovaAPI or a subclass.
+        :param options: extra keyword arguments for the class.
+        :return: an instance of api_class(base).
+        """
+        if password is None:
+            password = self.data.password
+        return self.api_class(base)(username, password, **options)
+
+    def handle(self, handler, method):
+        """
+        Answers a request.
+        :param handler: _StubHandler
+        :param method: string, http method.
+        :return: None
+        """
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length).decode("utf-8") if length else ""
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            overloaded = self.capacity is not None and self.in_flight > self.capacity
+            if overloaded:
+                self.overloaded += 1
+            failures = self.failures.get(urlparse(handler.path).path)
+            failure = failures.pop(0) if failures else None
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if overloaded:
+                return self.send(handler, 503, b'{"error":{"statusCode":503}}')
+            if failure is not None:
+                return self.send_json(handler, failure, {"error": {"statusCode": failure}})
+            return self.answer(handler, method, body)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def answer(self, handler, method, body):
+        """
+        Answers a request within the capacity.
+        :param handler: _StubHandler
+        :param method: string, http method.
+        :param body: string, the request body.
+        :return: None
+        """
+        url = urlparse(handler.path)
+        query = dict((key, values[0]) for key, values in parse_qs(url.query).items())
+        form = dict(
+            (key, values[0]) for key, values in parse_qs(body, keep_blank_values=True).items()
+        )
+        if url.path == "/login" and method == "POST":
+            return self.login(handler, form)
+        if url.path == "/authorization" and method == "POST":
+            return self.authorize(handler)
+        if url.path in ("/", "/login", "/authorization"):
+            return self.send(handler, 200, b"<html></html>", "text/html")
+        authorization = handler.headers.get("Authorization") or ""
+        employee_id = self.tokens.get(authorization[len("bearer "):])
+        if employee_id is None:
+            return self.send_json(handler, 401, {"error": {"statusCode": 401}})
+        if url.path == "/api/employees/profile":
+            profile = self.data.users[employee_id - 1]
+            return self.send_json(handler, 200, dict(profile, contract={"employeeId": employee_id}))
+        if url.path.startswith("/api/Activities/"):
+            return self.activity(handler, method, int(url.path.split("/")[-1]), form)
+        if url.path == "/api/Activities" and method == "POST":
+            return self.send_json(handler, 200, self.data.create_activity(_form_values(form)))
+        if method != "GET":
+            return self.send_json(handler, 404, {"error": {"statusCode": 404}})
+        key = handler.path
+        content = self.bodies.get(key)
+        if content is None:
+            records = self.data.records(url.path)
+            if records is None:
+                return self.send_json(handler, 404, {"error": {"statusCode": 404}})
+            if "filter" in query:
+                records = apply_filter(records, json.loads(query["filter"]))
+            content = json.dumps(records).encode("utf-8")
+            self.bodies[key] = content
+        return self.send(handler, 200, content)
+
+    def login(self, handler, form):
+        """
+        Redirects to the authorization page with a session cookie, or back
+        to the login page when the credentials are wrong.
+        :return: None
+        """
+        user = self.data.employee(form.get("username"), form.get("password"))
+        if user is None:
+            return self.send(handler, 302, location=self.base_url + "/login?error=1")
+        session = uuid.uuid4().hex
+        with self.lock:
+            self.sessions[session] = user["id"]
+            self.logins += 1
+        return self.send(
+            handler, 302,
+            location=self.base_url + "/authorization",
+            cookie="stub_session=%s; Path=/" % session
+        )
+
+    def fail(self, path, status=503, times=1):
+        """
+        Answers the next requests to a path with an error status.
+        :param path: string, e.g. "/api/Projects".
+        :param status: integer, the status code.
+        :param times: integer, number of requests failed.
+        :return: None
+        """
+        with self.lock:
+            self.failures.setdefault(path, []).extend([status] * times)
+        pass
+
+    def expire_tokens(self):
+        """
+        Revokes every access token, the following requests get 401 until a new login.
+        :return: None
+        """
+        with self.lock:
+            self.tokens.clear()
+        pass
+
+    def authorize(self, handler):
+        """
+        Redirects to the authorized page with a new access token of the session's employee.
+        :return: None
+        """
+        cookies = dict(
+            part.strip().split("=", 1)
+            for part in (handler.headers.get("Cookie") or "").split(";") if "=" in part
+        )
+        employee_id = self.sessions.get(cookies.get("stub_session"))
+        if employee_id is None:
+            return self.send(handler, 302, location=self.base_url + "/login?error=1")
+        token = uuid.uuid4().hex
+        self.tokens[token] = employee_id
+        return self.send(
+            handler, 302,
+            location=self.base_url + "/#/authorized/?access_token=%s&token_type=bearer" % token
+        )
+
+    def activity(self, handler, method, activity_id, form):
+        """
+        Answers the GET, PUT and DELETE requests of a single activity.
+        :return: None
+        """
+        if method == "DELETE":
+            count = self.data.delete_activity(activity_id)
+            return self.send_json(handler, 200, {"count": count})
+        if method == "PUT":
+            activity = self.data.update_activity(activity_id, _form_values(form))
+        else:
+            activity = self.data.activities.get(activity_id)
+        if activity is None:
+            return self.send_json(handler, 404, {"error": {"statusCode": 404}})
+        return self.send_json(handler, 200, activity)
+
+    def send_json(self, handler, status, value):
+        """
+        Sends a json body, writes clear the serialized GET bodies.
+        :return: None
+        """
+        if handler.command != "GET":
+            self.bodies.clear()
+        return self.send(handler, status, json.dumps(value).encode("utf-8"))
+
+    @staticmethod
+    def send(handler, status, content=b"", content_type="application/json",
+             location=None, cookie=None):
+        """
+        Sends a response with the given body and headers.
+        :return: None
+        """
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(content)))
+        if location:
+            handler.send_header("Location", location)
+        if cookie:
+            handler.send_header("Set-Cookie", cookie)
+        handler.end_headers()
+        handler.wfile.write(content)
+
+    pass
+
+
+def apply_filter(records, query):
+    """
+    Applies a LoopBack filter's where (equality, gt, gte, lt, lte, between, neq and inq),
+    order, skip, limit and fields to a list of records.
+    :param records: list of dictionaries.
+    :param query: dictionary, the parsed filter.
+    :return: list of dictionaries.
+    """
+    for field, condition in (query.get("where") or {}).items():
+        records = [record for record in records if _matches(record.get(field), condition)]
+    order = query.get("order") or []
+    if not isinstance(order, list):
+        order = [order]
+    for clause in reversed(order):
+        parts = clause.split()
+        records = sorted(
+            records,
+            key=lambda record: record.get(parts[0]),
+            reverse=len(parts) > 1 and parts[1].upper() == "DESC"
+        )
+    skip = query.get("skip") or 0
+    limit = query.get("limit")
+    records = records[skip:skip + limit if limit else None]
+    fields = query.get("fields")
+    if fields:
+        if isinstance(fields, dict):
+            fields = [field for field, selected in fields.items() if selected]
+        records = [dict((field, record.get(field)) for field in fields) for record in records]
+    return records
+
+
+def _matches(value, condition):
+    """
+    :return: boolean, True if the value meets a where condition.
+    """
+    if not isinstance(condition, dict):
+        # Values are coerced to the field's type, e.g. {"employeeId": "7"}.
+        return value == condition or (value is not None and str(value) == str(condition))
+    operators = {
+        "gt": lambda bound: value is not None and value > bound,
+        "gte": lambda bound: value is not None and value >= bound,
+        "lt": lambda bound: value is not None and value < bound,
+        "lte": lambda bound: value is not None and value <= bound,
+        "between": lambda bounds: value is not None and bounds[0] <= value <= bounds[1],
+        "neq": lambda bound: value != bound,
+        "inq": lambda bound: value in bound,
+    }
+    return all(operators[operator](bound) for operator, bound in condition.items())
+
+
+def _form_values(form):
+    """
+    Converts the numeric values of a form encoded body.
+    :param form: dictionary of strings.
+    :return: dictionary
+    """
+    values = {}
+    for key, value in form.items():
+        for convert in (int, float):
+            try:
+                value = convert(value)
+                break
+            except ValueError:
+                pass
+        values[key] = value
+    return values
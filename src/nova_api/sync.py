@@ -0,0 +1,131 @@
+import time
+from collections import OrderedDict
+
+
+class SyncResult(object):
+    """Changes applied by an ActivitySync.sync call.
+    """
+
+    def __init__(self, full):
+        """ Initializes attributes.
+        :param full: boolean, True if every activity was requested.
+        """
+        self.full = full
+        self.added = []
+        self.updated = []
+        self.deleted = []
+        pass
+
+    @property
+    def changed(self):
+        """
+        :return: boolean, True if any activity was added, updated or deleted.
+        """
+        return bool(self.added or self.updated or self.deleted)
+
+    def __repr__(self):
+        return "<SyncResult full=%s added=%d updated=%d deleted=%d>" % (
+            self.full, len(self.added), len(self.updated), len(self.deleted)
+        )
+
+    pass
+
+
+class ActivitySync(object):
+    """Keeps a NovaAPI instance's my_activities up to date requesting only the
+    activities past a high-water mark. The mark is the largest value received of
+    mark_field: the activity id by default, which finds new activities, or a
+    modification timestamp field when the activities have one, which also finds
+    edits. Deletions, and edits when marking by id, are found by a full check
+    made every full_check_interval seconds.
+    """
+
+    def __init__(
+        self,
+        nova,
+        employee_id=None,
+        id_field="activityId",
+        mark_field="activityId",
+        full_check_interval=60 * 60,
+        page_size=None
+    ):
+        """ Initializes attributes.
+        :param nova: NovaAPI instance.
+        :param employee_id: integer, defaults to the logged in user.
+        :param id_field: string, the field identifying each activity.
+        :param mark_field: string, sortable field compared with the high-water mark.
+        :param full_check_interval: seconds between full checks, None to only run them on demand.
+        :param page_size: integer, activities per request, defaults to the NovaAPI's.
+        """
+        self.nova = nova
+        self.employee_id = employee_id
+        self.id_field = id_field
+        self.mark_field = mark_field
+        self.full_check_interval = full_check_interval
+        self.page_size = page_size
+        self.activities = OrderedDict()
+        self.high_water_mark = None
+        self.last_full_check = None
+        pass
+
+    def needs_full_check(self):
+        """
+        :return: boolean, True if there was no full check yet or the last one is too old.
+        """
+        if self.last_full_check is None:
+            return True
+        if self.full_check_interval is None:
+            return False
+        return time.time() - self.last_full_check >= self.full_check_interval
+
+    def sync(self, full=False):
+        """
+        Requests the activities past the high-water mark, or all of them
+        for a full check, merges them and assigns the nova's my_activities.
+        :param full: boolean, force a full check.
+        :return: SyncResult
+        """
+        full = full or self.needs_full_check() or self.high_water_mark is None
+        result = SyncResult(full)
+        where = None
+        if not full:
+            # Ids are unique, timestamps may be shared by activities on both sides of the mark.
+            operator = "gt" if self.mark_field == self.id_field else "gte"
+            where = {self.mark_field: {operator: self.high_water_mark}}
+        seen = set()
+        for activity in self.nova.iter_activities(
+            user_id=self.employee_id,
+            page_size=self.page_size,
+            where=where
+        ):
+            self._merge(activity, result)
+            seen.add(activity[self.id_field])
+        if full:
+            for activity_id in [key for key in self.activities if key not in seen]:
+                del self.activities[activity_id]
+                result.deleted.append(activity_id)
+            self.last_full_check = time.time()
+        if result.changed or not self.nova.is_loaded("my_activities"):
+            self.nova.my_activities = list(self.activities.values())
+        return result
+
+    def _merge(self, activity, result):
+        """
+        Adds or replaces an activity in the local collection and moves the mark.
+        :param activity: dictionary or Activity record.
+        :param result: SyncResult recording the change.
+        :return: None
+        """
+        activity_id = activity[self.id_field]
+        current = self.activities.get(activity_id)
+        if current is None:
+            result.added.append(activity_id)
+        elif current != activity:
+            result.updated.append(activity_id)
+        self.activities[activity_id] = activity
+        mark = activity.get(self.mark_field)
+        if mark is not None and (self.high_water_mark is None or mark > self.high_water_mark):
+            self.high_water_mark = mark
+        pass
+
+    pass
@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+from .cache import replace_file
+
+
+class MemoryTokenStore(object):
+    """Keeps the saved token data in memory, shared by the instances using it.
+    """
+
+    def __init__(self):
+        """ Initializes attributes.
+        """
+        self.data = None
+        pass
+
+    def load(self):
+        """
+        Returns the saved token data.
+        :return: dictionary or None.
+        """
+        return self.data
+
+    def save(self, data):
+        """
+        Saves the token data.
+        :param data: dictionary
+        :return: None
+        """
+        self.data = dict(data)
+        pass
+
+    def clear(self):
+        """
+        Removes the saved token data.
+        :return: None
+        """
+        self.data = None
+        pass
+
+    pass
+
+
+class FileTokenStore(object):
+    """Keeps the saved token data in a json file only readable by its owner.
+    """
+
+    def __init__(self, path):
+        """ Initializes attributes.
+        :param path: string, path of the json file.
+        """
+        self.path = os.path.expanduser(path)
+        pass
+
+    def load(self):
+        """
+        Reads the saved token data.
+        :return: dictionary or None if missing or unreadable.
+        """
+        try:
+            with open(self.path) as token_file:
+                return json.load(token_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def save(self, data):
+        """
+        Atomically writes the token data.
+        :param data: dictionary
+        :return: None
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        descriptor, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w") as tmp_file:
+                json.dump(data, tmp_file)
+            replace_file(tmp_path, self.path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        pass
+
+    def clear(self):
+        """
+        Removes the token file.
+        :return: None
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        pass
+
+    pass
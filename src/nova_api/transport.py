@@ -0,0 +1,377 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.packages.urllib3.exceptions import NewConnectionError
+from requests.packages.urllib3.util.retry import Retry
+from .ratelimit import retry_after_seconds
+
+
+class JitterRetry(Retry):
+    """urllib3 Retry whose exponential backoff is randomized,
+    so clients failing together don't retry together.
+    """
+
+    def __init__(self, jitter=0.0, **kwargs):
+        """ Initializes attributes.
+        :param jitter: float between 0 and 1, fraction of each backoff that is randomized,
+         1 waits anywhere between no time and the full backoff.
+        """
+        super(JitterRetry, self).__init__(**kwargs)
+        self.jitter = jitter
+        pass
+
+    def new(self, **kwargs):
+        retry = super(JitterRetry, self).new(**kwargs)
+        retry.jitter = self.jitter
+        return retry
+
+    def get_backoff_time(self):
+        backoff = super(JitterRetry, self).get_backoff_time()
+        if backoff <= 0 or not self.jitter:
+            return backoff
+        return random.uniform(backoff * (1 - self.jitter), backoff)
+
+    pass
+
+
+class _Flight(object):
+    """A call in progress and, once done, its result or exception.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        pass
+
+    pass
+
+
+class SingleFlight(object):
+    """Runs one call at a time per key: callers arriving while a call with
+    their key is in progress wait for it and get its result, or its exception,
+    instead of making their own. Calls only join a call started in the current
+    generation, advance starts a new one, e.g. around a write, so a call made
+    after the write doesn't get a result read before it.
+    """
+
+    def __init__(self):
+        """ Initializes attributes.
+        """
+        self.flights = {}
+        self.generation = 0
+        # Calls made, and calls answered with another caller's result.
+        self.calls = 0
+        self.coalesced = 0
+        self.lock = threading.Lock()
+        pass
+
+    def advance(self):
+        """
+        Starts a new generation, the calls in progress aren't joined anymore.
+        :return: None
+        """
+        with self.lock:
+            self.generation += 1
+        pass
+
+    def do(self, key, function, share=None):
+        """
+        Calls the function, or waits for the call in progress with the same key
+        started in the current generation.
+        :param key: hashable identifying equivalent calls.
+        :param function: function without arguments.
+        :param share: function receiving the result and returning what the waiting
+         callers get, e.g. a copy, by default they get the same result.
+        :return: the function's result.
+        """
+        with self.lock:
+            key = (self.generation, key)
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if share is not None:
+                return share(flight.result)
+            return flight.result
+        try:
+            flight.result = function()
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        return flight.result
+
+    pass
+
+
+def copy_response(response, request=None):
+    """
+    Copies a response sharing its read body, the parsed json isn't copied
+    so each copy parses its own.
+    :param response: requests.models.Response, with its body read.
+    :param request: requests.PreparedRequest of the copy, the response's by default.
+    :return: requests.models.Response
+    """
+    copy = Response()
+    copy._content = response.content
+    copy._content_consumed = True
+    copy.status_code = response.status_code
+    copy.headers = CaseInsensitiveDict(response.headers)
+    copy.url = response.url
+    copy.encoding = response.encoding
+    copy.reason = response.reason
+    copy.elapsed = response.elapsed
+    # Lets the session read the cookies set by the response.
+    copy.raw = response.raw
+    copy.connection = response.connection
+    copy.request = request if request is not None else response.request
+    return copy
+
+
+def coalesced_response(response, request):
+    """
+    Copies a response for a request that waited for an identical one, each
+    caller parses its own body. The copy's coalesced attribute is True so the
+    metrics record the request sent once.
+    :param response: requests.models.Response, with its body read.
+    :param request: requests.PreparedRequest that waited.
+    :return: requests.models.Response
+    """
+    copy = copy_response(response, request)
+    copy.coalesced = True
+    return copy
+
+
+def not_sent(error):
+    """
+    Tells whether an exception raised by a request means it never reached the
+    server, so sending it again can't apply it twice.
+    :param error: Exception
+    :return: boolean, True for connect timeouts and refused or unresolved connections.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError) or not error.args:
+        return False
+    return isinstance(getattr(error.args[0], "reason", error.args[0]), NewConnectionError)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter applying a default timeout to the requests sent without one,
+    and the rate limiter's limits when it has one. With a SingleFlight, identical
+    GET and HEAD requests (same url, params and headers, the Authorization
+    included) sent while one of them is in progress wait for it and receive a
+    copy of its response, read once, instead of being sent again. Any other request starts
+    a new generation of the SingleFlight before it's sent and once answered, so
+    the reads made after a write never join one made before it.
+    """
+    __attrs__ = HTTPAdapter.__attrs__ + ["timeout"]
+    # Methods whose identical concurrent requests are coalesced.
+    coalesced_methods = ("GET", "HEAD")
+
+    def __init__(self, timeout=None, rate_limiter=None, single_flight=None, **kwargs):
+        """ Initializes attributes.
+        :param timeout: float or (connect, read) tuple of seconds.
+        :param rate_limiter: AdaptiveRateLimiter, optional.
+        :param single_flight: SingleFlight coalescing the identical requests, optional.
+        """
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight
+        super(TimeoutHTTPAdapter, self).__init__(**kwargs)
+        pass
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        flight = self.single_flight
+        if flight is None:
+            return self._send(request, **kwargs)
+        if request.method not in self.coalesced_methods:
+            flight.advance()
+            try:
+                return self._send(request, **kwargs)
+            finally:
+                flight.advance()
+        if request.body is not None or kwargs.get("stream"):
+            return self._send(request, **kwargs)
+        key = (request.method, request.url, tuple(sorted(request.headers.items())))
+        return flight.do(
+            key,
+            lambda: self._send_and_read(request, **kwargs),
+            lambda response: coalesced_response(response, request)
+        )
+
+    def _send_and_read(self, request, **kwargs):
+        """
+        Sends a request and reads its body, so the response can be shared between threads.
+        :return: requests.models.Response
+        """
+        response = self._send(request, **kwargs)
+        response.content
+        return response
+
+    def _send(self, request, **kwargs):
+        limiter = self.rate_limiter
+        if limiter is None or not limiter.applies(request.method):
+            return super(TimeoutHTTPAdapter, self).send(request, **kwargs)
+        limiter.acquire()
+        start = time.time()
+        try:
+            response = super(TimeoutHTTPAdapter, self).send(request, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            limiter.release(seconds=time.time() - start, error=True)
+            raise
+        except Exception:
+            limiter.release()
+            raise
+        limiter.release(
+            response.status_code,
+            time.time() - start,
+            retry_after=retry_after_seconds(response)
+        )
+        return response
+
+    pass
+
+
+class TransportConfig(object):
+    """Connection pooling, timeouts and retries of the NovaAPI session.
+    The class attributes are the defaults, any of them can be given as a keyword argument.
+    """
+    # Hosts with a connection pool kept open, nova uses two.
+    pool_connections = 4
+    # Connections kept per host, should be at least the number of threads sharing the session.
+    pool_maxsize = 16
+    # Wait for a free connection instead of opening and discarding extra ones.
+    pool_block = True
+    # Seconds to establish a connection and to wait for the response data.
+    connect_timeout = 5.0
+    read_timeout = 60.0
+    # Retries for connection errors and retry_status_codes.
+    retries = 3
+    # Waits backoff_factor * 2 ** (retry number - 1) seconds between retries, randomized by jitter.
+    backoff_factor = 0.3
+    jitter = 0.5
+    retry_status_codes = (429, 502, 503, 504)
+    # Only idempotent methods are retried.
+    retry_methods = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+    # AdaptiveRateLimiter shared by the adapters, None to send the requests unlimited.
+    rate_limiter = None
+    # Send identical concurrent GET requests once and share the response.
+    coalesce_requests = True
+
+    def __init__(self, **options):
+        """ Initializes attributes.
+        :param options: values overriding the class attributes.
+        :raises TypeError: for unknown options.
+        """
+        for name, value in options.items():
+            if name.startswith("_") or not hasattr(type(self), name):
+                raise TypeError("Unknown transport option: " + name)
+            setattr(self, name, value)
+        pass
+
+    @property
+    def timeout(self):
+        """
+        :return: tuple, the connect and read timeouts.
+        """
+        return self.connect_timeout, self.read_timeout
+
+    def retry(self):
+        """
+        Builds the retry policy used by the adapters.
+        :return: JitterRetry
+        """
+        options = {
+            "total": self.retries,
+            "connect": self.retries,
+            "read": self.retries,
+            "status": self.retries,
+            "status_forcelist": self.retry_status_codes,
+            "backoff_factor": self.backoff_factor,
+            "raise_on_status": False,
+            "jitter": self.jitter,
+        }
+        try:
+            return JitterRetry(allowed_methods=frozenset(self.retry_methods), **options)
+        except TypeError:
+            # urllib3 < 1.26
+            return JitterRetry(method_whitelist=frozenset(self.retry_methods), **options)
+
+    def adapter(self):
+        """
+        Builds an adapter with this configuration.
+        :return: TimeoutHTTPAdapter
+        """
+        return TimeoutHTTPAdapter(
+            timeout=self.timeout,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=self.retry(),
+            rate_limiter=self.rate_limiter,
+            single_flight=SingleFlight() if self.coalesce_requests else None
+        )
+
+    def mount(self, session, adapter=None):
+        """
+        Mounts an adapter on the http and https prefixes of a session.
+        :param session: requests.Session
+        :param adapter: the adapter to mount, a new one by default.
+        :return: the session.
+        """
+        if adapter is None:
+            adapter = self.adapter()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def session(self):
+        """
+        Builds a new session with this configuration.
+        :return: requests.Session
+        """
+        return self.mount(requests.session())
+
+    pass
+
+
+class SharedTransportConfig(TransportConfig):
+    """TransportConfig whose sessions all use the same adapter,
+    so they share one connection pool per host.
+    """
+
+    def __init__(self, **options):
+        super(SharedTransportConfig, self).__init__(**options)
+        self._adapter = None
+        self._adapter_lock = threading.Lock()
+        pass
+
+    def adapter(self):
+        """
+        Returns the shared adapter, built on first use.
+        :return: TimeoutHTTPAdapter
+        """
+        with self._adapter_lock:
+            if self._adapter is None:
+                self._adapter = super(SharedTransportConfig, self).adapter()
+        return self._adapter
+
+    pass
@@ -0,0 +1,114 @@
+from collections import OrderedDict
+
+# Fields identifying an activity for upsert_activities.
+KEY_FIELDS = ("employeeId", "projectId", "typeId", "activityDate", "task")
+# Fields compared with the existing activity and edited when they differ.
+EDIT_FIELDS = ("value", "comments")
+
+
+def activity_key(activity):
+    """
+    Returns the upsert key of an activity: the employee, project, type, day and ticket.
+    Ids are compared as strings and dates by their day so the values parsed
+    from the responses match the ones built by activity_data.
+    :param activity: dictionary or Activity record.
+    :return: tuple
+    """
+    employee_id, project_id, type_id, date, task = (activity.get(field) for field in KEY_FIELDS)
+    return (
+        str(employee_id),
+        str(project_id),
+        str(type_id),
+        (date or "")[:10],
+        task or "",
+    )
+
+
+def activity_changes(current, desired):
+    """
+    Returns the edit request body with the fields of the desired activity
+    that differ from the current one.
+    :param current: dictionary or Activity record, the stored activity.
+    :param desired: dictionary, built by activity_data.
+    :return: dictionary, empty if nothing differs.
+    """
+    data = {}
+    for field in EDIT_FIELDS:
+        if current.get(field) != desired[field]:
+            data[field] = desired[field]
+    if not data:
+        return data
+    if "value" in data:
+        # noinspection SpellCheckingInspection
+        data["billablevalue"] = data["value"]
+    data["activityId"] = current["activityId"]
+    return data
+
+
+class ActivityIndex(object):
+    """Existing activities grouped by their upsert key, each one is matched at most once
+    so repeated keys in the desired activities pair with repeated stored ones.
+    """
+
+    def __init__(self, activities):
+        """ Initializes attributes.
+        :param activities: iterable of dictionaries or Activity records.
+        """
+        self.by_key = OrderedDict()
+        for activity in activities:
+            self.by_key.setdefault(activity_key(activity), []).append(activity)
+        pass
+
+    def __len__(self):
+        return sum(len(activities) for activities in self.by_key.values())
+
+    def match(self, key):
+        """
+        Removes and returns the first unmatched activity with the key.
+        :param key: tuple, see activity_key.
+        :return: dictionary or Activity record, None if there's no such activity.
+        """
+        activities = self.by_key.get(key)
+        if not activities:
+            return None
+        return activities.pop(0)
+
+    pass
+
+
+class UpsertResult(object):
+    """Outcome of NovaAPI.upsert_activities.
+    """
+
+    def __init__(self):
+        # Activities created, as returned by the server.
+        self.created = []
+        # Activities edited, as returned by the server.
+        self.updated = []
+        # Existing activities already matching their spec.
+        self.unchanged = []
+        # Tuples of the spec and the exception or error response.
+        self.failed = []
+        self.elapsed = 0.0
+        pass
+
+    @property
+    def writes(self):
+        """
+        :return: integer, activities created, edited or failed.
+        """
+        return len(self.created) + len(self.updated) + len(self.failed)
+
+    @property
+    def changed(self):
+        """
+        :return: boolean, True if any activity was created or edited.
+        """
+        return bool(self.created or self.updated)
+
+    def __repr__(self):
+        return "<UpsertResult created=%d updated=%d unchanged=%d failed=%d>" % (
+            len(self.created), len(self.updated), len(self.unchanged), len(self.failed)
+        )
+
+    pass
@@ -0,0 +1,18 @@
+import sys
+import pytest
+from nova_api.stub import NovaStubServer, StubData
+
+# The asyncio client uses python 3 only syntax.
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore.append("test_aio.py")
+
+
+@pytest.fixture
+def server():
+    """
+    NovaStubServer with 3 employees, 10 projects and 25 activities per employee.
+    """
+    stub = NovaStubServer(StubData(users=3, projects=10, activities=25)).start()
+    yield stub
+    stub.stop()
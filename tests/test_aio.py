@@ -0,0 +1,198 @@
+import asyncio
+import pytest
+from nova_api.nova_exceptions import LoginFailed
+
+web = pytest.importorskip("aiohttp.web")
+from nova_api.aio import AsyncNovaAPI  # noqa: E402
+
+TOKEN = "a" * 128
+
+
+def stub_app():
+    """
+    Builds an aiohttp application implementing the login redirects,
+    a catalog endpoint and the activities CRUD.
+    :return: aiohttp.web.Application
+    """
+    activities = {}
+
+    async def login(request):
+        data = await request.post()
+        if data.get("password") != "password":
+            raise web.HTTPFound("/login?failed=1")
+        raise web.HTTPFound("/authorization")
+
+    async def login_page(request):
+        return web.Response(text="login")
+
+    async def authorization(request):
+        if request.method == "POST":
+            raise web.HTTPFound(
+                AsyncNovaAPI.authorized_url + "?access_token=" + TOKEN + "&token_type=bearer"
+            )
+        return web.Response(text="authorization")
+
+    def authorized(handler):
+        async def wrapper(request):
+            if request.headers.get("Authorization") != "bearer " + TOKEN:
+                raise web.HTTPUnauthorized()
+            return await handler(request)
+        return wrapper
+
+    @authorized
+    async def profile(request):
+        return web.json_response({"id": 7, "email": "user"})
+
+    @authorized
+    async def catalog(request):
+        return web.json_response([{"id": 1, "name": request.path}])
+
+    @authorized
+    async def list_activities(request):
+        return web.json_response(list(activities.values()))
+
+    @authorized
+    async def create_activity(request):
+        data = dict(await request.post())
+        data["activityId"] = len(activities) + 1
+        activities[data["activityId"]] = data
+        return web.json_response(data)
+
+    @authorized
+    async def edit_activity(request):
+        activity = activities[int(request.match_info["id"])]
+        activity.update(await request.post())
+        return web.json_response(activity)
+
+    @authorized
+    async def delete_activity(request):
+        del activities[int(request.match_info["id"])]
+        return web.json_response({"count": 1})
+
+    app = web.Application()
+    app.router.add_post("/login", login)
+    app.router.add_get("/login", login_page)
+    app.router.add_route("*", "/authorization", authorization)
+    app.router.add_get("/api/employees/profile", profile)
+    app.router.add_get("/api/Activities", list_activities)
+    app.router.add_post("/api/Activities", create_activity)
+    app.router.add_put("/api/Activities/{id}", edit_activity)
+    app.router.add_delete("/api/Activities/{id}", delete_activity)
+    app.router.add_get("/api/{catalog}", catalog)
+    return app
+
+
+def run_against_stub(coroutine_function):
+    """
+    Runs the coroutine function with an AsyncNovaAPI subclass
+    pointing to a stub server listening on localhost.
+    :param coroutine_function: receives the AsyncNovaAPI subclass.
+    :return: the coroutine's result.
+    """
+    async def runner():
+        app_runner = web.AppRunner(stub_app())
+        await app_runner.setup()
+        site = web.TCPSite(app_runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        base = "http://127.0.0.1:%d" % port
+        attributes = dict(
+            (name, getattr(AsyncNovaAPI, name).replace("http://nova.cloudapp.net", base)
+             .replace("http://nova-api.itexico.com", base))
+            for name in dir(AsyncNovaAPI)
+            if name.endswith("_url") and name != "authorized_url"
+        )
+        try:
+            return await coroutine_function(type("StubNovaAPI", (AsyncNovaAPI,), attributes))
+        finally:
+            await app_runner.cleanup()
+    return asyncio.run(runner())
+
+
+class TestAsyncNovaAPI(object):
+
+    def test_login_and_build_info(self):
+        """
+        Asserts the login flow sets the token and profile, and build_info
+        sets every attribute sharing the same session.
+        :return: None
+        """
+        async def scenario(api_class):
+            async with api_class("user", "password") as nova:
+                await nova.login()
+                assert nova.access_token == TOKEN
+                assert nova.profile_id == 7
+                await nova.build_info()
+                for name, _, _ in api_class.build_info_steps:
+                    assert isinstance(getattr(nova, name), list)
+        run_against_stub(scenario)
+        pass
+
+    def test_wrong_login(self):
+        """
+        Asserts wrong credentials raise LoginFailed.
+        :return: None
+        """
+        async def scenario(api_class):
+            async with api_class("user", "wrong") as nova:
+                with pytest.raises(LoginFailed):
+                    await nova.login()
+        run_against_stub(scenario)
+        pass
+
+    def test_activities_crud(self):
+        """
+        Asserts activities can be created, edited and deleted concurrently.
+        :return: None
+        """
+        async def scenario(api_class):
+            async with api_class("user", "password") as nova:
+                await nova.login()
+                created = await asyncio.gather(
+                    *[nova.post_activity(6, 14, comments="test_%d" % i) for i in range(5)]
+                )
+                assert len(set(activity["activityId"] for activity in created)) == 5
+                edited = await nova.edit_activity(created[0]["activityId"], comments="changed")
+                assert edited["comments"] == "changed"
+                deleted = await nova.delete_activity(created[0]["activityId"])
+                assert deleted == {"count": 1}
+                assert len(await nova.get_activities()) == 4
+        run_against_stub(scenario)
+        pass
+
+    def test_identical_gets_are_coalesced(self):
+        """
+        Asserts concurrent identical GET calls send one request and get copies of its result.
+        :return: None
+        """
+        async def scenario(api_class):
+            sent = []
+
+            class CountingNovaAPI(api_class):
+                async def _send(self, method, url, **kwargs):
+                    sent.append(url)
+                    return await super(CountingNovaAPI, self)._send(method, url, **kwargs)
+
+            async with CountingNovaAPI("user", "password") as nova:
+                await nova.login()
+                del sent[:]
+                results = await asyncio.gather(
+                    *[nova.get_projects() for _ in range(5)] + [nova.get_users() for _ in range(5)]
+                )
+                assert len(sent) == 2
+                assert all(result == results[0] for result in results[:5])
+                assert all(result == results[5] for result in results[5:])
+                # Each caller gets its own parsed body.
+                assert len(set(id(result) for result in results)) == 10
+                assert nova._in_flight == {}
+                await nova.get_projects()
+                assert len(sent) == 3
+                # A GET started after a write doesn't join the one started before it.
+                await asyncio.gather(
+                    nova.get_activities(), nova.post_activity(6, 14), nova.get_activities()
+                )
+                assert len([url for url in sent if url == nova.activities_url]) == 3
+        run_against_stub(scenario)
+        pass
+
+    pass
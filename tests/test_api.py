@@ -248,6 +248,23 @@ class TestNovaAPI(object):
         assert tmp_api.profile["email"] == username
         pass
 
+    def test_build_info_concurrent(self):
+        """
+        Asserts a concurrent build_info sets every attribute
+        without reporting failures.
+        :return: None
+        """
+        tmp_api = NovaAPI()
+        tmp_api.ses.headers["Authorization"] = "bearer " + nova.access_token
+        tmp_api.get_profile()
+        tmp_api.set_profile()
+        tmp_api.set_profile_id()
+        tmp_api.build_info(concurrent=True, workers=3)
+        assert tmp_api.build_info_errors == {}
+        for name, _, _ in NovaAPI.build_info_steps:
+            assert isinstance(getattr(tmp_api, name), list)
+        pass
+
     pass
 
 
@@ -0,0 +1,130 @@
+import datetime
+import json
+import threading
+import requests
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.packages.urllib3.exceptions import NewConnectionError
+from nova_api.api import NovaAPI
+
+
+class ActivitiesAdapter(BaseAdapter):
+    """
+    Transport adapter creating activities, answers 503 the first
+    time it receives each activity with the "flaky" comment and fails
+    it with a refused connection for the "refused" comment. Activities
+    with the "slow" comment are created but answered with a read timeout,
+    the ones with the "gateway" comment with a 502.
+    """
+    def __init__(self):
+        super(ActivitiesAdapter, self).__init__()
+        self.lock = threading.Lock()
+        self.created = []
+        self.rejected = set()
+
+    def send(self, request, **kwargs):
+        data = dict(pair.split("=") for pair in request.body.split("&"))
+        response = Response()
+        response.request = request
+        response.url = request.url
+        with self.lock:
+            if data["comments"] in ("flaky", "refused") and data["task"] not in self.rejected:
+                self.rejected.add(data["task"])
+                if data["comments"] == "refused":
+                    raise requests.exceptions.ConnectionError(
+                        NewConnectionError(None, "Connection refused"), request=request
+                    )
+                response.status_code = 503
+                response._content = b"{}"
+                return response
+            data["activityId"] = len(self.created) + 1
+            self.created.append(data)
+        if data["comments"] == "slow":
+            raise requests.exceptions.ReadTimeout("Read timed out", request=request)
+        if data["comments"] == "gateway":
+            response.status_code = 502
+            response._content = b"{}"
+            return response
+        response.status_code = 200
+        response._content = json.dumps(data).encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+
+def bulk_api():
+    """
+    Returns an authenticated NovaAPI instance using an ActivitiesAdapter.
+    """
+    nova = NovaAPI()
+    nova.ses.headers["Authorization"] = "bearer token"
+    nova.profile_id = 7
+    nova.bulk_retry_backoff = 0
+    nova.adapter = ActivitiesAdapter()
+    nova.ses.mount("http://", nova.adapter)
+    return nova
+
+
+class TestPostActivities(object):
+
+    def test_results_in_input_order(self):
+        """
+        Asserts every activity is created and results keep the input order.
+        :return: None
+        """
+        nova = bulk_api()
+        specs = [
+            {"project_id": 6, "activitytype_id": 14, "ticket": str(i),
+             "date": datetime.datetime(2016, 6, 1)}
+            for i in range(20)
+        ]
+        result = nova.post_activities(specs, workers=5)
+        assert len(result.succeeded) == 20
+        assert [item.activity["task"] for item in result] == [str(i) for i in range(20)]
+        assert all(item.activity["employeeId"] == "7" for item in result)
+        assert result.throughput > 0
+        assert nova.post_activity_response is None
+        pass
+
+    def test_retries_and_failures(self):
+        """
+        Asserts retried activities report their retries and invalid specs fail
+        without stopping the others.
+        :return: None
+        """
+        nova = bulk_api()
+        specs = [
+            {"project_id": 6, "activitytype_id": 14, "comments": "flaky", "ticket": "a"},
+            {"project_id": 6},
+            {"project_id": 6, "activitytype_id": 14, "ticket": "b"},
+        ]
+        result = nova.post_activities(specs, retries=1)
+        assert [item.ok for item in result] == [True, False, True]
+        assert result[0].retries == 1
+        assert isinstance(result[1].error, TypeError)
+        assert result.retries == 1
+        pass
+
+    def test_possibly_stored_activities_arent_sent_again(self):
+        """
+        Asserts errors after the request reached the server are recorded without
+        retrying while refused connections are retried.
+        :return: None
+        """
+        nova = bulk_api()
+        specs = [
+            {"project_id": 6, "activitytype_id": 14, "comments": comments, "ticket": comments}
+            for comments in ("slow", "gateway", "refused")
+        ]
+        result = nova.post_activities(specs, retries=2)
+        assert isinstance(result[0].error, requests.exceptions.ReadTimeout)
+        assert result[0].response is None
+        assert result[1].response.status_code == 502
+        assert result[2].ok and result[2].retries == 1
+        assert [item.retries for item in result[:2]] == [0, 0]
+        assert sorted(data["task"] for data in nova.adapter.created) == \
+            ["gateway", "refused", "slow"]
+        pass
+
+    pass
@@ -0,0 +1,83 @@
+import json
+from requests.models import Response
+from nova_api.api import NovaAPI
+from nova_api.cache import CatalogCache
+
+
+class FakeSession(object):
+    """
+    Session replacement answering every GET with the given status code,
+    and a json list body when the status is 200.
+    """
+    def __init__(self, status_code=200, etag='"v1"'):
+        self.status_code = status_code
+        self.etag = etag
+        self.headers = {"Authorization": "bearer token"}
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append((url, headers or {}))
+        response = Response()
+        response.status_code = self.status_code
+        response.url = url
+        if self.etag:
+            response.headers["ETag"] = self.etag
+        if self.status_code == 200:
+            response._content = json.dumps([{"id": 1, "name": url}]).encode("utf-8")
+        return response
+
+
+def cached_api(tmpdir, session, ttls=None):
+    """
+    Returns a NovaAPI instance using a catalog cache in tmpdir and the given session.
+    """
+    nova = NovaAPI(catalog_cache=CatalogCache(str(tmpdir), ttls))
+    nova.ses = session
+    return nova
+
+
+class TestCatalogCache(object):
+
+    def test_warm_start_sends_no_requests(self, tmpdir):
+        """
+        Asserts a second instance reads a fresh catalog from disk.
+        :return: None
+        """
+        cold = cached_api(tmpdir, FakeSession())
+        cold.get_project_types()
+        cold.set_project_types()
+        session = FakeSession()
+        warm = cached_api(tmpdir, session)
+        warm.get_project_types()
+        warm.set_project_types()
+        assert session.requests == []
+        assert warm.project_types == cold.project_types
+        assert warm.project_types_response.from_cache
+        pass
+
+    def test_stale_entry_is_revalidated(self, tmpdir):
+        """
+        Asserts stale entries send If-None-Match and a 304 serves the cached body.
+        :return: None
+        """
+        cached_api(tmpdir, FakeSession()).get_technologies()
+        session = FakeSession(status_code=304)
+        nova = cached_api(tmpdir, session, {"technologies": 0})
+        nova.get_technologies()
+        nova.set_technologies()
+        assert session.requests[0][1]["If-None-Match"] == '"v1"'
+        assert nova.technologies[0]["id"] == 1
+        pass
+
+    def test_errors_are_not_cached(self, tmpdir):
+        """
+        Asserts error responses are returned and not stored.
+        :return: None
+        """
+        nova = cached_api(tmpdir, FakeSession(status_code=500))
+        nova.get_employee_types()
+        assert nova.employee_types_response.status_code == 500
+        assert nova.catalog_cache.load("employee_types") is None
+        pass
+
+    pass
@@ -0,0 +1,74 @@
+from nova_api import decoding
+from nova_api.api import NovaAPI
+from nova_api.decoding import decode_response, loads
+from .test_records import json_response
+
+
+class FakeOrjson(object):
+    """
+    Stands for the orjson module, counting the documents parsed.
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def loads(self, content):
+        self.calls += 1
+        return decoding.json.loads(content.decode("utf-8"))
+
+
+class TestDecoding(object):
+
+    def test_parsed_once(self):
+        """
+        Asserts a response is parsed once and the same value returned afterwards.
+        :return: None
+        """
+        response = json_response('[{"id": 1}]')
+        value = decode_response(response)
+        response._content = b"not json"
+        assert decode_response(response) is value == [{"id": 1}]
+        pass
+
+    def test_release(self):
+        """
+        Asserts the raw body can be dropped once parsed.
+        :return: None
+        """
+        response = json_response('{"id": 7}')
+        assert decode_response(response, release=True) == {"id": 7}
+        assert response.content == b""
+        assert decode_response(response) == {"id": 7}
+        pass
+
+    def test_fast_backend(self, monkeypatch):
+        """
+        Asserts orjson parses the responses when it's installed.
+        :return: None
+        """
+        backend = FakeOrjson()
+        monkeypatch.setattr(decoding, "orjson", backend)
+        response = json_response('{"id": 7}')
+        decode_response(response)
+        decode_response(response)
+        assert loads(b'[1]') == [1]
+        assert backend.calls == 2
+        assert decoding.json_backend() == "orjson"
+        pass
+
+    def test_set_methods_share_parsed_value(self):
+        """
+        Asserts the set methods and raw_json use one parse per response.
+        :return: None
+        """
+        nova = NovaAPI(release_bodies=True)
+        nova.profile_response = json_response('{"id": 7, "name": "someone"}')
+        nova.users_response = json_response('[{"id": 7, "name": "someone"}]')
+        nova.set_profile()
+        nova.set_profile_id()
+        nova.set_users()
+        assert nova.profile_id == 7
+        assert nova.profile_response.content == b""
+        assert nova.raw_json("users") is nova.users
+        pass
+
+    pass
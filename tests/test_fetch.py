@@ -0,0 +1,70 @@
+from multiprocessing.pool import ThreadPool
+import pytest
+import requests
+from nova_api.records import Project
+
+
+class TestFetch(object):
+
+    def test_results_are_returned(self, server):
+        """
+        Asserts the calls return their results and leave the response attributes unset.
+        :return: None
+        """
+        nova = server.api("user2", typed_records=True)
+        nova.login()
+        assert nova.fetch_profile()["contract"] == {"employeeId": 2}
+        projects = nova.fetch("projects", query={"where": {"id": {"lte": 4}}})
+        assert len(projects) == 4
+        assert all(isinstance(project, Project) for project in projects)
+        assert len(nova.fetch("activity_types")) == 10
+        assert len(nova.fetch_project_assignments()) == 5
+        activities = nova.fetch_activities(query={"limit": 3})
+        assert [activity.employeeId for activity in activities] == [2, 2, 2]
+        assert nova.projects_response is None
+        assert nova.activities_response is None
+        assert nova.project_assignments_response is None
+        pass
+
+    def test_shared_between_threads(self, server):
+        """
+        Asserts one logged in instance serves a thread pool.
+        :return: None
+        """
+        nova = server.api("user1")
+        nova.login()
+
+        def round_trip(index):
+            activity = nova.create_activity(1, 1, comments="thread %d" % index)
+            edited = nova.update_activity(activity["activityId"], comments="edited %d" % index)
+            found = nova.fetch_activities(query={"where": {"activityId": activity["activityId"]}})
+            return activity["comments"], edited["comments"], found, nova.remove_activity(
+                activity["activityId"]
+            )
+
+        pool = ThreadPool(8)
+        try:
+            results = pool.map(round_trip, range(40))
+        finally:
+            pool.close()
+        for index, (created, edited, found, removed) in enumerate(results):
+            assert created == "thread %d" % index
+            assert edited == found[0]["comments"] == "edited %d" % index
+            assert removed == 1
+        assert nova.post_activity_response is None
+        assert nova.edit_activity_response is None
+        assert len(server.data.activities) == 3 * 25
+        pass
+
+    def test_errors_are_raised(self, server):
+        """
+        Asserts error status codes raise instead of being returned.
+        :return: None
+        """
+        nova = server.api("user1")
+        nova.login()
+        with pytest.raises(requests.HTTPError):
+            nova.update_activity(999999, comments="missing")
+        pass
+
+    pass
@@ -0,0 +1,78 @@
+import json
+from requests.models import Response
+from nova_api.api import NovaAPI
+from nova_api.filters import Filter, employee_query, query_params
+
+
+class RecordingSession(object):
+    """
+    Session replacement recording the params of each GET.
+    """
+    def __init__(self):
+        self.headers = {"Authorization": "bearer token"}
+        self.params = []
+
+    def get(self, url, params=None, **kwargs):
+        self.params.append(params)
+        response = Response()
+        response.status_code = 200
+        response._content = b"[]"
+        return response
+
+
+class TestFilter(object):
+
+    def test_composition(self):
+        """
+        Asserts filters compose without modifying the original.
+        :return: None
+        """
+        base = Filter().where(employeeId=7)
+        query = base.where({"value": {"gt": 4}}).fields("activityId").order("activityDate DESC")
+        assert base.to_dict() == {"where": {"employeeId": 7}}
+        assert query.limit(10).skip(20).to_dict() == {
+            "where": {"employeeId": 7, "value": {"gt": 4}},
+            "fields": ["activityId"],
+            "order": ["activityDate DESC"],
+            "limit": 10,
+            "skip": 20,
+        }
+        assert Filter(limit=1).include({"project": "account"}).get("include") == [
+            {"project": "account"}
+        ]
+        assert base == Filter(where={"employeeId": 7})
+        assert len(set([base, Filter(where={"employeeId": 7})])) == 1
+        pass
+
+    def test_params(self):
+        """
+        Asserts dictionaries are accepted and the employee is added when missing.
+        :return: None
+        """
+        assert query_params(None) is None
+        assert json.loads(query_params({"limit": 5})["filter"]) == {"limit": 5}
+        assert employee_query({"limit": 5}, 7).get("where") == {"employeeId": 7}
+        assert employee_query(Filter().where(employeeId=8), 7).get("where") == {"employeeId": 8}
+        pass
+
+    def test_getters_accept_queries(self):
+        """
+        Asserts getters send the query as the filter parameter.
+        :return: None
+        """
+        nova = NovaAPI()
+        nova.profile_id = 7
+        nova.ses = RecordingSession()
+        query = Filter().fields("id", "name")
+        nova.get_projects(query=query)
+        nova.get_technologies(query=query)
+        nova.get_activities(query=query.limit(3))
+        nova.get_projects()
+        assert nova.ses.params[0] == nova.ses.params[1] == query.params()
+        assert json.loads(nova.ses.params[2]["filter"]) == {
+            "fields": ["id", "name"], "limit": 3, "where": {"employeeId": 7}
+        }
+        assert nova.ses.params[3] is None
+        pass
+
+    pass
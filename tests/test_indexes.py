@@ -0,0 +1,72 @@
+import pytest
+from nova_api.api import NovaAPI
+from nova_api.indexes import CatalogIndex
+from nova_api.nova_exceptions import AttributeNotSet
+
+
+def indexed_api():
+    """
+    Returns a NovaAPI instance with a few catalogs set.
+    """
+    nova = NovaAPI()
+    nova.accounts = [{"id": 1, "name": "Acme"}, {"id": 2, "name": "Globex"}]
+    nova.projects = [
+        {"id": 10, "name": "Portal", "accountId": 1},
+        {"id": 11, "name": "Mobile", "accountId": 1},
+        {"id": 12, "name": "Billing", "accountId": 2},
+    ]
+    nova.users = [{"id": 7, "name": "Jane Doe", "email": "Jane@example.com"}]
+    nova.my_projects = [{"id": 100, "employeeId": 7, "projectId": 10}]
+    return nova
+
+
+class TestCatalogIndex(object):
+
+    def test_lookups(self):
+        """
+        Asserts records are found by id, name ignoring case and foreign key.
+        :return: None
+        """
+        index = CatalogIndex([{"id": 1, "name": "Acme"}, {"id": 2, "name": "Globex"}])
+        assert index.get(2)["name"] == "Globex"
+        assert index.find("ACME")["id"] == 1
+        assert index.get(3) is None
+        assert 1 in index and len(index) == 2
+        assert index.related("name", "Acme") == [index.get(1)]
+        pass
+
+    def test_nova_api_indexes(self):
+        """
+        Asserts NovaAPI lookups and reverse indexes.
+        :return: None
+        """
+        nova = indexed_api()
+        assert nova.lookup("projects", 12)["name"] == "Billing"
+        assert nova.index("users").find("jane@example.com")["id"] == 7
+        assert [project["id"] for project in nova.projects_of_account(1)] == [10, 11]
+        assert nova.assignments_of_employee(7)[0]["projectId"] == 10
+        pass
+
+    def test_index_rebuilt_on_refresh(self):
+        """
+        Asserts indexes are reused until the attribute is assigned a new list.
+        :return: None
+        """
+        nova = indexed_api()
+        index = nova.index("accounts")
+        assert nova.index("accounts") is index
+        nova.accounts = [{"id": 3, "name": "Initech"}]
+        assert nova.lookup("accounts", 3)["name"] == "Initech"
+        assert nova.lookup("accounts", 1) is None
+        pass
+
+    def test_attribute_not_set(self):
+        """
+        Asserts indexing an attribute that wasn't set raises AttributeNotSet.
+        :return: None
+        """
+        with pytest.raises(AttributeNotSet):
+            NovaAPI().index("technologies")
+        pass
+
+    pass
@@ -0,0 +1,118 @@
+import json
+from requests.adapters import BaseAdapter
+try:
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from urlparse import urlparse, parse_qs
+from requests.models import Response
+from nova_api.api import NovaAPI
+from nova_api.filters import Filter
+
+
+class PagesAdapter(BaseAdapter):
+    """
+    Transport adapter answering /api/Activities with the LoopBack where
+    (equality and gt), fields, order, limit and skip filters applied,
+    rows are answered in reverse when there's no order.
+    """
+    def __init__(self, activities):
+        super(PagesAdapter, self).__init__()
+        self.activities = activities
+        self.filters = []
+
+    def send(self, request, **kwargs):
+        query = json.loads(parse_qs(urlparse(request.url).query)["filter"][0])
+        self.filters.append(query)
+        rows = self.activities
+        for field, condition in query["where"].items():
+            if isinstance(condition, dict):
+                rows = [row for row in rows if row[field] > condition["gt"]]
+            else:
+                rows = [row for row in rows if row[field] == condition]
+        if "order" not in query:
+            # LoopBack doesn't guarantee any order, the same on every request.
+            rows = list(reversed(rows))
+        for clause in reversed(query.get("order", [])):
+            rows = sorted(rows, key=lambda row: row[clause.split()[0]])
+        skip = query.get("skip", 0)
+        rows = rows[skip:skip + query["limit"]]
+        if "fields" in query:
+            rows = [dict((field, row[field]) for field in query["fields"]) for row in rows]
+        response = Response()
+        response.status_code = 200
+        response.request = request
+        response._content = json.dumps(rows).encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+
+def paged_api(activities):
+    """
+    Returns an authenticated NovaAPI instance using a PagesAdapter.
+    """
+    nova = NovaAPI()
+    nova.ses.headers["Authorization"] = "bearer token"
+    nova.profile_id = 7
+    adapter = PagesAdapter(activities)
+    nova.ses.mount("http://", adapter)
+    return nova, adapter
+
+
+ACTIVITIES = [
+    {"activityId": i, "employeeId": 7 if i % 3 else 8, "value": 1}
+    for i in range(1, 251)
+]
+
+
+class TestIterActivities(object):
+
+    def test_limit_and_skip(self):
+        """
+        Asserts every activity of the employee is yielded using limit/skip pages.
+        :return: None
+        """
+        nova, adapter = paged_api(ACTIVITIES)
+        activities = list(nova.iter_activities(page_size=50))
+        assert activities == [row for row in ACTIVITIES if row["employeeId"] == 7]
+        assert [query["skip"] for query in adapter.filters] == [0, 50, 100, 150]
+        assert all(query["order"] == ["activityId ASC"] for query in adapter.filters)
+        pass
+
+    def test_keyset(self):
+        """
+        Asserts keyset pagination requests ids greater than the last one received.
+        :return: None
+        """
+        nova, adapter = paged_api(ACTIVITIES)
+        activities = list(nova.iter_activities(user_id=8, page_size=40, key="activityId"))
+        assert activities == [row for row in ACTIVITIES if row["employeeId"] == 8]
+        assert adapter.filters[1]["where"]["activityId"] == {"gt": activities[39]["activityId"]}
+        assert "skip" not in adapter.filters[0]
+        pass
+
+    def test_fields_projection(self):
+        """
+        Asserts a query's fields are requested on every page.
+        :return: None
+        """
+        nova, adapter = paged_api(ACTIVITIES)
+        query = Filter().fields("activityId", "value")
+        activities = list(nova.iter_activities(page_size=100, query=query))
+        assert len(activities) == 167
+        assert activities[0] == {"activityId": 1, "value": 1}
+        assert all(page["fields"] == ["activityId", "value"] for page in adapter.filters)
+        pass
+
+    def test_first_page_only_when_stopped(self):
+        """
+        Asserts consuming the first activity requests a single page.
+        :return: None
+        """
+        nova, adapter = paged_api(ACTIVITIES)
+        next(nova.iter_activities(page_size=10))
+        assert len(adapter.filters) == 1
+        pass
+
+    pass
@@ -0,0 +1,195 @@
+import datetime
+import time
+from nova_api.journal import ActivityJournal
+from nova_api.nova_exceptions import LoginFailed
+from nova_api.transport import TransportConfig
+
+DAY = datetime.datetime(2016, 6, 1)
+
+
+def journal_api(server, tmpdir):
+    """
+    Returns a logged in instance and a journal stored in tmpdir.
+    """
+    nova = server.api("user1")
+    nova.login()
+    return nova, ActivityJournal(nova, str(tmpdir.join("journal.db")))
+
+
+class TestActivityJournal(object):
+
+    def test_post_and_edits_coalesce(self, server, tmpdir):
+        """
+        Asserts a post followed by edits is sent as a single post.
+        :return: None
+        """
+        nova, journal = journal_api(server, tmpdir)
+        key = journal.post_activity(1, 1, date=DAY, comments="draft")
+        journal.edit_activity(key, comments="final")
+        journal.edit_activity(key, value=3, ticket="T-1")
+        assert len(journal) == 1
+        requests = server.requests
+        assert journal.flush() == 1
+        assert server.requests == requests + 1
+        activity = server.data.activities[journal.activity_id(key)]
+        assert (activity["comments"], activity["value"], activity["task"]) == ("final", 3, "T-1")
+        journal.close()
+        pass
+
+    def test_post_and_delete_send_nothing(self, server, tmpdir):
+        """
+        Asserts a post followed by a delete is never sent.
+        :return: None
+        """
+        nova, journal = journal_api(server, tmpdir)
+        key = journal.post_activity(1, 1, date=DAY)
+        journal.edit_activity(key, comments="edited")
+        journal.delete_activity(key)
+        requests = server.requests
+        assert len(journal) == 0
+        assert journal.flush() == 0
+        assert server.requests == requests
+        journal.close()
+        pass
+
+    def test_edits_merge(self, server, tmpdir):
+        """
+        Asserts edits of an existing activity merge and a delete replaces them.
+        :return: None
+        """
+        nova, journal = journal_api(server, tmpdir)
+        journal.edit_activity(1, comments="first")
+        journal.edit_activity(1, value=5)
+        journal.edit_activity(4, comments="gone")
+        journal.delete_activity(4)
+        assert [(entry.operation, entry.data) for entry in journal.entries()] == [
+            ("edit", {"comments": "first", "value": 5, "billablevalue": 5}),
+            ("delete", {}),
+        ]
+        assert journal.flush() == 2
+        assert server.data.activities[1]["comments"] == "first"
+        assert server.data.activities[1]["value"] == 5
+        assert 4 not in server.data.activities
+        journal.close()
+        pass
+
+    def test_survives_restart(self, server, tmpdir):
+        """
+        Asserts queued operations are sent by the next process.
+        :return: None
+        """
+        nova, journal = journal_api(server, tmpdir)
+        key = journal.post_activity(2, 1, date=DAY, comments="persisted")
+        journal.close()
+        nova, journal = journal_api(server, tmpdir)
+        journal.flush()
+        assert server.data.activities[journal.activity_id(key)]["comments"] == "persisted"
+        journal.close()
+        pass
+
+    def test_post_sent_before_stopping_isnt_duplicated(self, server, tmpdir):
+        """
+        Asserts a post left sending is matched with the activity it created.
+        :return: None
+        """
+        nova, journal = journal_api(server, tmpdir)
+        key = journal.post_activity(2, 1, date=DAY, comments="in doubt")
+        entry = journal.entries()[0]
+        journal._set_state(entry, "sending")
+        nova.request("POST", nova.activities_url, data=entry.data)
+        count = len(server.data.activities)
+        journal.close()
+        nova, journal = journal_api(server, tmpdir)
+        assert len(journal) == 0
+        assert journal.activity_id(key) == max(server.data.activities)
+        journal.flush()
+        assert len(server.data.activities) == count
+        journal.close()
+        pass
+
+    def test_unavailable_server_keeps_operations(self, server, tmpdir):
+        """
+        Asserts operations are kept when the server is unavailable
+        and the rejected ones are marked failed.
+        :return: None
+        """
+        nova, journal = journal_api(server, tmpdir)
+        journal.edit_activity(999999, comments="missing")
+        journal.post_activity(1, 1, date=DAY)
+        server.capacity = 0
+        assert journal.flush() == 0
+        assert [entry.state for entry in journal.entries()] == ["pending", "pending"]
+        server.capacity = None
+        assert journal.flush() == 2
+        assert journal.entries("failed")[0].error.startswith("404")
+        assert journal.discard_failed() == 1
+        journal.close()
+        pass
+
+    def test_timed_out_post_isnt_duplicated(self, server, tmpdir):
+        """
+        Asserts a post whose response timed out after the server stored it
+        is looked up instead of being sent again.
+        :return: None
+        """
+        nova = server.api("user1", transport=TransportConfig(read_timeout=0.2))
+        nova.login()
+        journal = ActivityJournal(nova, str(tmpdir.join("journal.db")))
+        key = journal.post_activity(2, 1, date=DAY, comments="timed out")
+        journal.edit_activity(1, comments="after the post")
+        count = len(server.data.activities)
+        server.latency = 0.5
+        assert journal.flush() == 0
+        assert [entry.state for entry in journal.entries()] == ["sending", "pending"]
+        time.sleep(0.5)
+        server.latency = 0
+        assert len(server.data.activities) == count + 1
+        assert journal.flush() == 1
+        assert len(server.data.activities) == count + 1
+        assert journal.activity_id(key) == max(server.data.activities)
+        assert server.data.activities[1]["comments"] == "after the post"
+        journal.close()
+        pass
+
+    def test_unexpected_error_stops_the_flush(self, server, tmpdir):
+        """
+        Asserts an exception other than a request error keeps the operation
+        and the ones after it, which are sent in order later.
+        :return: None
+        """
+        nova, journal = journal_api(server, tmpdir)
+        key = journal.post_activity(2, 1, date=DAY, comments="first")
+        journal.edit_activity(key, comments="first edited")
+        journal.edit_activity(1, comments="second")
+        journal.wake.clear()
+
+        def failing(*args, **kwargs):
+            raise LoginFailed()
+
+        nova.request = failing
+        assert journal.flush() == 0
+        entries = journal.entries()
+        assert [entry.state for entry in entries] == ["sending", "pending"]
+        assert entries[0].error
+        del nova.request
+        assert journal.flush() == 2
+        assert server.data.activities[journal.activity_id(key)]["comments"] == "first edited"
+        assert server.data.activities[1]["comments"] == "second"
+        assert len(journal) == 0
+        journal.close()
+        pass
+
+    def test_background_flush(self, server, tmpdir):
+        """
+        Asserts the background thread sends the queued operations.
+        :return: None
+        """
+        nova, journal = journal_api(server, tmpdir)
+        journal.start()
+        key = journal.post_activity(3, 1, date=DAY)
+        journal.stop(flush=True)
+        assert journal.activity_id(key) in server.data.activities
+        journal.close()
+        pass
+
+    pass
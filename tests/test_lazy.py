@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from nova_api.api import NovaAPI
+from nova_api.transport import TransportConfig
+
+
+class CountingAdapter(BaseAdapter):
+    """
+    Transport adapter answering every request with a json list
+    holding the request number, counting the requests per url.
+    """
+    def __init__(self, delay=0):
+        super(CountingAdapter, self).__init__()
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def send(self, request, **kwargs):
+        time.sleep(self.delay)
+        url = request.url.split("?")[0]
+        with self.lock:
+            self.counts[url] = self.counts.get(url, 0) + 1
+            count = self.counts[url]
+        response = Response()
+        response.status_code = 200
+        response.request = request
+        response._content = json.dumps([{"id": count, "name": url}]).encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+
+def lazy_api(delay=0):
+    nova = NovaAPI(lazy=True)
+    nova.ses.headers["Authorization"] = "bearer token"
+    adapter = CountingAdapter(delay)
+    nova.ses.mount("http://", adapter)
+    return nova, adapter
+
+
+class TestLazyAttributes(object):
+
+    def test_loaded_on_first_access(self):
+        """
+        Asserts only the accessed attribute is requested, once.
+        :return: None
+        """
+        nova, adapter = lazy_api()
+        assert nova.projects[0]["id"] == 1
+        assert nova.projects[0]["id"] == 1
+        assert adapter.counts == {NovaAPI.projects_url: 1}
+        pass
+
+    def test_invalidate_and_refresh(self):
+        """
+        Asserts invalidate makes the next access request again and refresh reloads.
+        :return: None
+        """
+        nova, adapter = lazy_api()
+        nova.users
+        nova.invalidate("users")
+        assert nova.users[0]["id"] == 2
+        nova.refresh()
+        assert nova.users[0]["id"] == 3
+        assert list(adapter.counts) == [NovaAPI.users_url]
+        pass
+
+    def test_concurrent_access_single_request(self):
+        """
+        Asserts threads reading an unloaded attribute share one request.
+        :return: None
+        """
+        nova, adapter = lazy_api(delay=0.05)
+        threads = [threading.Thread(target=lambda: nova.technologies) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert adapter.counts == {NovaAPI.technologies_url: 1}
+        pass
+
+    def test_failed_load_is_tried_again(self, server):
+        """
+        Asserts an error status isn't stored as the attribute's value
+        and the next access requests it again.
+        :return: None
+        """
+        nova = server.api("user1", lazy=True, transport=TransportConfig(retries=0))
+        nova.login()
+        server.fail("/api/Projects", 503)
+        with pytest.raises(requests.exceptions.HTTPError):
+            nova.projects
+        assert nova.__dict__.get("projects") is None
+        assert len(nova.projects) == 10
+        pass
+
+    def test_not_lazy_by_default(self):
+        """
+        Asserts attributes stay None until set when lazy isn't enabled.
+        :return: None
+        """
+        nova = NovaAPI()
+        assert nova.projects is None
+        pass
+
+    pass
@@ -0,0 +1,69 @@
+from nova_api.api import NovaAPI
+from nova_api.metrics import CallbackSink, InMemoryMetrics, MultiSink, endpoint_name
+from nova_api.transport import TransportConfig
+from .test_transport import flaky_url
+
+
+class TestMetrics(object):
+
+    def test_disabled_by_default(self):
+        """
+        Asserts no hook is added without a metrics sink.
+        :return: None
+        """
+        nova = NovaAPI()
+        assert nova.ses.hooks["response"] == [nova._relogin_on_unauthorized]
+        pass
+
+    def test_per_endpoint_aggregates(self, server):
+        """
+        Asserts requests and json parses are aggregated per endpoint.
+        :return: None
+        """
+        metrics = InMemoryMetrics()
+        samples = []
+        nova = server.api("user1", metrics=MultiSink(metrics, CallbackSink(samples.append)))
+        nova.login()
+        nova.build_info()
+        nova.post_activity(1, 1, comments="metrics")
+        nova.edit_activity(nova.post_activity_response.json()["activityId"], comments="edited")
+        snapshot = metrics.snapshot()
+        activities = snapshot["GET /api/Activities"]
+        assert activities["count"] == 1
+        assert activities["status_codes"] == {200: 1}
+        assert activities["bytes_received"] > 0
+        assert activities["decodes"] == 1
+        assert activities["decode_bytes"] == activities["bytes_received"]
+        assert 0 < activities["p50_seconds"] <= activities["p95_seconds"]
+        assert sum(count for _, count in activities["latency_buckets"]) == 1
+        assert snapshot["POST /login"]["status_codes"] == {302: 1}
+        assert snapshot["PUT /api/Activities/{id}"]["bytes_sent"] > 0
+        assert len(samples) == sum(stats["count"] for stats in snapshot.values())
+        metrics.reset()
+        assert metrics.snapshot() == {}
+        pass
+
+    def test_transport_retries(self, flaky_url):
+        """
+        Asserts the retries made by the transport are counted.
+        :return: None
+        """
+        metrics = InMemoryMetrics()
+        nova = NovaAPI(transport=TransportConfig(backoff_factor=0), metrics=metrics)
+        nova.ses.get(flaky_url + "api/Activities/12")
+        stats = metrics.snapshot()["GET /api/Activities/{id}"]
+        assert stats["retries"] == 2
+        assert stats["status_codes"] == {200: 1}
+        pass
+
+    def test_endpoint_name(self):
+        """
+        Asserts ids and get parameters are left out of the endpoint names.
+        :return: None
+        """
+        assert endpoint_name("GET", NovaAPI.activities_url + "/51?filter=x") == \
+            "GET /api/Activities/{id}"
+        assert endpoint_name("GET", "http://nova.itexico.com/#/authorized/") == "GET /"
+        pass
+
+    pass
@@ -0,0 +1,106 @@
+import json
+from requests.models import Response
+from nova_api.api import NovaAPI
+from nova_api.mirror import SQLiteMirror
+from .test_iter_activities import PagesAdapter
+
+
+class MirrorAdapter(PagesAdapter):
+    """
+    PagesAdapter also answering the project assignments endpoint.
+    """
+    assignments = [{"id": 1, "employeeId": 7, "projectId": 10}]
+
+    def send(self, request, **kwargs):
+        if not request.url.startswith(NovaAPI.project_assignments_url):
+            return super(MirrorAdapter, self).send(request, **kwargs)
+        response = Response()
+        response.status_code = 200
+        response.request = request
+        response._content = json.dumps(self.assignments).encode("utf-8")
+        return response
+
+
+def mirrored_api():
+    """
+    Returns a NovaAPI instance with its catalogs set, and its activities
+    and assignments answered by a MirrorAdapter.
+    """
+    nova = NovaAPI()
+    nova.ses.headers["Authorization"] = "bearer token"
+    nova.profile_id = 7
+    nova.ses.mount("http://", MirrorAdapter([
+        {"activityId": 1, "employeeId": 7, "projectId": 10, "typeId": 14,
+         "activityDate": "2016-06-01T00:00:00Z", "value": 8},
+        {"activityId": 2, "employeeId": 7, "projectId": 11, "typeId": 14,
+         "activityDate": "2016-06-03T00:00:00Z", "value": 4},
+        {"activityId": 3, "employeeId": 7, "projectId": 12, "typeId": 14,
+         "activityDate": "2016-06-06T00:00:00Z", "value": 6},
+        {"activityId": 4, "employeeId": 8, "projectId": 12, "typeId": 14,
+         "activityDate": "2016-06-06T00:00:00Z", "value": 1},
+    ]))
+    for name in SQLiteMirror.catalog_tables:
+        setattr(nova, name, [])
+    nova.accounts = [{"id": 1, "name": "Acme"}, {"id": 2, "name": "Globex"}]
+    nova.projects = [
+        {"id": 10, "name": "Portal", "accountId": 1},
+        {"id": 11, "name": "Mobile", "accountId": 1},
+        {"id": 12, "name": "Billing", "accountId": 2},
+    ]
+    return nova
+
+
+class TestSQLiteMirror(object):
+
+    def test_hours_per_account_per_week(self):
+        """
+        Asserts synced activities are summed per account and week.
+        :return: None
+        """
+        mirror = SQLiteMirror()
+        mirror.sync(mirrored_api(), employee_ids=[7, 8])
+        rows = [tuple(row) for row in mirror.hours_per_account_per_week(employee_ids=[7])]
+        assert rows == [
+            (1, "Acme", "2016-05-30", 12),
+            (2, "Globex", "2016-06-06", 6),
+        ]
+        assert len(mirror.hours_per_account_per_week(start="2016-06-06")) == 1
+        assert mirror.hours_per_account_per_week(start="2016-06-06")[0]["hours"] == 7
+        pass
+
+    def test_resync_replaces_rows(self, tmpdir):
+        """
+        Asserts syncing again replaces an employee's rows in a file database.
+        :return: None
+        """
+        path = str(tmpdir.join("nova.sqlite"))
+        nova = mirrored_api()
+        mirror = SQLiteMirror(path)
+        mirror.sync(nova)
+        del nova.ses.get_adapter(NovaAPI.activities_url).activities[0]
+        mirror.sync_activities(nova)
+        mirror.close()
+        mirror = SQLiteMirror(path)
+        assert [row["activityId"] for row in mirror.query(
+            "SELECT activityId FROM activities ORDER BY activityId"
+        )] == [2, 3]
+        assert mirror.query("SELECT projectId FROM project_assignments")[0][0] == 10
+        assert json.loads(mirror.query("SELECT data FROM accounts WHERE id = 2")[0][0]) == {
+            "id": 2, "name": "Globex"
+        }
+        pass
+
+    def test_queries_use_indexes(self):
+        """
+        Asserts activity lookups by employee use an index.
+        :return: None
+        """
+        mirror = SQLiteMirror()
+        plan = " ".join(
+            str(tuple(row)) for row in
+            mirror.query("EXPLAIN QUERY PLAN SELECT * FROM activities WHERE employeeId = 7")
+        )
+        assert "activities_employeeId" in plan
+        pass
+
+    pass
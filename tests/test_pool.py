@@ -0,0 +1,104 @@
+import time
+import pytest
+import requests
+from nova_api.api import NovaAPI
+from nova_api.pool import CatalogStore, NovaSessionPool
+from nova_api.transport import SharedTransportConfig
+from .test_tokens import StubAdapter
+
+
+class StubTransport(SharedTransportConfig):
+    """
+    SharedTransportConfig whose shared adapter is a StubAdapter.
+    """
+    def adapter(self):
+        if self._adapter is None:
+            self._adapter = StubAdapter()
+        return self._adapter
+
+
+def stub_pool(**options):
+    return NovaSessionPool(transport=StubTransport(), **options)
+
+
+class TestNovaSessionPool(object):
+
+    def test_sessions_are_reused(self):
+        """
+        Asserts a user's instance is logged in once and reused.
+        :return: None
+        """
+        pool = stub_pool()
+        nova = pool.get("user", "password")
+        assert nova.access_token
+        requests = len(pool.transport.adapter().requests)
+        assert pool.get("user", "password") is nova
+        assert len(pool.transport.adapter().requests) == requests
+        assert pool.get("user", "other") is not nova
+        pass
+
+    def test_shared_catalogs_and_connections(self):
+        """
+        Asserts instances share the adapter, and catalogs are requested once.
+        :return: None
+        """
+        pool = stub_pool()
+        first = pool.get("first", "password")
+        second = pool.get("second", "password")
+        assert first.ses.get_adapter(NovaAPI.users_url) is second.ses.get_adapter(NovaAPI.users_url)
+        adapter = pool.transport.adapter()
+        before = len(adapter.requests)
+        assert first.projects is second.projects
+        assert first.index("projects") is second.index("projects")
+        assert len(adapter.requests) == before + 1
+        second.invalidate("projects")
+        assert pool.catalog_store.get("projects") is None
+        first.projects
+        assert len(adapter.requests) == before + 2
+        pass
+
+    def test_failed_load_isnt_shared(self, server):
+        """
+        Asserts a catalog one user failed to load is requested again for the others.
+        :return: None
+        """
+        pool = NovaSessionPool(
+            transport=SharedTransportConfig(retries=0), api_class=server.api_class()
+        )
+        first = pool.get("user1", server.data.password)
+        second = pool.get("user2", server.data.password)
+        server.fail("/api/Projects", 503)
+        with pytest.raises(requests.exceptions.HTTPError):
+            first.projects
+        assert pool.catalog_store.get("projects") is None
+        assert len(second.projects) == 10
+        assert first.projects is second.projects
+        pass
+
+    def test_lru_and_idle_eviction(self):
+        """
+        Asserts the least recently used and the idle instances are evicted.
+        :return: None
+        """
+        pool = stub_pool(max_sessions=2, idle_timeout=60)
+        pool.get("a", "password")
+        pool.get("b", "password")
+        pool.get("a", "password")
+        pool.get("c", "password")
+        assert "b" not in pool and "a" in pool and "c" in pool
+        pool.sessions["a"].last_used = time.time() - 120
+        pool.evict_idle()
+        assert list(pool.sessions) == ["c"]
+        pass
+
+    def test_store_only_holds_shared_catalogs(self):
+        """
+        Asserts the employee specific attributes aren't shared.
+        :return: None
+        """
+        store = CatalogStore()
+        assert "users" in store
+        assert "my_activities" not in store
+        pass
+
+    pass
@@ -0,0 +1,140 @@
+import time
+from nova_api.querycache import QueryCache, normalize_params, filter_employee
+
+
+class TestQueryCache(object):
+
+    def test_key_normalization(self):
+        """
+        Asserts equivalent filters get the same key and the employee is found.
+        :return: None
+        """
+        first = {"filter": '{"where": {"employeeId": 7}, "limit": 5}'}
+        second = {"filter": '{"limit":5,"where":{"employeeId":7}}'}
+        assert normalize_params(first) == normalize_params(second)
+        assert QueryCache.key("url", first) == QueryCache.key("url", second)
+        assert filter_employee(first) == "7"
+        assert filter_employee({"filter": '{"where": {"employeeId": "7"}}'}) == "7"
+        assert filter_employee({"filter": '{"where": {"employeeId": {"inq": [1, 2]}}}'}) is None
+        assert filter_employee({"filter": '{"limit": 5}'}) is None
+        assert filter_employee(None) is None
+        pass
+
+    def test_lru_and_ttl(self):
+        """
+        Asserts the least recently used entries are evicted and old ones expire.
+        :return: None
+        """
+        cache = QueryCache(max_entries=2, ttl=0.05)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        time.sleep(0.06)
+        assert cache.get("a") is None
+        stats = cache.stats()
+        assert stats["hits"] == 3
+        assert stats["misses"] == 2
+        assert stats["evictions"] == 1
+        assert stats["expirations"] == 1
+        assert stats["entries"] == 1
+        pass
+
+    def test_stale_put_is_dropped(self):
+        """
+        Asserts a response requested before an invalidation isn't stored.
+        :return: None
+        """
+        cache = QueryCache()
+        version = cache.version
+        cache.invalidate("url", 7)
+        cache.put(("url", "7", ()), "stale", version)
+        assert len(cache) == 0
+        cache.put(("url", "7", ()), "fresh", cache.version)
+        assert len(cache) == 1
+        pass
+
+    def test_reads_are_cached(self, server):
+        """
+        Asserts repeated reads with the same filter send one request.
+        :return: None
+        """
+        cache = QueryCache()
+        nova = server.api("user1", query_cache=cache)
+        nova.login()
+        nova.get_profile()
+        nova.set_profile_id()
+        requests = server.requests
+        for _ in range(3):
+            nova.get_activities()
+            nova.set_my_activities()
+            nova.get_project_assignments()
+            nova.set_my_projects()
+        assert len(nova.my_activities) == 25
+        assert len(nova.my_projects) == 5
+        assert server.requests == requests + 2
+        assert nova.fetch_activities(query={"limit": 3, "order": "activityId DESC"}) == \
+            nova.fetch_activities(query={"order": "activityId DESC", "limit": 3})
+        assert server.requests == requests + 3
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (5, 3, 3)
+        pass
+
+    def test_hits_arent_shared(self, server):
+        """
+        Asserts changing a cached result doesn't change the following hits.
+        :return: None
+        """
+        nova = server.api("user1", query_cache=QueryCache())
+        nova.login()
+        activities = nova.fetch_activities()
+        activities[0]["comments"] = "changed"
+        del activities[1:]
+        nova.get_activities()
+        nova.set_my_activities()
+        assert len(nova.my_activities) == 25
+        assert nova.my_activities[0]["comments"] != "changed"
+        nova.my_activities.pop()
+        again = nova.fetch_activities()
+        assert len(again) == 25 and again is not nova.my_activities
+        assert again[0]["comments"] != "changed"
+        assert nova.query_cache.stats()["hits"] == 2
+        pass
+
+    def test_writes_invalidate_their_employee(self, server):
+        """
+        Asserts the activity writes remove the entries of their employee only.
+        :return: None
+        """
+        cache = QueryCache()
+        nova = server.api("user1", query_cache=cache)
+        nova.login()
+        assert len(nova.fetch_activities()) == 25
+        assert len(nova.fetch_activities(2)) == 25
+        nova.fetch_project_assignments()
+        assert len(cache) == 3
+
+        nova.post_activity(1, 1, comments="new")
+        activity = nova.post_activity_response.json()
+        assert len(cache) == 2
+        assert len(nova.fetch_activities()) == 26
+        assert len(nova.fetch_activities(2)) == 25
+
+        nova.edit_activity(activity["activityId"], comments="edited")
+        assert len(cache) == 2
+        assert nova.fetch_activities(query={"where": {"comments": "edited"}})[0]["activityId"] == \
+            activity["activityId"]
+
+        nova.delete_activity(activity["activityId"])
+        assert len(cache) == 2
+        assert len(nova.fetch_activities()) == 25
+        requests = server.requests
+        nova.fetch_activities(2)
+        nova.fetch_project_assignments()
+        assert server.requests == requests
+        assert cache.stats()["invalidations"] == 3
+        pass
+
+    pass
@@ -0,0 +1,93 @@
+import threading
+import time
+import pytest
+from nova_api.metrics import InMemoryMetrics
+from nova_api.ratelimit import AdaptiveRateLimiter
+from nova_api.stub import NovaStubServer, StubData
+from nova_api.transport import TransportConfig
+
+
+class TestAdaptiveRateLimiter(object):
+
+    def test_token_bucket(self):
+        """
+        Asserts requests beyond the burst are spaced by the rate.
+        :return: None
+        """
+        limiter = AdaptiveRateLimiter(rate=20, burst=1, increase=0, slow_start=False)
+        start = time.time()
+        for _ in range(6):
+            limiter.acquire()
+            limiter.release(200, 0.01)
+        assert time.time() - start >= 0.2
+        assert limiter.snapshot()["throttled"] >= 4
+        pass
+
+    def test_aimd(self):
+        """
+        Asserts pressure halves the limits once per cooldown and successes raise them.
+        :return: None
+        """
+        limiter = AdaptiveRateLimiter(rate=40, concurrency=8, cooldown=60, latency_target=1)
+        limiter.acquire()
+        limiter.release(429, 0.1)
+        assert (limiter.rate, limiter.concurrency) == (20, 4)
+        limiter.acquire()
+        limiter.release(None, 0.1, error=True)
+        assert limiter.rate == 20
+        limiter.last_decrease = 0
+        limiter.acquire()
+        limiter.release(200, 2.0)
+        assert (limiter.rate, limiter.concurrency) == (10, 2)
+        for _ in range(10):
+            limiter.acquire()
+            limiter.release(200, 0.1)
+        snapshot = limiter.snapshot()
+        assert snapshot["rate"] > 10
+        assert 2 < snapshot["concurrency"] <= 5
+        assert snapshot["decreases"] == 2
+        with pytest.raises(TypeError):
+            AdaptiveRateLimiter(speed=1)
+        pass
+
+    def test_concurrency_and_retry_after(self):
+        """
+        Asserts requests wait for a free slot and for the server's Retry-After.
+        :return: None
+        """
+        limiter = AdaptiveRateLimiter(concurrency=1, rate=1000, burst=100)
+        limiter.acquire()
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(limiter.acquire()))
+        thread.start()
+        time.sleep(0.05)
+        assert acquired == []
+        limiter.release(503, 0.01, retry_after=0.1)
+        thread.join()
+        assert acquired[0] >= 0.1
+        assert not limiter.applies("GET") and limiter.applies("post")
+        pass
+
+    def test_finds_sustainable_rate(self):
+        """
+        Asserts bulk posts to an overloaded server back off and all get stored.
+        :return: None
+        """
+        metrics = InMemoryMetrics()
+        limiter = AdaptiveRateLimiter(
+            metrics=metrics, rate=500, burst=50, concurrency=16, cooldown=0.05
+        )
+        with NovaStubServer(StubData(users=1, activities=1), latency=0.01, capacity=2) as server:
+            nova = server.api(transport=TransportConfig(rate_limiter=limiter, backoff_factor=0))
+            nova.bulk_retry_backoff = 0.01
+            nova.login()
+            result = nova.post_activities(
+                [{"project_id": 1, "activitytype_id": 1}] * 40, workers=16, retries=8
+            )
+        assert len(result.succeeded) == 40
+        assert limiter.decreases >= 1
+        assert limiter.concurrency < 16
+        assert metrics.rate_limit["decreases"] >= 1
+        pass
+
+    pass
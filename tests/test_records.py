@@ -0,0 +1,130 @@
+import gc
+import json
+import sys
+import pytest
+from requests.models import Response
+from nova_api.api import NovaAPI
+from nova_api.records import Activity, Project
+
+
+def activities_json(count):
+    """
+    Returns a json array of count activities as sent by the activities endpoint.
+    """
+    return json.dumps([
+        {
+            "activityId": i,
+            "activityDate": "2016-06-01T00:00:00Z",
+            "employeeId": 7,
+            "projectId": 10 + i % 5,
+            "typeId": 14,
+            "value": 8,
+            "billablevalue": 8,
+            "comments": "",
+            "task": "",
+            "stepId": 1,
+            "createdAt": "2016-06-01T12:00:00Z",
+        }
+        for i in range(count)
+    ])
+
+
+def json_response(body):
+    response = Response()
+    response.status_code = 200
+    response._content = body.encode("utf-8")
+    return response
+
+
+class TestRecords(object):
+
+    def test_dictionary_style_access(self):
+        """
+        Asserts records keep only their fields and can be read like dictionaries.
+        :return: None
+        """
+        project = Project.from_json({"id": 10, "name": "Portal", "accountId": 1, "extra": 1})
+        assert project.name == project["name"] == project.get("name") == "Portal"
+        assert project.get("extra", "missing") == "missing"
+        assert project.to_dict() == {
+            "id": 10, "name": "Portal", "accountId": 1, "typeId": None, "statusId": None
+        }
+        assert not hasattr(project, "__dict__")
+        pass
+
+    def test_typed_set_methods(self):
+        """
+        Asserts set methods produce records, indexes work on them
+        and the raw dictionaries are still available.
+        :return: None
+        """
+        nova = NovaAPI(typed_records=True)
+        nova.activities_response = json_response(activities_json(3))
+        nova.set_my_activities()
+        assert all(isinstance(activity, Activity) for activity in nova.my_activities)
+        assert nova.lookup("my_activities", 2).projectId == 12
+        assert nova.raw_json("my_activities")[0]["stepId"] == 1
+        pass
+
+    def test_untyped_by_default(self):
+        """
+        Asserts set methods keep assigning dictionaries by default.
+        :return: None
+        """
+        nova = NovaAPI()
+        nova.activities_response = json_response(activities_json(1))
+        nova.set_my_activities()
+        assert isinstance(nova.my_activities[0], dict)
+        pass
+
+    def test_memory_comparison(self):
+        """
+        Asserts records take less than half the memory of the parsed dictionaries,
+        counting the containers and the values they don't share.
+        :return: None
+        """
+        parsed = json.loads(activities_json(1000))
+        records = Activity.from_json_list(parsed)
+
+        def size(item, fields):
+            values = item.values() if isinstance(item, dict) else [item[field] for field in fields]
+            return sys.getsizeof(item) + sum(
+                sys.getsizeof(value) for value in values if not isinstance(value, int)
+            )
+
+        dicts_size = sum(size(item, None) for item in parsed)
+        records_size = sum(size(item, Activity.__slots__) for item in records)
+        assert records_size * 2 < dicts_size
+        pass
+
+    def test_retained_memory(self):
+        """
+        Asserts an instance with typed records retains less memory after
+        set_my_activities than one keeping the dictionaries, the response
+        not holding the parsed dictionaries next to the records.
+        :return: None
+        """
+        tracemalloc = pytest.importorskip("tracemalloc")
+        body = activities_json(5000)
+
+        def retained(typed_records):
+            gc.collect()
+            tracemalloc.start()
+            try:
+                nova = NovaAPI(typed_records=typed_records)
+                nova.activities_response = json_response(body)
+                nova.set_my_activities()
+                gc.collect()
+                return tracemalloc.get_traced_memory()[0], nova
+            finally:
+                tracemalloc.stop()
+
+        typed_size, nova = retained(True)
+        assert not hasattr(nova.activities_response, "decoded_json")
+        assert nova.raw_json("my_activities")[0]["stepId"] == 1
+        assert not hasattr(nova.activities_response, "decoded_json")
+        dicts_size, _ = retained(False)
+        assert typed_size * 2 < dicts_size
+        pass
+
+    pass
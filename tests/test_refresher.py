@@ -0,0 +1,111 @@
+import threading
+import time
+import pytest
+from nova_api.refresher import CatalogRefresher
+
+
+def add_project(server, project_id):
+    """
+    Adds a project to the stub server's data.
+    :return: None
+    """
+    server.data.projects.append({
+        "id": project_id,
+        "name": "Project %d" % project_id,
+        "accountId": 1,
+        "typeId": 1,
+        "statusId": 1,
+    })
+    server.bodies.clear()
+    pass
+
+
+class TestCatalogRefresher(object):
+
+    def test_refresh_replaces_snapshot_and_index(self, server):
+        """
+        Asserts a refresh swaps in the new catalog with its index already built.
+        :return: None
+        """
+        nova = server.api("user1")
+        nova.login()
+        nova.load("projects")
+        old = nova.projects
+        old_index = nova.index("projects")
+        add_project(server, 99)
+        refresher = CatalogRefresher(nova, names=["projects"])
+        assert refresher.refresh("projects")
+        assert nova.projects is not old
+        assert len(nova.projects) == len(old) + 1
+        assert nova._indexes["projects"][0] is nova.projects
+        assert nova.lookup("projects", 99)["name"] == "Project 99"
+        assert old_index.get(99) is None
+        assert refresher.errors["projects"] is None
+        assert refresher.age("projects") < 1
+        pass
+
+    def test_failed_refresh_keeps_snapshot(self, server):
+        """
+        Asserts the old catalog is still served after a failed refresh.
+        :return: None
+        """
+        nova = server.api("user1")
+        nova.login()
+        nova.load("projects")
+        old = nova.projects
+        nova.projects_url = server.base_url + "/api/Missing"
+        refresher = CatalogRefresher(nova, names=["projects"], intervals={"projects": 600})
+        assert not refresher.refresh("projects")
+        assert nova.projects is old
+        assert refresher.failures == 1
+        assert refresher.errors["projects"] is not None
+        assert refresher.age("projects") is None
+        # Tried again after retry_interval instead of the catalog's interval.
+        assert refresher.due["projects"] - time.time() <= refresher.retry_interval
+        pass
+
+    def test_background_refresh(self, server):
+        """
+        Asserts the thread loads the missing catalogs right away and refreshes the
+        others on their interval while readers always get a snapshot.
+        :return: None
+        """
+        nova = server.api("user1")
+        nova.login()
+        nova.load("projects")
+        refresher = CatalogRefresher(
+            nova, names=["projects", "users"], intervals={"projects": 0.05, "users": 600}
+        )
+        seen = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                seen.append(len(nova.projects))
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        with refresher:
+            add_project(server, 99)
+            deadline = time.time() + 5
+            while refresher.refreshes < 4 and time.time() < deadline:
+                time.sleep(0.01)
+            assert nova.is_loaded("users")
+        done.set()
+        reader.join()
+        assert refresher.thread is None
+        assert refresher.refreshes >= 4
+        assert len(nova.projects) == 11
+        assert set(seen) <= {10, 11}
+        pass
+
+    def test_unknown_catalog(self, server):
+        """
+        Asserts only catalogs can be refreshed.
+        :return: None
+        """
+        with pytest.raises(ValueError):
+            CatalogRefresher(server.api(), names=["my_activities"])
+        pass
+
+    pass
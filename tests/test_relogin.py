@@ -0,0 +1,89 @@
+from multiprocessing.pool import ThreadPool
+import pytest
+from nova_api.api import NovaAPI
+from nova_api.nova_exceptions import LoginFailed
+from nova_api.tokens import MemoryTokenStore
+from .test_tokens import StubAdapter, stub_api
+
+
+class TestRelogin(object):
+
+    def test_expired_token_runs_login(self, server):
+        """
+        Asserts a rejected token runs the login and the request is sent again.
+        :return: None
+        """
+        store = MemoryTokenStore()
+        nova = server.api("user1", token_store=store)
+        nova.login()
+        expired = nova.access_token
+        server.expire_tokens()
+        nova.get_users()
+        assert nova.users_response.status_code == 200
+        assert nova.access_token != expired
+        assert store.load()["access_token"] == nova.access_token
+        assert server.logins == 2
+        pass
+
+    def test_single_flight(self, server):
+        """
+        Asserts concurrent rejected requests wait for a single login.
+        :return: None
+        """
+        nova = server.api("user1")
+        nova.login()
+        server.expire_tokens()
+        server.latency = 0.02
+        pool = ThreadPool(8)
+        try:
+            results = pool.map(lambda _: nova.fetch_activities(query={"limit": 1}), range(16))
+        finally:
+            pool.close()
+        assert all(len(activities) == 1 for activities in results)
+        assert server.logins == 2
+        pass
+
+    def test_retried_once(self):
+        """
+        Asserts a request rejected again after the login isn't retried in a loop,
+        and that the relogin can be disabled.
+        :return: None
+        """
+        adapter = UsersRejectedAdapter()
+        nova = stub_api(None, adapter)
+        nova.login()
+        nova.get_users()
+        assert nova.users_response.status_code == 401
+        logins = [url for method, url in adapter.requests if url.startswith(NovaAPI.login_url)]
+        assert len(logins) == 2
+        nova.relogin_on_unauthorized = False
+        adapter.requests = []
+        nova.get_users()
+        assert adapter.requests == [("GET", NovaAPI.users_url)]
+        pass
+
+    def test_failed_relogin_raises(self, server):
+        """
+        Asserts the login error reaches the caller when the password changed.
+        :return: None
+        """
+        nova = server.api("user1")
+        nova.login()
+        server.expire_tokens()
+        nova.password = "changed"
+        with pytest.raises(LoginFailed):
+            nova.fetch("users")
+        pass
+
+    pass
+
+
+class UsersRejectedAdapter(StubAdapter):
+    """
+    StubAdapter rejecting every token on the users endpoint.
+    """
+    def send(self, request, **kwargs):
+        if request.url == NovaAPI.users_url:
+            self.requests.append((request.method, request.url))
+            return self.response(request, 401, {"error": "unauthorized"})
+        return super(UsersRejectedAdapter, self).send(request, **kwargs)
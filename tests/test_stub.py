@@ -0,0 +1,98 @@
+import pytest
+import requests
+from nova_api.nova_exceptions import LoginFailed, BuildInfoFailed
+from nova_api.stub import apply_filter
+
+
+class TestStubServer(object):
+
+    def test_login_and_build_info(self, server):
+        """
+        Asserts NovaAPI logs in through the redirects and loads every attribute.
+        :return: None
+        """
+        nova = server.api("user2")
+        nova.login()
+        assert nova.profile_id == 2
+        assert nova.access_token in server.tokens
+        nova.build_info(concurrent=True)
+        assert len(nova.users) == 3
+        assert len(nova.projects) == 10
+        assert len(nova.my_activities) == 25
+        assert all(activity["employeeId"] == 2 for activity in nova.my_activities)
+        assert len(nova.my_projects) == 5
+        assert len(list(nova.iter_activities(page_size=10, key="activityId"))) == 25
+        pass
+
+    def test_build_info_error_statuses(self, server):
+        """
+        Asserts steps answered with an error status are reported and keep their attributes.
+        :return: None
+        """
+        nova = server.api("user1")
+        nova.login()
+        nova.build_info(concurrent=True)
+        users = nova.users
+        nova.relogin_on_unauthorized = False
+        server.expire_tokens()
+        with pytest.raises(BuildInfoFailed):
+            nova.build_info(concurrent=True)
+        assert nova.users is users
+        assert nova.users_response.status_code == 401
+        assert isinstance(nova.build_info_errors["users"], requests.exceptions.HTTPError)
+        assert "my_activities" in nova.build_info_errors
+        pass
+
+    def test_rejected_credentials(self, server):
+        """
+        Asserts a wrong password fails the login and requests without a token are rejected.
+        :return: None
+        """
+        with pytest.raises(LoginFailed):
+            server.api("user1", "wrong").login()
+        nova = server.api("user1")
+        nova.relogin_on_unauthorized = False
+        nova.ses.headers["Authorization"] = "bearer unknown"
+        nova.get_users()
+        assert nova.users_response.status_code == 401
+        pass
+
+    def test_activities_crud(self, server):
+        """
+        Asserts activities are created, edited and deleted,
+        and the following reads see the changes.
+        :return: None
+        """
+        nova = server.api("user1")
+        nova.login()
+        nova.post_activity(3, 1, comments="stub", hours=4)
+        activity = nova.post_activity_response.json()
+        assert activity["value"] == 4 and activity["employeeId"] == 1
+        nova.edit_activity(activity["activityId"], comments="edited")
+        assert nova.edit_activity_response.json()["comments"] == "edited"
+        nova.get_activities()
+        assert nova.activities_response.json()[-1]["comments"] == "edited"
+        nova.delete_activity(activity["activityId"])
+        assert nova.delete_activity_response.json() == {"count": 1}
+        result = nova.post_activities([{"project_id": 1, "activitytype_id": 1}] * 10)
+        assert len(result.succeeded) == 10
+        assert len(server.data.activities) == 3 * 25 + 10
+        pass
+
+    def test_apply_filter(self):
+        """
+        Asserts the LoopBack where operators, order, skip, limit and fields.
+        :return: None
+        """
+        records = [{"id": i, "group": i % 3} for i in range(10)]
+        assert apply_filter(records, {
+            "where": {"group": "1", "id": {"gt": 1, "lte": 7}},
+            "order": "id DESC",
+            "skip": 1,
+            "limit": 2,
+            "fields": ["id"],
+        }) == [{"id": 4}]
+        assert apply_filter(records, {"where": {"id": {"inq": [2, 3]}}}) == records[2:4]
+        pass
+
+    pass
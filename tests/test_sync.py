@@ -0,0 +1,46 @@
+import time
+from .test_iter_activities import paged_api
+
+
+def activities(count):
+    return [{"activityId": i, "employeeId": 7, "value": 1} for i in range(1, count + 1)]
+
+
+class TestActivitySync(object):
+
+    def test_incremental_sync(self):
+        """
+        Asserts only activities past the high-water mark are requested and merged.
+        :return: None
+        """
+        nova, adapter = paged_api(activities(30))
+        result = nova.sync_my_activities(page_size=10)
+        assert result.full and len(result.added) == 30
+        adapter.activities.extend([{"activityId": 31, "employeeId": 7, "value": 2}])
+        adapter.filters = []
+        result = nova.sync_my_activities()
+        assert not result.full
+        assert result.added == [31]
+        assert adapter.filters[0]["where"]["activityId"] == {"gt": 30}
+        assert len(adapter.filters) == 1
+        assert len(nova.my_activities) == 31
+        pass
+
+    def test_full_check_finds_deletions_and_edits(self):
+        """
+        Asserts a full check removes deleted activities and replaces edited ones.
+        :return: None
+        """
+        nova, adapter = paged_api(activities(5))
+        nova.sync_my_activities()
+        del adapter.activities[0]
+        adapter.activities[0] = {"activityId": 2, "employeeId": 7, "value": 8}
+        assert not nova.sync_my_activities().changed
+        nova.activity_sync.last_full_check = time.time() - nova.activity_sync.full_check_interval
+        result = nova.sync_my_activities()
+        assert result.full
+        assert result.deleted == [1] and result.updated == [2]
+        assert nova.lookup("my_activities", 2)["value"] == 8
+        pass
+
+    pass
@@ -0,0 +1,114 @@
+import json
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from nova_api.api import NovaAPI
+from nova_api.tokens import FileTokenStore, MemoryTokenStore
+
+TOKEN = "b" * 128
+
+
+class StubAdapter(BaseAdapter):
+    """
+    Transport adapter answering the login redirects, the profile and users
+    endpoints, only the tokens in the valid_tokens attribute are accepted.
+    """
+    def __init__(self):
+        super(StubAdapter, self).__init__()
+        self.valid_tokens = set([TOKEN])
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append((request.method, request.url))
+        path = request.url.split("?")[0]
+        if path == NovaAPI.login_url:
+            return self.response(request, 302, location=NovaAPI.authorization_url)
+        if path == NovaAPI.authorization_url and request.method == "POST":
+            return self.response(
+                request, 302,
+                location=NovaAPI.authorized_url + "?access_token=" + TOKEN + "&token_type=bearer"
+            )
+        if path == NovaAPI.authorization_url or path.startswith("http://nova.itexico.com/"):
+            return self.response(request, 200, "")
+        if request.headers.get("Authorization", "")[len("bearer "):] not in self.valid_tokens:
+            return self.response(request, 401, {"error": "unauthorized"})
+        if path == NovaAPI.profile_url:
+            return self.response(request, 200, {"id": 7, "email": "user"})
+        return self.response(request, 200, [{"id": 1}])
+
+    @staticmethod
+    def response(request, status_code, body=None, location=None):
+        response = Response()
+        response.status_code = status_code
+        response.request = request
+        response.url = request.url
+        response._content = json.dumps(body).encode("utf-8")
+        response._content_consumed = True
+        if location:
+            response.headers["Location"] = location
+        return response
+
+    def close(self):
+        pass
+
+
+def stub_api(store, adapter, username="user"):
+    """
+    Returns a NovaAPI instance using the given token store and stub adapter.
+    """
+    nova = NovaAPI(username, "password", token_store=store)
+    nova.ses.mount("http://", adapter)
+    return nova
+
+
+class TestTokenStore(object):
+
+    def test_resumed_session_skips_login(self, tmpdir):
+        """
+        Asserts a new instance restores the saved token without sending any request.
+        :return: None
+        """
+        store = FileTokenStore(str(tmpdir.join("token.json")))
+        adapter = StubAdapter()
+        stub_api(store, adapter).login()
+        assert store.load()["profile_id"] == 7
+        adapter.requests = []
+        nova = stub_api(store, adapter)
+        nova.login()
+        assert adapter.requests == []
+        assert nova.profile_id == 7
+        nova.get_users()
+        assert nova.users_response.status_code == 200
+        assert len(adapter.requests) == 1
+        pass
+
+    def test_rejected_token_runs_login(self):
+        """
+        Asserts a restored token rejected by the server runs the full login
+        and the request is sent again with the new token.
+        :return: None
+        """
+        store = MemoryTokenStore()
+        store.save({"username": "user", "access_token": "expired", "profile_id": 7})
+        nova = stub_api(store, StubAdapter())
+        nova.login()
+        nova.get_users()
+        assert nova.users_response.status_code == 200
+        assert nova.access_token == TOKEN
+        assert store.load()["access_token"] == TOKEN
+        pass
+
+    def test_other_username_is_not_restored(self):
+        """
+        Asserts a token saved for another username is ignored.
+        :return: None
+        """
+        store = MemoryTokenStore()
+        store.save({"username": "other", "access_token": TOKEN, "profile_id": 3})
+        adapter = StubAdapter()
+        nova = stub_api(store, adapter)
+        nova.login()
+        assert adapter.requests
+        assert nova.profile_id == 7
+        pass
+
+    pass
@@ -0,0 +1,216 @@
+import threading
+from multiprocessing.pool import ThreadPool
+import pytest
+from nova_api.api import NovaAPI
+from nova_api.metrics import InMemoryMetrics
+from nova_api.stub import NovaStubServer, StubData
+from nova_api.transport import JitterRetry, SingleFlight, TransportConfig
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """
+    Answers 503 to the first two requests of each method and 200 afterwards.
+    """
+    counts = {}
+
+    def answer(self):
+        count = self.counts[self.command] = self.counts.get(self.command, 0) + 1
+        self.send_response(503 if count <= 2 else 200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"[]")
+
+    do_GET = do_POST = answer
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_url():
+    FlakyHandler.counts = {}
+    server = HTTPServer(("127.0.0.1", 0), FlakyHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield "http://127.0.0.1:%d/" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+class TestTransportConfig(object):
+
+    def test_idempotent_requests_are_retried(self, flaky_url):
+        """
+        Asserts GET requests are retried and POST requests are not.
+        :return: None
+        """
+        session = TransportConfig(backoff_factor=0).session()
+        assert session.get(flaky_url).status_code == 200
+        assert session.post(flaky_url).status_code == 503
+        assert FlakyHandler.counts == {"GET": 3, "POST": 1}
+        pass
+
+    def test_nova_api_session(self):
+        """
+        Asserts NovaAPI mounts the configured adapter on both schemes.
+        :return: None
+        """
+        nova = NovaAPI(transport=TransportConfig(pool_maxsize=32, read_timeout=10))
+        for prefix in ("http://", "https://"):
+            adapter = nova.ses.get_adapter(prefix + "nova.cloudapp.net")
+            assert adapter.timeout == (TransportConfig.connect_timeout, 10)
+            assert adapter._pool_maxsize == 32
+            assert "POST" not in adapter.max_retries.new().allowed_methods
+        pass
+
+    def test_backoff_jitter(self):
+        """
+        Asserts the backoff is randomized within the jitter fraction.
+        :return: None
+        """
+        retry = TransportConfig(backoff_factor=1, jitter=0.5).retry()
+        for _ in range(3):
+            retry = retry.increment(method="GET", url="/")
+        assert retry.jitter == 0.5
+        backoffs = set(retry.get_backoff_time() for _ in range(20))
+        assert all(2 <= backoff <= 4 for backoff in backoffs)
+        assert len(backoffs) > 1
+        assert JitterRetry(backoff_factor=0).get_backoff_time() == 0
+        pass
+
+    def test_unknown_option(self):
+        with pytest.raises(TypeError):
+            TransportConfig(pool_size=3)
+        pass
+
+    def test_single_flight(self):
+        """
+        Asserts callers arriving during a call share its result or exception.
+        :return: None
+        """
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return ["result"]
+
+        pool = ThreadPool(4)
+        leader = pool.apply_async(flight.do, ("key", slow))
+        started.wait()
+        followers = [pool.apply_async(flight.do, ("key", slow)) for _ in range(3)]
+        while flight.coalesced < 3:
+            release.wait(0.01)
+        release.set()
+        results = [leader.get()] + [follower.get() for follower in followers]
+        pool.close()
+        pool.join()
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert flight.flights == {}
+
+        def failing():
+            raise ValueError("failed")
+
+        with pytest.raises(ValueError):
+            flight.do("key", failing)
+        assert flight.do("key", lambda: 1) == 1
+        assert (flight.calls, flight.coalesced) == (3, 3)
+        pass
+
+    def test_single_flight_generations(self):
+        """
+        Asserts calls made after advance don't join the calls started before it.
+        :return: None
+        """
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(len(calls))
+            started.set()
+            release.wait()
+            return len(calls)
+
+        pool = ThreadPool(2)
+        before = pool.apply_async(flight.do, ("key", slow))
+        started.wait()
+        flight.advance()
+        after = pool.apply_async(flight.do, ("key", slow))
+        while len(calls) < 2:
+            release.wait(0.01)
+        release.set()
+        assert before.get() in (1, 2) and after.get() == 2
+        pool.close()
+        pool.join()
+        assert (flight.calls, flight.coalesced) == (2, 0)
+        assert flight.flights == {}
+        pass
+
+    def test_writes_advance_the_generation(self, server):
+        """
+        Asserts every request other than GET and HEAD starts a new generation
+        before it's sent and once it's answered.
+        :return: None
+        """
+        nova = server.api("user1")
+        nova.login()
+        flight = nova.ses.get_adapter(nova.activities_url).single_flight
+        generation = flight.generation
+        nova.fetch_activities()
+        assert flight.generation == generation
+        nova.create_activity(1, 1)
+        assert flight.generation == generation + 2
+        pass
+
+    @pytest.mark.parametrize("coalesce", [True, False])
+    def test_identical_gets_are_coalesced(self, coalesce):
+        """
+        Asserts concurrent identical catalog requests are sent and measured once,
+        each caller parsing its own copy, and sent separately when coalescing is disabled.
+        :return: None
+        """
+        data = StubData(users=3, projects=10, activities=1)
+        metrics = InMemoryMetrics()
+        with NovaStubServer(data, latency=0.2) as server:
+            nova = server.api(
+                transport=TransportConfig(coalesce_requests=coalesce), metrics=metrics
+            )
+            nova.login()
+            metrics.reset()
+            requests = server.requests
+
+            def startup(index):
+                response = nova.ses.get(nova.projects_url if index % 2 else nova.users_url)
+                return nova.decode_response(response)
+
+            pool = ThreadPool(8)
+            try:
+                results = pool.map(startup, range(8))
+            finally:
+                pool.close()
+                pool.join()
+            sent = server.requests - requests
+        assert len(results[0]) == 3 and len(results[1]) == 10
+        assert results[2] == results[0] and results[3] == results[1]
+        assert results[2] is not results[0] and results[3] is not results[1]
+        measured = sum(stats["count"] for stats in metrics.snapshot().values())
+        if coalesce:
+            assert sent == measured == 2
+        else:
+            assert sent == measured == 8
+        pass
+
+    pass
@@ -0,0 +1,168 @@
+import datetime
+from nova_api.api import activity_data
+from nova_api.metrics import InMemoryMetrics
+from nova_api.nova_exceptions import LoginFailed
+from nova_api.records import Activity
+from nova_api.upsert import ActivityIndex, activity_key, activity_changes
+
+
+def spec_of(activity):
+    """
+    :return: dictionary, the post_activity keyword arguments of a stored activity.
+    """
+    return {
+        "project_id": activity["projectId"],
+        "activitytype_id": activity["typeId"],
+        "date": datetime.datetime.strptime(activity["activityDate"][:10], "%Y-%m-%d"),
+        "employee_id": activity["employeeId"],
+        "comments": activity["comments"],
+        "hours": activity["value"],
+        "ticket": activity["task"],
+    }
+
+
+def writes(metrics):
+    """
+    :return: integer, POST, PUT and DELETE requests measured.
+    """
+    return sum(
+        stats["count"] for endpoint, stats in metrics.snapshot().items()
+        if endpoint.split()[0] in ("POST", "PUT", "DELETE")
+    )
+
+
+class TestUpsert(object):
+
+    def test_activity_key(self):
+        """
+        Asserts stored activities and request bodies get the same key.
+        :return: None
+        """
+        stored = Activity(
+            activityId=3, activityDate="2016-06-01T00:00:00.000Z", employeeId="7",
+            projectId=2, typeId=1, value=8, comments="", task=None
+        )
+        data = activity_data(2, 1, date=datetime.datetime(2016, 6, 1), employee_id=7, hours=8)
+        assert activity_key(stored) == activity_key(data)
+        assert activity_changes(stored, data) == {}
+        data["comments"] = "changed"
+        assert activity_changes(stored, data) == {"activityId": 3, "comments": "changed"}
+        data["value"] = 4
+        assert activity_changes(stored, data) == {
+            "activityId": 3, "comments": "changed", "value": 4, "billablevalue": 4
+        }
+        pass
+
+    def test_index_matches_once(self):
+        """
+        Asserts repeated keys pair with distinct stored activities.
+        :return: None
+        """
+        first = {"activityId": 1, "employeeId": 1, "projectId": 1, "typeId": 1,
+                 "activityDate": "2016-06-01T00:00:00Z", "task": ""}
+        second = dict(first, activityId=2)
+        index = ActivityIndex([first, second])
+        assert len(index) == 2
+        key = activity_key(first)
+        assert index.match(key) is first
+        assert index.match(key) is second
+        assert index.match(key) is None
+        pass
+
+    def test_resync_sends_no_writes(self, server):
+        """
+        Asserts upserting the stored activities again sends no write request.
+        :return: None
+        """
+        metrics = InMemoryMetrics()
+        nova = server.api("user1", metrics=metrics)
+        nova.login()
+        stored = nova.fetch_activities()
+        # The login posts its form.
+        metrics.reset()
+        result = nova.upsert_activities([spec_of(activity) for activity in stored])
+        assert len(result.unchanged) == len(stored) == 25
+        assert result.writes == 0
+        assert not result.changed
+        assert writes(metrics) == 0
+        pass
+
+    def test_only_changes_are_sent(self, server):
+        """
+        Asserts edits carry only the differing fields and only new specs are posted.
+        :return: None
+        """
+        nova = server.api("user1")
+        nova.login()
+        stored = nova.fetch_activities(query={"order": "activityId ASC"})
+        specs = [spec_of(activity) for activity in stored]
+        specs[0]["comments"] = "edited"
+        specs[1]["hours"] = 3
+        specs.append(dict(specs[2], ticket="NOVA-1"))
+        bodies = []
+        nova.ses.hooks["response"].append(
+            lambda response, *args, **kwargs: bodies.append(
+                (response.request.method, response.request.body)
+            )
+        )
+        result = nova.upsert_activities(specs)
+        assert len(result.unchanged) == 23
+        assert sorted(activity["activityId"] for activity in result.updated) == [
+            stored[0]["activityId"], stored[1]["activityId"]
+        ]
+        assert [activity["task"] for activity in result.created] == ["NOVA-1"]
+        assert result.writes == 3 and not result.failed
+        put_bodies = sorted(sorted(body.split("&")) for method, body in bodies if method == "PUT")
+        assert put_bodies == sorted([
+            ["activityId=%d" % stored[0]["activityId"], "comments=edited"],
+            ["activityId=%d" % stored[1]["activityId"], "billablevalue=3", "value=3"],
+        ])
+        assert nova.upsert_activities(specs).writes == 0
+        pass
+
+    def test_failed_edit_keeps_other_results(self, server, monkeypatch):
+        """
+        Asserts an edit raising something other than a requests error is recorded
+        in failed while the other edits and the posts are still sent.
+        :return: None
+        """
+        nova = server.api("user1")
+        nova.login()
+        stored = nova.fetch_activities(query={"order": "activityId ASC"})
+        specs = [spec_of(activity) for activity in stored[:2]]
+        specs[0]["comments"] = "rejected"
+        specs[1]["comments"] = "edited"
+        specs.append(dict(specs[1], ticket="NOVA-2"))
+        request = nova.request
+
+        def reject_first_edit(method, url, **kwargs):
+            if method == "PUT" and url.endswith("/" + str(stored[0]["activityId"])):
+                raise LoginFailed("expired")
+            return request(method, url, **kwargs)
+
+        monkeypatch.setattr(nova, "request", reject_first_edit)
+        result = nova.upsert_activities(specs)
+        assert len(result.failed) == 1
+        assert result.failed[0][0]["comments"] == "rejected"
+        assert isinstance(result.failed[0][1], LoginFailed)
+        assert [activity["activityId"] for activity in result.updated] == [stored[1]["activityId"]]
+        assert [activity["task"] for activity in result.created] == ["NOVA-2"]
+        pass
+
+    def test_given_existing_activities(self, server):
+        """
+        Asserts no activities are requested when the existing ones are given.
+        :return: None
+        """
+        nova = server.api("user2")
+        nova.login()
+        stored = nova.fetch_activities()
+        requests = server.requests
+        result = nova.upsert_activities(
+            [spec_of(activity) for activity in stored[:5]], existing=stored
+        )
+        assert len(result.unchanged) == 5
+        assert server.requests == requests
+        pass
+
+    pass